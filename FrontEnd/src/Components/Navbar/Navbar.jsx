@@ -86,32 +86,11 @@ const Navbar = () => {
         </Dropdown.Item>
     );
 
-    const fetchProductDetails = async (product_id) => {
-        try {
-            const response = await fetch(`${baseURL}/search/${product_id}`, {
-                method: 'GET',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${token}`
-                },
-                credentials: 'include'
-            });
-            
-            if (response.ok) {
-                return await response.json();
-            }
-            return null;
-        } catch (error) {
-            console.error('Error fetching product details:', error);
-            return null;
-        }
-    };
-
     const fetchAlerts = async () => {
         if (!isLoggedIn || !token) return;
 
         try {
-            const alertsResponse = await fetch(`${baseURL}/alerts/triggered`, {
+            const alertsResponse = await fetch(`${baseURL}/alerts/triggered?include_product=true`, {
                 method: 'GET',
                 headers: {
                     'Content-Type': 'application/json',
@@ -122,20 +101,16 @@ const Navbar = () => {
     
             if (alertsResponse.ok) {
                 const alerts = await alertsResponse.json();
-                const alertsWithProductDetails = await Promise.all(
-                    alerts.map(async (alert) => {
-                        const productDetails = await fetchProductDetails(alert.product_id);
-                        const productName = productDetails?.title || 'Unknown Product';
-                        const truncatedName = productName.split(' ').slice(0, 4).join(' ') + '...';
-                        return {
-                            ...alert,
-                            product_id: productDetails?.product_id || '',
-                            product_name: truncatedName,
-                            product_picture: productDetails?.image_url || '',
-                            product_price: productDetails?.price || 0,
-                        };
-                    })
-                );
+                const alertsWithProductDetails = alerts.map((alert) => {
+                    const productName = alert.product?.title || 'Unknown Product';
+                    const truncatedName = productName.split(' ').slice(0, 4).join(' ') + '...';
+                    return {
+                        ...alert,
+                        product_name: truncatedName,
+                        product_picture: alert.product?.image_url || '',
+                        product_price: alert.product?.price || 0,
+                    };
+                });
                 setAlerts(alertsWithProductDetails);
             }
         } catch (error) {
@@ -143,6 +118,25 @@ const Navbar = () => {
         }
     };
 
+    // A new price only changes the cards of that product: patch them from the event
+    const handlePriceChanged = (event) => {
+        const { product_id, price } = JSON.parse(event.data);
+        setAlerts((currentAlerts) => currentAlerts.map((alert) => (
+            alert.product_id === product_id ? { ...alert, product_price: price } : alert
+        )));
+    };
+
+    // Server-sent events: refetch the triggered alerts only when a new one is triggered
+    useEffect(() => {
+        if (!isLoggedIn || !token) return;
+
+        const source = new EventSource(`${baseURL}/alerts/stream`, { withCredentials: true });
+        source.addEventListener('alert_triggered', fetchAlerts);
+        source.addEventListener('price_changed', handlePriceChanged);
+
+        return () => source.close();
+    }, [isLoggedIn, token]);
+
     const navigateToAlerts = () => {
         navigate('/alerts');
     };
@@ -38,18 +38,6 @@ const AlertManagement = () => {
     return () => window.removeEventListener('resize', handleResize);
   }, [viewMode]);
 
-  // Fetch product details
-  const fetchProductDetails = async (productId) => {
-    try {
-      const response = await fetch(`${baseURL}/search/${productId}`);
-      if (!response.ok) throw new Error('Failed to fetch product details');
-      const data = await response.json();
-      return data;
-    } catch (err) {
-      console.error('Error fetching product details:', err);
-      return null;
-    }
-  };
   const getDisplayTitle = (productDetail) => {
     if (!productDetail) {
       return t('alerts.product');
@@ -86,32 +74,40 @@ const AlertManagement = () => {
       const userData = await userResponse.json();
       const userId = userData.user.id;
 
-      const alertsResponse = await fetch(`${baseURL}/alerts/?user_id=${userId}`, {
-        headers: {
-          'Authorization': `Bearer ${currentToken}`
-        },
-        credentials: 'include'
-      });
-      
-      if (alertsResponse.status === 401) {
-        setShowAuthModal(true);
-        setLoading(false);
-        return;
+      // Alerts come with an embedded product card, paged by alert_id
+      const pageSize = 200;
+      let alertsData = [];
+      let afterId = null;
+      while (true) {
+        const cursor = afterId !== null ? `&after_id=${afterId}` : '';
+        const alertsResponse = await fetch(
+          `${baseURL}/alerts/?user_id=${userId}&include_product=true&limit=${pageSize}${cursor}`,
+          {
+            headers: {
+              'Authorization': `Bearer ${currentToken}`
+            },
+            credentials: 'include'
+          }
+        );
+
+        if (alertsResponse.status === 401) {
+          setShowAuthModal(true);
+          setLoading(false);
+          return;
+        }
+
+        if (!alertsResponse.ok) throw new Error('Failed to fetch alerts');
+        const page = await alertsResponse.json();
+        alertsData = alertsData.concat(page);
+        if (page.length < pageSize) break;
+        afterId = page[page.length - 1].alert_id;
       }
 
-      if (!alertsResponse.ok) throw new Error('Failed to fetch alerts');
-      const alertsData = await alertsResponse.json();
-      
-      const alertsWithProducts = await Promise.all(
-        alertsData.map(async (alert) => {
-          const productDetail = await fetchProductDetails(alert.product_id);
-          return {
-            ...alert,
-            productDetail
-          };
-        })
-      );
-      
+      const alertsWithProducts = alertsData.map(({ product, ...alert }) => ({
+        ...alert,
+        productDetail: product
+      }));
+
       setAlerts(alertsWithProducts);
     } catch (err) {
       console.error('Error fetching alerts:', err);
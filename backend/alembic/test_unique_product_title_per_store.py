@@ -0,0 +1,63 @@
+import importlib.util
+import os
+import unittest
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+MIGRATION = os.path.join(os.path.dirname(__file__), "versions", "9c3e5a7f2d14_unique_product_title_per_store.py")
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("unique_product_title_per_store", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestUniqueProductTitlePerStore(unittest.TestCase):
+    """Duplicates are merged into the oldest product, keeping one alert per (user, product)."""
+
+    def setUp(self):
+        self.migration = load_migration()
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE products (product_id INTEGER PRIMARY KEY, title TEXT, store_id INTEGER)"))
+            conn.execute(text("CREATE TABLE alerts (alert_id INTEGER PRIMARY KEY, user_id INTEGER, "
+                              "product_id INTEGER, threshold_price REAL, alert_status TEXT)"))
+            for table, column in self.migration.CHILD_COLUMNS:
+                if table != "alerts":
+                    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY)"))
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER"))
+            conn.execute(text("INSERT INTO products VALUES (1, 'Phone', 1), (2, 'Phone', 1), (3, 'Phone', 1)"))
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def upgrade(self, alerts):
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO alerts VALUES (:alert_id, 7, :product_id, :threshold, :status)"),
+                         [dict(zip(("alert_id", "product_id", "threshold", "status"), alert)) for alert in alerts])
+            with Operations.context(MigrationContext.configure(conn)):
+                self.migration.upgrade()
+            products = conn.execute(text("SELECT product_id FROM products")).scalars().all()
+            kept = conn.execute(text("SELECT alert_id, product_id FROM alerts")).all()
+        self.assertEqual(products, [1])
+        return kept
+
+    def test_active_alert_is_kept_over_a_newer_triggered_one(self):
+        kept = self.upgrade([(1, 1, 100.0, "triggered"), (2, 2, 80.0, "active"), (3, 3, 90.0, "triggered")])
+        self.assertEqual(kept, [(2, 1)])
+
+    def test_newest_active_alert_is_kept(self):
+        kept = self.upgrade([(1, 1, 100.0, "active"), (2, 2, 80.0, "active"), (3, 3, 90.0, "triggered")])
+        self.assertEqual(kept, [(2, 1)])
+
+    def test_newest_alert_is_kept_when_none_is_active(self):
+        kept = self.upgrade([(1, 1, 100.0, "triggered"), (2, 2, 80.0, "triggered"), (3, 3, 90.0, None)])
+        self.assertEqual(kept, [(3, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+"""Add partial index on active alerts
+
+Revision ID: 3f1c9a7d2b64
+Revises: 818d246a868a
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = '818d246a868a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Only active alerts are scanned by the alert sweep
+    op.create_index(
+        'ix_alerts_active_product_threshold',
+        'alerts',
+        ['product_id', 'threshold_price'],
+        unique=False,
+        postgresql_where=sa.text("alert_status = 'active'"),
+        sqlite_where=sa.text("alert_status = 'active'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_active_product_threshold', table_name='alerts')
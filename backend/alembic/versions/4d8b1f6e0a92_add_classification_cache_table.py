@@ -0,0 +1,32 @@
+"""Add classification_cache table
+
+Revision ID: 4d8b1f6e0a92
+Revises: 9c3e5a7f2d14
+Create Date: 2026-10-19 16:48:10.527364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8b1f6e0a92'
+down_revision: Union[str, None] = '9c3e5a7f2d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'classification_cache',
+        sa.Column('title_hash', sa.String, primary_key=True),
+        sa.Column('category_id', sa.Integer,
+                  sa.ForeignKey('categories.category_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('classification_cache')
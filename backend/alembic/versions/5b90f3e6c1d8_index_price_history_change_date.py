@@ -0,0 +1,27 @@
+"""Index product_price_histories.change_date
+
+Revision ID: 5b90f3e6c1d8
+Revises: c7d2e8b41a03
+Create Date: 2026-10-19 12:41:07.882913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b90f3e6c1d8'
+down_revision: Union[str, None] = 'c7d2e8b41a03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Used by the alert event relay to read recent price changes
+    op.create_index(op.f('ix_product_price_histories_change_date'), 'product_price_histories', ['change_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_product_price_histories_change_date'), table_name='product_price_histories')
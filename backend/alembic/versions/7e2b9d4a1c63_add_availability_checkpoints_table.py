@@ -0,0 +1,31 @@
+"""Add availability_checkpoints table
+
+Revision ID: 7e2b9d4a1c63
+Revises: f1a7c3e9b285
+Create Date: 2026-10-19 19:12:08.472915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2b9d4a1c63'
+down_revision: Union[str, None] = 'f1a7c3e9b285'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'availability_checkpoints',
+        sa.Column('name', sa.String, primary_key=True),
+        sa.Column('last_product_id', sa.Integer, nullable=True),
+        sa.Column('updated_at', sa.DateTime, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('availability_checkpoints')
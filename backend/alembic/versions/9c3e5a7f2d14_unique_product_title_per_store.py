@@ -0,0 +1,73 @@
+"""Unique product title per store
+
+Revision ID: 9c3e5a7f2d14
+Revises: e2a4c6f81b37
+Create Date: 2026-10-19 16:05:48.302117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5a7f2d14'
+down_revision: Union[str, None] = 'e2a4c6f81b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables (and columns) referencing products.product_id
+CHILD_COLUMNS = [
+    ('product_title_translations', 'product_id'),
+    ('search_histories', 'product_id'),
+    ('alerts', 'product_id'),
+    ('product_matches', 'product_id_1'),
+    ('product_matches', 'product_id_2'),
+    ('product_price_histories', 'product_id'),
+    ('user_recommendations', 'product_id'),
+]
+
+# Products with the same title and store as an older product (the one the scraper kept updating)
+DUPLICATES = """
+    SELECT p.product_id FROM products p
+    WHERE EXISTS (
+        SELECT 1 FROM products k
+        WHERE k.title = p.title AND k.store_id = p.store_id AND k.product_id < p.product_id
+    )
+"""
+
+# 1 for an active alert, 0 otherwise: active alerts are kept first
+ACTIVE_FIRST = "CASE WHEN {alert}.alert_status = 'active' THEN 1 ELSE 0 END"
+
+
+def upgrade() -> None:
+    # Point the rows of the duplicates at the oldest product of their (title, store_id), then drop them
+    for table, column in CHILD_COLUMNS:
+        op.execute(f"""
+            UPDATE {table} SET {column} = (
+                SELECT MIN(k.product_id) FROM products d
+                JOIN products k ON k.title = d.title AND k.store_id = d.store_id
+                WHERE d.product_id = {table}.{column}
+            )
+            WHERE {column} IN ({DUPLICATES})
+        """)
+    # A user watching several duplicates now has several alerts on the kept product (same or
+    # different threshold_price); the API allows one per (user_id, product_id): keep an active
+    # one if there is any, the newest of them otherwise
+    op.execute(f"""
+        DELETE FROM alerts WHERE EXISTS (
+            SELECT 1 FROM alerts n
+            WHERE n.user_id = alerts.user_id AND n.product_id = alerts.product_id
+              AND ({ACTIVE_FIRST.format(alert='n')} > {ACTIVE_FIRST.format(alert='alerts')}
+                   OR ({ACTIVE_FIRST.format(alert='n')} = {ACTIVE_FIRST.format(alert='alerts')}
+                       AND n.alert_id > alerts.alert_id))
+        )
+    """)
+    op.execute(f"DELETE FROM products WHERE product_id IN ({DUPLICATES})")
+
+    op.create_index('uq_products_title_store', 'products', ['title', 'store_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_products_title_store', table_name='products')
@@ -0,0 +1,26 @@
+"""Add alerts (user_id, alert_id) index for keyset pagination
+
+Revision ID: a41e6c0d95f7
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-19 10:02:13.540871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41e6c0d95f7'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_alerts_user_alert', 'alerts', ['user_id', 'alert_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_user_alert', table_name='alerts')
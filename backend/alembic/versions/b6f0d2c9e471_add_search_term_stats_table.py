@@ -0,0 +1,36 @@
+"""Add search_term_stats table
+
+Revision ID: b6f0d2c9e471
+Revises: 4d8b1f6e0a92
+Create Date: 2026-10-19 17:22:35.910448
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f0d2c9e471'
+down_revision: Union[str, None] = '4d8b1f6e0a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'search_term_stats',
+        sa.Column('search_value', sa.String, primary_key=True),
+        sa.Column('crawls', sa.Integer, nullable=True),
+        sa.Column('last_crawled_at', sa.DateTime, nullable=True),
+        sa.Column('next_due_at', sa.DateTime, nullable=True, index=True),
+        sa.Column('interval_hours', sa.Float, nullable=True),
+        sa.Column('last_yield', sa.Integer, nullable=True),
+        sa.Column('new_rate', sa.Float, nullable=True),
+        sa.Column('price_change_rate', sa.Float, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('search_term_stats')
@@ -0,0 +1,32 @@
+"""Add job_locks table
+
+Revision ID: c7d2e8b41a03
+Revises: a41e6c0d95f7
+Create Date: 2026-10-19 11:20:51.307446
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e8b41a03'
+down_revision: Union[str, None] = 'a41e6c0d95f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_locks',
+        sa.Column('job_name', sa.String, primary_key=True),
+        sa.Column('owner', sa.String, nullable=False),
+        sa.Column('acquired_at', sa.DateTime, nullable=True),
+        sa.Column('expires_at', sa.DateTime, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_locks')
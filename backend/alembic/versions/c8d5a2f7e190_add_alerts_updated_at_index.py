@@ -0,0 +1,26 @@
+"""Add alerts updated_at index for the alert index version
+
+Revision ID: c8d5a2f7e190
+Revises: 7e2b9d4a1c63
+Create Date: 2026-10-19 20:31:44.105382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d5a2f7e190'
+down_revision: Union[str, None] = '7e2b9d4a1c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_alerts_updated_at', 'alerts', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_updated_at', table_name='alerts')
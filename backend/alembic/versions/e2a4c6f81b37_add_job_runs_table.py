@@ -0,0 +1,36 @@
+"""Add job_runs table
+
+Revision ID: e2a4c6f81b37
+Revises: 5b90f3e6c1d8
+Create Date: 2026-10-19 13:36:22.451902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a4c6f81b37'
+down_revision: Union[str, None] = '5b90f3e6c1d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_runs',
+        sa.Column('run_id', sa.Integer, primary_key=True, index=True),
+        sa.Column('job_name', sa.String, nullable=False, index=True),
+        sa.Column('started_at', sa.DateTime, nullable=False),
+        sa.Column('finished_at', sa.DateTime, nullable=True),
+        sa.Column('duration_seconds', sa.Float, nullable=True),
+        sa.Column('items_processed', sa.Integer, nullable=True),
+        sa.Column('status', sa.String, nullable=False),
+        sa.Column('error', sa.String, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_runs')
@@ -0,0 +1,30 @@
+"""Add products.last_checked
+
+Revision ID: f1a7c3e9b285
+Revises: b6f0d2c9e471
+Create Date: 2026-10-19 18:04:51.336720
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a7c3e9b285'
+down_revision: Union[str, None] = 'b6f0d2c9e471'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('last_checked', sa.DateTime, nullable=True))
+    op.create_index('ix_products_last_checked', 'products', ['last_checked'], unique=False)
+    # The availability check has been moving last_updated so far: the best guess of the last check
+    op.execute("UPDATE products SET last_checked = last_updated")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_last_checked', table_name='products')
+    op.drop_column('products', 'last_checked')
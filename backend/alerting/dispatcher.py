@@ -0,0 +1,335 @@
+# backend/alerting/dispatcher.py
+import os
+import html
+import time
+import queue
+import logging
+import smtplib
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from dotenv import load_dotenv
+
+from models import SessionLocal, Alert, Product, User
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """
+    Small pool of persistent SMTP connections.
+    Connections are checked with NOOP before reuse and replaced when broken,
+    so a burst of digests shares a handful of TCP/TLS handshakes.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_starttls=False, size=2, timeout=30):
+        self.host = host
+        self.port = int(port)
+        self.username = username
+        self.password = password
+        self.use_starttls = use_starttls
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_starttls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    @staticmethod
+    def _is_alive(smtp):
+        try:
+            return smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _discard(smtp):
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    def acquire(self):
+        while True:
+            try:
+                smtp = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._is_alive(smtp):
+                return smtp
+            self._discard(smtp)
+            with self._lock:
+                self._created -= 1
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        # Pool exhausted: wait for a connection to be released
+        return self._idle.get()
+
+    def release(self, smtp, broken=False):
+        if broken:
+            self._discard(smtp)
+            with self._lock:
+                self._created -= 1
+        else:
+            self._idle.put(smtp)
+
+    @contextmanager
+    def connection(self):
+        smtp = self.acquire()
+        try:
+            yield smtp
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.release(smtp, broken=True)
+            raise
+        except Exception:
+            # e.g. a refused recipient: the connection itself is still usable
+            self.release(smtp)
+            raise
+        else:
+            self.release(smtp)
+
+    def close(self):
+        while True:
+            try:
+                smtp = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(smtp)
+            with self._lock:
+                self._created -= 1
+
+
+class NotificationDispatcher:
+    """
+    Queue of triggered alerts, drained by a background thread.
+
+    Triggered rows are coalesced for `window_seconds` and sent as one digest
+    email per user through a SMTPConnectionPool, with retries and exponential
+    backoff. enqueue() never blocks on SMTP.
+    """
+
+    def __init__(self, pool, sender, window_seconds=60, max_retries=3, backoff_seconds=2.0,
+                 session_factory=SessionLocal):
+        self.pool = pool
+        self.sender = sender
+        self.window_seconds = window_seconds
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.session_factory = session_factory
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls):
+        smtp_server = os.getenv("SMTP_SERVER")
+        if not smtp_server:
+            return cls(pool=None, sender=None)
+        pool = SMTPConnectionPool(
+            host=smtp_server,
+            port=os.getenv("SMTP_PORT", "25"),
+            username=os.getenv("SMTP_USERNAME"),
+            password=os.getenv("SMTP_PASSWORD"),
+            use_starttls=os.getenv("SMTP_STARTTLS", "false").lower() == "true",
+            size=int(os.getenv("SMTP_POOL_SIZE", "2")),
+        )
+        sender = os.getenv("SMTP_SENDER") or os.getenv("SMTP_USERNAME")
+        window_seconds = int(os.getenv("ALERT_DIGEST_WINDOW_SECONDS", "60"))
+        return cls(pool=pool, sender=sender, window_seconds=window_seconds)
+
+    @property
+    def enabled(self):
+        return self.pool is not None
+
+    def start(self):
+        if not self.enabled:
+            logger.info("SMTP_SERVER is not set; alert notifications are disabled.")
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logger.info("Started Notification Dispatcher.")
+
+    def stop(self, timeout=None):
+        """Stop the background thread once it has sent the digests of everything queued so far."""
+        self._stop.set()
+        if self._thread:
+            self._queue.put(None)  # Wakes up the thread waiting in _collect_window
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning("Notification Dispatcher still sending at shutdown; pending digests may be lost.")
+            self._thread = None
+        if self.pool:
+            self.pool.close()
+
+    def enqueue(self, triggered_rows):
+        """Queue (alert_id, user_id, product_id) rows returned by the alert evaluator."""
+        if not self._thread:
+            return
+        for alert_id, user_id, product_id in triggered_rows:
+            self._queue.put_nowait((alert_id, user_id, product_id))
+
+    # -------------------------------
+    # Background loop
+    # -------------------------------
+    def _collect_window(self):
+        """Block for the first item, then coalesce everything arriving within the window."""
+        try:
+            first = self._queue.get(timeout=1)
+        except queue.Empty:
+            return {}
+
+        pending = defaultdict(list)
+        if first is None:
+            return pending
+        alert_id, user_id, product_id = first
+        pending[user_id].append(alert_id)
+
+        deadline = time.monotonic() + self.window_seconds
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            alert_id, user_id, product_id = item
+            pending[user_id].append(alert_id)
+        return pending
+
+    def _drain(self):
+        """Everything queued right now, without waiting."""
+        pending = defaultdict(list)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return pending
+            if item is not None:
+                alert_id, user_id, product_id = item
+                pending[user_id].append(alert_id)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._flush_safely(self._collect_window())
+        # Stopping: send what was queued during the last window instead of dropping it
+        self._flush_safely(self._drain())
+
+    def _flush_safely(self, pending):
+        if not pending:
+            return
+        try:
+            self.flush(pending)
+        except Exception as e:
+            logger.error(f"Error dispatching alert notifications: {e}")
+
+    # -------------------------------
+    # Digest building and delivery
+    # -------------------------------
+    def _load_digests(self, pending):
+        """
+        Load recipients and product details for all pending alerts in two queries.
+        Returns {user_id: (email, username, [alert rows...])}.
+        """
+        alert_ids = [a_id for ids in pending.values() for a_id in ids]
+        with self.session_factory() as db:
+            users = (
+                db.query(User.user_id, User.email, User.username)
+                .filter(User.user_id.in_(list(pending.keys())))
+                .all()
+            )
+            rows = (
+                db.query(Alert.alert_id, Alert.user_id, Alert.threshold_price,
+                         Product.title, Product.price, Product.link)
+                .join(Product, Alert.product_id == Product.product_id)
+                .filter(Alert.alert_id.in_(alert_ids))
+                .all()
+            )
+
+        alerts_by_user = defaultdict(list)
+        for row in rows:
+            alerts_by_user[row.user_id].append(row)
+        return {
+            u.user_id: (u.email, u.username, alerts_by_user[u.user_id])
+            for u in users
+            if alerts_by_user[u.user_id]
+        }
+
+    def build_digest(self, to_email, username, alert_rows):
+        message = MIMEMultipart("alternative")
+        message["From"] = self.sender
+        message["To"] = to_email
+        message["Subject"] = f"Buy-Via: {len(alert_rows)} price alert(s) triggered"
+
+        # Titles and links are scraped, so everything is escaped before going into the HTML
+        items = "".join(
+            f"<li><a href=\"{html.escape(row.link or '')}\">{html.escape(row.title or '')}</a>: "
+            f"now {f'{row.price:.2f} SAR' if row.price is not None else 'N/A'} "
+            f"(your alert: {row.threshold_price:.2f} SAR)</li>"
+            for row in alert_rows
+        )
+        body = f"""\
+    <html>
+        <body>
+            <p>Hi {html.escape(username or '')},</p>
+            <p>The price dropped for the following products:</p>
+            <ul>{items}</ul>
+        </body>
+    </html>
+    """
+        message.attach(MIMEText(body, "html"))
+        return message
+
+    def send(self, to_email, message):
+        """Send one message through the pool, retrying with exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.pool.connection() as smtp:
+                    smtp.sendmail(self.sender, to_email, message.as_string())
+                return True
+            except (smtplib.SMTPException, OSError) as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Giving up sending alert digest to {to_email}: {e}")
+                    return False
+                delay = self.backoff_seconds * (2 ** attempt)
+                logger.warning(f"Error sending alert digest to {to_email}: {e}. Retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def flush(self, pending):
+        """Send one digest per user for the given {user_id: [alert_id, ...]} mapping."""
+        sent = 0
+        for user_id, (email, username, alert_rows) in self._load_digests(pending).items():
+            if self.send(email, self.build_digest(email, username, alert_rows)):
+                sent += 1
+        logger.info(f"Sent {sent} alert digest(s).")
+        return sent
+
+
+# Process-wide dispatcher, started by the scheduler when SMTP is configured
+notification_dispatcher = NotificationDispatcher.from_env()
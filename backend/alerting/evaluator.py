@@ -0,0 +1,101 @@
+# backend/alerting/evaluator.py
+from datetime import datetime, timezone
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from models import Alert, Product
+from alerting.index import alert_index
+from alerting.dispatcher import notification_dispatcher
+from alerting.events import event_broker
+
+
+def evaluate_product_alerts(db: Session, product_id: int, price, notify_watchers: bool = True,
+                            history_id: int = None):
+    """
+    Evaluate the active alerts of a single product against its new price.
+    Called right after a price write, so only the alerts of that product are touched.
+    history_id (the ProductPriceHistory row of the change) de-duplicates the
+    'price_changed' event against the relay, which publishes the same row.
+    Returns the (alert_id, user_id, product_id) rows that were marked as 'triggered'
+    and hands them to the notification dispatcher.
+    """
+    if price is None:
+        return []
+
+    # Let users watching this product know about the new price
+    if notify_watchers:
+        for user_id in alert_index.watchers(product_id):
+            event_broker.publish(
+                user_id, "price_changed", {"product_id": product_id, "price": price},
+                dedupe_key=history_id,
+            )
+
+    # The in-memory index answers "is any alert crossed?"; alerts written by another
+    # process are picked up once it is older than ALERT_INDEX_REFRESH_SECONDS
+    alert_index.sync_if_stale(db)
+    if not alert_index.crossed(product_id, price):
+        return []
+
+    stmt = (
+        update(Alert)
+        .where(
+            Alert.product_id == product_id,
+            Alert.alert_status == "active",
+            Alert.threshold_price >= price,
+        )
+        .values(alert_status="triggered", updated_at=datetime.now(timezone.utc))
+        .returning(Alert.alert_id, Alert.user_id, Alert.product_id)
+        .execution_options(synchronize_session=False)
+    )
+    triggered = db.execute(stmt).all()
+    db.commit()
+    for row in triggered:
+        alert_index.remove(row.alert_id)
+    publish_triggered(triggered)
+    notification_dispatcher.enqueue(triggered)
+    return triggered
+
+
+def reconcile_alerts(db: Session):
+    """
+    Safety-net sweep over every active alert, as a single set-based statement:
+
+        UPDATE alerts SET alert_status='triggered', updated_at=...
+        FROM products
+        WHERE alerts.product_id = products.product_id
+          AND products.price <= alerts.threshold_price
+          AND alerts.alert_status = 'active'
+        RETURNING alert_id, user_id, product_id
+
+    Backed by the partial index ix_alerts_active_product_threshold.
+    Also reloads the in-memory AlertIndex.
+    Returns the triggered rows, which are also queued for notification.
+    """
+    stmt = (
+        update(Alert)
+        .where(
+            Alert.product_id == Product.product_id,
+            Alert.alert_status == "active",
+            Product.price.is_not(None),
+            Product.price <= Alert.threshold_price,
+        )
+        .values(alert_status="triggered", updated_at=datetime.now(timezone.utc))
+        .returning(Alert.alert_id, Alert.user_id, Alert.product_id)
+        .execution_options(synchronize_session=False)
+    )
+    triggered = db.execute(stmt).all()
+    db.commit()
+
+    # Rebuild the index so alerts created/changed by other processes are picked up
+    alert_index.load(db)
+    publish_triggered(triggered)
+    notification_dispatcher.enqueue(triggered)
+    return triggered
+
+
+def publish_triggered(triggered):
+    """Push an 'alert_triggered' event to the owner of each triggered alert."""
+    for alert_id, user_id, product_id in triggered:
+        event_broker.publish(
+            user_id, "alert_triggered", {"alert_id": alert_id, "product_id": product_id},
+            dedupe_key=alert_id,
+        )
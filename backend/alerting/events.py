@@ -0,0 +1,133 @@
+# backend/alerting/events.py
+import os
+import json
+import asyncio
+import secrets
+import threading
+from collections import deque, namedtuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+Event = namedtuple("Event", ["event_id", "user_id", "event_type", "data"])
+
+
+class TooManyConnections(Exception):
+    """Raised when the per-worker cap on stream connections is reached."""
+
+
+class Subscription:
+    def __init__(self, user_id, loop, queue, replay):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = queue
+        self.replay = replay
+
+
+class EventBroker:
+    """
+    In-process pub/sub for per-user events ("alert_triggered", "price_changed").
+
+    publish() may be called from any thread (scraper, availability checker,
+    alert sweep); events are handed to each subscriber's asyncio loop with
+    call_soon_threadsafe. The last `buffer_size` events are kept in a ring
+    buffer so a reconnecting client can replay what it missed (Last-Event-ID).
+
+    Event ids are "<epoch>-<sequence>": the sequence is only meaningful within
+    this broker, so an id from another API worker or from before a restart has
+    a different epoch and is ignored instead of replaying the wrong events.
+    """
+
+    def __init__(self, buffer_size=1000, max_connections=500, queue_size=100):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self.epoch = secrets.token_hex(4)
+        self._next_id = 1
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = {}  # user_id -> set of Subscription
+        self._connections = 0
+        self._recent_keys = deque(maxlen=buffer_size)
+        self._recent_key_set = set()
+
+    def publish(self, user_id, event_type, data, dedupe_key=None):
+        """
+        Publish an event to `user_id`. When `dedupe_key` is given, an event with the
+        same key published recently (e.g. by the relay and the local evaluator) is dropped.
+        The key must identify the source row (alert_id, price history id), so that
+        two real events are never taken for one.
+        """
+        with self._lock:
+            if dedupe_key is not None:
+                dedupe_key = (user_id, event_type, dedupe_key)
+                if dedupe_key in self._recent_key_set:
+                    return None
+                if len(self._recent_keys) == self._recent_keys.maxlen:
+                    self._recent_key_set.discard(self._recent_keys[0])
+                self._recent_keys.append(dedupe_key)
+                self._recent_key_set.add(dedupe_key)
+
+            event = Event(self._next_id, user_id, event_type, data)
+            self._next_id += 1
+            self._buffer.append(event)
+            subscribers = list(self._subscribers.get(user_id, ()))
+
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(self._offer, sub.queue, event)
+            except RuntimeError:
+                # The subscriber's event loop is already closed
+                pass
+        return event
+
+    @staticmethod
+    def _offer(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client: drop the event, it can still be replayed on reconnect
+            pass
+
+    def parse_event_id(self, last_event_id):
+        """Sequence of a Last-Event-ID header issued by this broker, None otherwise."""
+        epoch, _, sequence = (last_event_id or "").partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def subscribe(self, user_id, last_event_id=None):
+        """
+        Register a subscriber on the running event loop. Must be called from async code.
+        last_event_id is a sequence from parse_event_id.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if self._connections >= self.max_connections:
+                raise TooManyConnections()
+            self._connections += 1
+            replay = []
+            if last_event_id is not None:
+                replay = [e for e in self._buffer if e.user_id == user_id and e.event_id > last_event_id]
+            sub = Subscription(user_id, loop, queue, replay)
+            self._subscribers.setdefault(user_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self._connections -= 1
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    def format_sse(self, event):
+        return f"id: {self.epoch}-{event.event_id}\nevent: {event.event_type}\ndata: {json.dumps(event.data)}\n\n"
+
+
+# Process-wide broker, fed by the alert evaluator
+event_broker = EventBroker(
+    buffer_size=int(os.getenv("ALERT_STREAM_BUFFER_SIZE", "1000")),
+    max_connections=int(os.getenv("ALERT_STREAM_MAX_CONNECTIONS", "500")),
+)
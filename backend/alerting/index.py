@@ -0,0 +1,177 @@
+# backend/alerting/index.py
+import os
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from dotenv import load_dotenv
+from sqlalchemy import select, func, or_
+from sqlalchemy.orm import Session
+from models import Alert
+
+load_dotenv()
+
+# Max age of the index before it is synced with the alerts table (alerts written by other processes)
+ALERT_INDEX_REFRESH_SECONDS = int(os.getenv("ALERT_INDEX_REFRESH_SECONDS", "60"))
+
+
+class AlertIndex:
+    """
+    In-memory index of active alert thresholds, per product.
+
+    For every product_id we keep two parallel arrays sorted by threshold:
+    `thresholds` and `alert_ids`. A new price crosses every alert whose
+    threshold is >= price, which is the suffix starting at
+    bisect_left(thresholds, price) -> O(log n + k) per price update.
+
+    Alerts are also created, edited and deleted by other processes (the API, the
+    worker), so the index remembers the version of the alerts table it has seen:
+    (count(*), max(alert_id), max(updated_at)). sync() compares it with the database
+    and reads only the alerts created or updated since; when fewer rows are left
+    than that accounts for, alerts were deleted and the index is reloaded.
+    Price writes don't pay for this: they call sync_if_stale(), which only goes
+    to the database once the index is older than ALERT_INDEX_REFRESH_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_product = {}  # product_id -> ([thresholds...], [alert_ids...])
+        self._alerts = {}      # alert_id -> (product_id, threshold_price, user_id)
+        self._version = None   # (count, max alert_id, max updated_at) of the alerts table when last read
+        self._synced_at = None  # time.monotonic() of the last load / sync
+        self.loaded = False
+
+    @staticmethod
+    def table_version(db: Session):
+        """(count(*), max(alert_id), max(updated_at)) of the alerts table."""
+        return tuple(db.execute(
+            select(func.count(Alert.alert_id), func.max(Alert.alert_id), func.max(Alert.updated_at))
+        ).one())
+
+    def load(self, db: Session):
+        """(Re)build the index from all active alerts in the database."""
+        version = self.table_version(db)
+        rows = (
+            db.query(Alert.alert_id, Alert.product_id, Alert.threshold_price, Alert.user_id)
+            .filter(Alert.alert_status == "active")
+            .order_by(Alert.product_id, Alert.threshold_price)
+            .all()
+        )
+        by_product = {}
+        alerts = {}
+        for alert_id, product_id, threshold_price, user_id in rows:
+            thresholds, alert_ids = by_product.setdefault(product_id, ([], []))
+            thresholds.append(threshold_price)
+            alert_ids.append(alert_id)
+            alerts[alert_id] = (product_id, threshold_price, user_id)
+
+        with self._lock:
+            self._by_product = by_product
+            self._alerts = alerts
+            self._version = version
+            self._synced_at = time.monotonic()
+            self.loaded = True
+        return len(alerts)
+
+    def sync(self, db: Session):
+        """
+        Bring the index up to date with the alerts table: a full load the first time,
+        then only the alerts created or updated since the last read, or a full load
+        again when alerts were deleted. Returns the number of alerts read.
+        """
+        if not self.loaded:
+            return self.load(db)
+        version = self.table_version(db)
+        with self._lock:
+            known_count, known_alert_id, known_updated_at = self._version
+        if version == (known_count, known_alert_id, known_updated_at):
+            with self._lock:
+                self._synced_at = time.monotonic()
+            return 0
+
+        changed = []
+        if known_alert_id is not None:
+            changed.append(Alert.alert_id > known_alert_id)
+        if known_updated_at is not None:
+            # >= so that alerts updated within the same timestamp are not missed
+            changed.append(Alert.updated_at >= known_updated_at)
+        query = select(Alert.alert_id, Alert.product_id, Alert.threshold_price, Alert.user_id, Alert.alert_status)
+        if changed:
+            query = query.where(or_(*changed))
+        rows = db.execute(query).all()
+
+        # Every row past the known max alert_id was created since; fewer rows in the
+        # table than known + created means some alerts were deleted
+        created = sum(1 for row in rows if known_alert_id is None or row.alert_id > known_alert_id)
+        if known_count + created > version[0]:
+            return self.load(db)
+
+        for alert_id, product_id, threshold_price, user_id, alert_status in rows:
+            if alert_status == "active":
+                self.add(alert_id, product_id, threshold_price, user_id)
+            else:
+                self.remove(alert_id)
+        with self._lock:
+            self._version = version
+            self._synced_at = time.monotonic()
+        return len(rows)
+
+    def sync_if_stale(self, db: Session, max_age_seconds=ALERT_INDEX_REFRESH_SECONDS):
+        """sync() when the last load / sync is older than max_age_seconds; no DB read otherwise."""
+        with self._lock:
+            fresh = self.loaded and time.monotonic() - self._synced_at < max_age_seconds
+        return 0 if fresh else self.sync(db)
+
+    def add(self, alert_id: int, product_id: int, threshold_price: float, user_id: int):
+        """Insert an active alert, replacing any previous entry with the same alert_id."""
+        with self._lock:
+            self._remove_locked(alert_id)
+            thresholds, alert_ids = self._by_product.setdefault(product_id, ([], []))
+            position = bisect_right(thresholds, threshold_price)
+            thresholds.insert(position, threshold_price)
+            alert_ids.insert(position, alert_id)
+            self._alerts[alert_id] = (product_id, threshold_price, user_id)
+
+    def remove(self, alert_id: int):
+        """Drop an alert (deleted, triggered or no longer active)."""
+        with self._lock:
+            self._remove_locked(alert_id)
+
+    def crossed(self, product_id: int, price):
+        """Return the alert_ids of `product_id` whose threshold is >= price."""
+        if price is None:
+            return []
+        with self._lock:
+            entry = self._by_product.get(product_id)
+            if not entry:
+                return []
+            thresholds, alert_ids = entry
+            return alert_ids[bisect_left(thresholds, price):]
+
+    def watchers(self, product_id: int):
+        """Return the user_ids with an active alert on `product_id`."""
+        with self._lock:
+            entry = self._by_product.get(product_id)
+            if not entry:
+                return set()
+            return {self._alerts[alert_id][2] for alert_id in entry[1]}
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def _remove_locked(self, alert_id):
+        existing = self._alerts.pop(alert_id, None)
+        if existing is None:
+            return
+        product_id, threshold_price, user_id = existing
+        thresholds, alert_ids = self._by_product[product_id]
+        position = bisect_left(thresholds, threshold_price)
+        while alert_ids[position] != alert_id:
+            position += 1
+        del thresholds[position]
+        del alert_ids[position]
+        if not alert_ids:
+            del self._by_product[product_id]
+
+
+# Process-wide index, loaded at startup, synced every ALERT_INDEX_REFRESH_SECONDS and reloaded by the reconciliation sweep
+alert_index = AlertIndex()
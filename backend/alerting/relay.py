@@ -0,0 +1,61 @@
+# backend/alerting/relay.py
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+
+from models import SessionLocal, Alert, ProductPriceHistory
+from alerting.index import alert_index
+from alerting.events import event_broker
+from alerting.evaluator import publish_triggered
+
+
+class AlertEventRelay:
+    """
+    Publish alert triggers and price changes written by other processes to this
+    process' EventBroker. Two indexed queries per run for the whole worker,
+    instead of one poll per connected client.
+
+    Triggers are read from the last updated_at seen on, included: an alert
+    committed later with that same timestamp is still relayed, and the ones
+    already published are de-duplicated by the broker (as are the triggers that
+    happened in this process). Price changes follow history_id instead of
+    change_date, which the writers stamp when a product is queued, possibly a
+    whole batch before the rows are committed.
+    """
+
+    def __init__(self):
+        self.since = datetime.now(timezone.utc)
+        self.last_history_id = None  # Price history rows up to this id are relayed
+
+    def run_once(self, stop_event=None):
+        with SessionLocal() as db:
+            if self.last_history_id is None:
+                # Relay the price changes written from now on
+                self.last_history_id = db.query(func.max(ProductPriceHistory.history_id)).scalar() or 0
+            triggered = (
+                db.query(Alert.alert_id, Alert.user_id, Alert.product_id, Alert.updated_at)
+                .filter(Alert.alert_status == "triggered", Alert.updated_at >= self.since)
+                .all()
+            )
+            price_changes = (
+                db.query(ProductPriceHistory.history_id, ProductPriceHistory.product_id,
+                         ProductPriceHistory.new_price)
+                .filter(ProductPriceHistory.history_id > self.last_history_id)
+                .order_by(ProductPriceHistory.history_id)
+                .all()
+            )
+
+        publish_triggered([(a.alert_id, a.user_id, a.product_id) for a in triggered])
+        for change in price_changes:
+            for user_id in alert_index.watchers(change.product_id):
+                event_broker.publish(
+                    user_id, "price_changed",
+                    {"product_id": change.product_id, "price": change.new_price},
+                    dedupe_key=change.history_id,
+                )
+
+        if triggered:
+            self.since = max(a.updated_at for a in triggered)
+        if price_changes:
+            self.last_history_id = price_changes[-1].history_id
+        return len(triggered) + len(price_changes)
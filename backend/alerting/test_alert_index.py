@@ -0,0 +1,116 @@
+import unittest
+from sqlalchemy.orm import Session
+from models import Alert, engine
+from alerting.index import AlertIndex
+
+
+class TestAlertIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = AlertIndex()
+        self.index.add(1, 10, 500.0, user_id=100)
+        self.index.add(2, 10, 300.0, user_id=101)
+        self.index.add(3, 10, 300.0, user_id=100)
+        self.index.add(4, 20, 50.0, user_id=102)
+
+    def test_crossed_returns_alerts_at_or_above_price(self):
+        """A price crosses every alert whose threshold is >= that price."""
+        self.assertEqual(sorted(self.index.crossed(10, 300.0)), [1, 2, 3])
+        self.assertEqual(self.index.crossed(10, 400.0), [1])
+        self.assertEqual(self.index.crossed(10, 600.0), [])
+        self.assertEqual(self.index.crossed(99, 1.0), [], "Unknown product should cross nothing.")
+        self.assertEqual(self.index.crossed(10, None), [], "Missing price should cross nothing.")
+
+    def test_watchers(self):
+        """Watchers are the users with an active alert on the product."""
+        self.assertEqual(self.index.watchers(10), {100, 101})
+        self.index.remove(2)
+        self.assertEqual(self.index.watchers(10), {100})
+        self.assertEqual(self.index.watchers(99), set())
+
+    def test_remove(self):
+        """Removed alerts are no longer reported, other alerts of the product are kept."""
+        self.index.remove(2)
+        self.assertEqual(sorted(self.index.crossed(10, 100.0)), [1, 3])
+        self.index.remove(4)
+        self.assertEqual(self.index.crossed(20, 10.0), [])
+        self.assertEqual(len(self.index), 2)
+
+    def test_add_replaces_existing_threshold(self):
+        """Updating an alert moves it to its new threshold."""
+        self.index.add(1, 10, 100.0, user_id=100)
+        self.assertEqual(sorted(self.index.crossed(10, 300.0)), [2, 3])
+        self.assertEqual(sorted(self.index.crossed(10, 100.0)), [1, 2, 3])
+        self.assertEqual(len(self.index), 4)
+
+
+class TestAlertIndexSync(unittest.TestCase):
+    """Alerts written by another process (here: straight to the database) are seen by sync()."""
+
+    PRODUCT_ID = 987654
+
+    def setUp(self):
+        self.db = Session(engine)
+        self.index = AlertIndex()
+        self.index.load(self.db)
+
+    def tearDown(self):
+        self.db.rollback()
+        self.db.query(Alert).filter(Alert.product_id == self.PRODUCT_ID).delete()
+        self.db.commit()
+        self.db.close()
+
+    def test_sync_reads_new_and_updated_alerts(self):
+        self.assertEqual(self.index.sync(self.db), 0)
+        alert = Alert(user_id=1, product_id=self.PRODUCT_ID, threshold_price=100.0, alert_status="active")
+        self.db.add(alert)
+        self.db.commit()
+        self.assertEqual(self.index.crossed(self.PRODUCT_ID, 90.0), [])
+        self.index.sync(self.db)
+        self.assertEqual(self.index.crossed(self.PRODUCT_ID, 90.0), [alert.alert_id])
+
+        alert.threshold_price = 50.0
+        self.db.commit()
+        self.index.sync(self.db)
+        self.assertEqual(self.index.crossed(self.PRODUCT_ID, 90.0), [])
+
+        alert.alert_status = "expired"
+        alert.threshold_price = 200.0
+        self.db.commit()
+        self.index.sync(self.db)
+        self.assertEqual(self.index.crossed(self.PRODUCT_ID, 90.0), [])
+
+    def test_sync_drops_deleted_alerts(self):
+        old = Alert(user_id=1, product_id=self.PRODUCT_ID, threshold_price=100.0, alert_status="active")
+        self.db.add(old)
+        self.db.commit()
+        self.index.sync(self.db)
+
+        # A delete alone, then a delete hidden by an insert (same count)
+        self.db.delete(old)
+        self.db.commit()
+        self.index.sync(self.db)
+        self.assertEqual(self.index.crossed(self.PRODUCT_ID, 90.0), [])
+
+        kept = Alert(user_id=1, product_id=self.PRODUCT_ID, threshold_price=100.0, alert_status="active")
+        self.db.add(kept)
+        self.db.commit()
+        self.index.sync(self.db)
+        self.db.delete(kept)
+        new = Alert(user_id=2, product_id=self.PRODUCT_ID, threshold_price=80.0, alert_status="active")
+        self.db.add(new)
+        self.db.commit()
+        self.index.sync(self.db)
+        self.assertEqual(self.index.crossed(self.PRODUCT_ID, 70.0), [new.alert_id])
+
+    def test_fresh_index_is_not_synced(self):
+        alert = Alert(user_id=1, product_id=self.PRODUCT_ID, threshold_price=100.0, alert_status="active")
+        self.db.add(alert)
+        self.db.commit()
+        self.assertEqual(self.index.sync_if_stale(self.db, max_age_seconds=60), 0)
+        self.assertEqual(self.index.crossed(self.PRODUCT_ID, 90.0), [])
+        self.index.sync_if_stale(self.db, max_age_seconds=0)
+        self.assertEqual(self.index.crossed(self.PRODUCT_ID, 90.0), [alert.alert_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
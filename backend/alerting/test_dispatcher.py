@@ -0,0 +1,89 @@
+import socket
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from aiosmtpd.controller import Controller
+from alerting.dispatcher import SMTPConnectionPool, NotificationDispatcher
+
+
+class RecordingHandler:
+    """aiosmtpd handler that keeps every received message and the session it came on."""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.sessions.add(id(session))
+        return "250 Message accepted for delivery"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.handler = RecordingHandler()
+        port = free_port()
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=port)
+        self.controller.start()
+        self.pool = SMTPConnectionPool("127.0.0.1", port, size=1)
+        self.dispatcher = NotificationDispatcher(self.pool, sender="alerts@buyvia.test", backoff_seconds=0)
+
+    def tearDown(self):
+        self.pool.close()
+        self.controller.stop()
+
+    def test_pool_reuses_connection(self):
+        """Several messages go over a single persistent SMTP connection."""
+        row = SimpleNamespace(title="iPhone 15", price=3000.0, threshold_price=3200.0, link="http://example.com/p")
+        for _ in range(3):
+            message = self.dispatcher.build_digest("user@buyvia.test", "user", [row])
+            self.assertTrue(self.dispatcher.send("user@buyvia.test", message))
+        self.assertEqual(len(self.handler.messages), 3)
+        self.assertEqual(len(self.handler.sessions), 1, "All messages should share one SMTP session.")
+
+    def test_flush_sends_one_digest_per_user(self):
+        """Alerts of the same user are coalesced into one email."""
+        rows = [
+            SimpleNamespace(title="TV", price=1000.0, threshold_price=1200.0, link="http://example.com/1"),
+            SimpleNamespace(title="Mouse", price=50.0, threshold_price=60.0, link="http://example.com/2"),
+        ]
+        digests = {
+            1: ("one@buyvia.test", "one", rows),
+            2: ("two@buyvia.test", "two", rows[:1]),
+        }
+        with patch.object(self.dispatcher, "_load_digests", return_value=digests):
+            sent = self.dispatcher.flush({1: [10, 11], 2: [12]})
+        self.assertEqual(sent, 2)
+        self.assertEqual(sorted(m.rcpt_tos[0] for m in self.handler.messages), ["one@buyvia.test", "two@buyvia.test"])
+
+    def test_digest_escapes_scraped_fields(self):
+        """Scraped titles and links cannot inject HTML, and a missing price does not break the digest."""
+        row = SimpleNamespace(title="<script>x</script>", price=None, threshold_price=10.0,
+                              link='http://example.com/"><img src=x>')
+        body = self.dispatcher.build_digest("user@buyvia.test", "<b>user</b>", [row]).get_payload()[0].get_payload()
+        self.assertNotIn("<script>", body)
+        self.assertNotIn("<img", body)
+        self.assertNotIn("<b>", body)
+        self.assertIn("now N/A", body)
+
+    def test_stop_sends_queued_notifications(self):
+        """Alerts queued when the dispatcher stops are still sent, without waiting for the window."""
+        self.dispatcher.window_seconds = 60
+        digests = {1: ("one@buyvia.test", "one", [
+            SimpleNamespace(title="TV", price=1000.0, threshold_price=1200.0, link="http://example.com/1"),
+        ])}
+        with patch.object(self.dispatcher, "_load_digests", return_value=digests):
+            self.dispatcher.start()
+            self.dispatcher.enqueue([(10, 1, 100)])
+            self.dispatcher.stop(timeout=10)
+        self.assertEqual([m.rcpt_tos[0] for m in self.handler.messages], ["one@buyvia.test"])
+
+
+if __name__ == "__main__":
+    unittest.main()
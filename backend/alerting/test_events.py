@@ -0,0 +1,42 @@
+import asyncio
+import unittest
+from alerting.events import EventBroker
+
+
+class TestEventBroker(unittest.TestCase):
+    def setUp(self):
+        self.broker = EventBroker(buffer_size=10)
+
+    def subscribe(self, user_id, last_event_id):
+        async def subscribe():
+            return self.broker.subscribe(user_id, self.broker.parse_event_id(last_event_id))
+        return asyncio.run(subscribe())
+
+    def test_replay_after_last_event_id(self):
+        """A reconnecting client gets the events published after the id it last saw."""
+        first = self.broker.publish(1, "price_changed", {"price": 10})
+        second = self.broker.publish(1, "price_changed", {"price": 9})
+        self.broker.publish(2, "price_changed", {"price": 8})
+        last_event_id = self.broker.format_sse(first).split("\n")[0][len("id: "):]
+        self.assertEqual(self.subscribe(1, last_event_id).replay, [second])
+
+    def test_ids_of_another_broker_are_ignored(self):
+        """Ids issued by another worker (or before a restart) do not replay this broker's events."""
+        other = EventBroker()
+        event = other.publish(1, "price_changed", {"price": 10})
+        self.broker.publish(1, "price_changed", {"price": 9})
+        last_event_id = other.format_sse(event).split("\n")[0][len("id: "):]
+        self.assertIsNone(self.broker.parse_event_id(last_event_id))
+        self.assertEqual(self.subscribe(1, last_event_id).replay, [])
+        self.assertIsNone(self.broker.parse_event_id("7"))
+
+    def test_dedupe_on_source_row(self):
+        """The same source row is published once; a price returning to an earlier value is a new event."""
+        self.assertIsNotNone(self.broker.publish(1, "price_changed", {"price": 10}, dedupe_key=101))
+        self.assertIsNone(self.broker.publish(1, "price_changed", {"price": 10}, dedupe_key=101))
+        self.assertIsNotNone(self.broker.publish(1, "price_changed", {"price": 12}, dedupe_key=102))
+        self.assertIsNotNone(self.broker.publish(1, "price_changed", {"price": 10}, dedupe_key=103))
+
+
+if __name__ == "__main__":
+    unittest.main()
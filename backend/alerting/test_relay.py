@@ -0,0 +1,80 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from sqlalchemy.orm import Session
+
+from models import Alert, ProductPriceHistory, engine
+from alerting.events import EventBroker
+from alerting.index import alert_index
+from alerting.relay import AlertEventRelay
+
+
+class TestAlertEventRelay(unittest.TestCase):
+    """Rows committed after a run are relayed even when they sort at or before what the run saw."""
+
+    PRODUCT_ID = 876543
+    USER_ID = 424242
+
+    def setUp(self):
+        self.db = Session(engine)
+        self.broker = EventBroker()
+        broker_patch = patch("alerting.relay.event_broker", self.broker)
+        evaluator_patch = patch("alerting.evaluator.event_broker", self.broker)
+        broker_patch.start()
+        evaluator_patch.start()
+        self.addCleanup(broker_patch.stop)
+        self.addCleanup(evaluator_patch.stop)
+        self.relay = AlertEventRelay()
+        self.relay.run_once()
+
+    def tearDown(self):
+        self.db.rollback()
+        for alert in self.db.query(Alert).filter(Alert.product_id == self.PRODUCT_ID):
+            alert_index.remove(alert.alert_id)
+        self.db.query(Alert).filter(Alert.product_id == self.PRODUCT_ID).delete()
+        self.db.query(ProductPriceHistory).filter(ProductPriceHistory.product_id == self.PRODUCT_ID).delete()
+        self.db.commit()
+        self.db.close()
+
+    def published(self, event_type):
+        return [event.data for event in self.broker._buffer if event.event_type == event_type]
+
+    def add_triggered(self, updated_at):
+        alert = Alert(user_id=self.USER_ID, product_id=self.PRODUCT_ID, threshold_price=10.0,
+                      alert_status="triggered", updated_at=updated_at)
+        self.db.add(alert)
+        self.db.commit()
+        return alert.alert_id
+
+    def add_price_change(self, new_price, change_date):
+        self.db.add(ProductPriceHistory(product_id=self.PRODUCT_ID, old_price=20.0, new_price=new_price,
+                                        change_date=change_date))
+        self.db.commit()
+
+    def test_trigger_with_the_same_timestamp_is_relayed_once(self):
+        updated_at = datetime.now(timezone.utc) + timedelta(seconds=1)
+        first = self.add_triggered(updated_at)
+        self.relay.run_once()
+        second = self.add_triggered(updated_at)
+        self.relay.run_once()
+        self.relay.run_once()
+        self.assertEqual([data["alert_id"] for data in self.published("alert_triggered")], [first, second])
+
+    def test_price_change_stamped_before_the_last_one_is_relayed(self):
+        active = Alert(user_id=self.USER_ID, product_id=self.PRODUCT_ID, threshold_price=1.0, alert_status="active")
+        self.db.add(active)
+        self.db.commit()
+        alert_index.add(active.alert_id, self.PRODUCT_ID, 1.0, self.USER_ID)
+
+        now = datetime.now(timezone.utc)
+        self.add_price_change(15.0, now)
+        self.relay.run_once()
+        # Stamped when its product was queued, committed with a later batch
+        self.add_price_change(12.0, now - timedelta(seconds=30))
+        self.relay.run_once()
+        self.assertEqual([data["price"] for data in self.published("price_changed")], [15.0, 12.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+# job_lock.py
+import os
+import uuid
+import socket
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text, update, insert, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from dotenv import load_dotenv
+
+from models import engine, JobLock
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+JOB_LOCK_TTL_SECONDS = int(os.getenv("JOB_LOCK_TTL_SECONDS", "120"))
+
+
+class JobLease:
+    """
+    Exclusive lease on a background job, shared by every API worker / process,
+    so each job runs in exactly one place.
+
+    A holder thread per lease takes it, keeps it alive and gives it back, so the
+    database connection of the lease is only ever used by that thread.
+
+    - PostgreSQL: a session-level advisory lock (pg_try_advisory_lock) held on a
+      dedicated connection. The heartbeat pings that connection; if the holder
+      dies, its connection closes and the lock is released immediately.
+    - Other databases (SQLite): a row in `job_locks` with an owner and an
+      expiry time. The heartbeat pushes expires_at forward; a renew that fails
+      (e.g. "database is locked") is retried every retry_seconds until the lease
+      is about to expire. Once a holder stops renewing, any other process can
+      take the lease over after expiry.
+
+    When the lease is lost (the row has another owner, the advisory connection
+    failed or renews kept failing), `lost` is set and on_lost() is called, so the
+    job running under the lease stops before another process takes it over.
+    """
+
+    def __init__(self, job_name, ttl_seconds=JOB_LOCK_TTL_SECONDS, heartbeat_seconds=None, retry_seconds=None,
+                 on_lost=None):
+        self.job_name = job_name
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_seconds = heartbeat_seconds or max(1, ttl_seconds // 3)
+        self.retry_seconds = retry_seconds or self.heartbeat_seconds / 4
+        self.on_lost = on_lost
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.held = False
+        self.lost = threading.Event()
+        self._use_advisory_lock = engine.dialect.name == "postgresql"
+        self._release = threading.Event()
+        self._holder = None
+
+    @property
+    def advisory_key(self):
+        digest = hashlib.sha1(self.job_name.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big", signed=True)
+
+    # -------------------------------
+    # Acquire / release
+    # -------------------------------
+    def acquire(self):
+        """Try to become the holder. Returns True if this process holds the lease."""
+        if self.held:
+            return True
+        if self._holder is not None:
+            self._holder.join()  # Holder of a lost lease, on its way out
+            self._holder = None
+        self._release.clear()
+        self.lost.clear()
+
+        acquired = []
+        ready = threading.Event()
+        holder = threading.Thread(target=self._hold, args=(acquired, ready), name=f"lease-{self.job_name}",
+                                  daemon=True)
+        holder.start()
+        ready.wait()
+        if not acquired or not acquired[0]:
+            holder.join()
+            return False
+        self._holder = holder
+        logger.info(f"[{self.job_name}] Lease acquired by {self.owner}.")
+        return True
+
+    def release(self):
+        """Give the lease back; the holder thread does it, this waits for it."""
+        self._release.set()
+        if self._holder is not None:
+            self._holder.join(self.ttl_seconds)
+            self._holder = None
+        self.held = False
+
+    # -------------------------------
+    # Holder thread
+    # -------------------------------
+    def _hold(self, acquired, ready):
+        conn = None
+        try:
+            try:
+                if self._use_advisory_lock:
+                    conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+                    held = bool(conn.execute(
+                        text("SELECT pg_try_advisory_lock(:key)"), {"key": self.advisory_key}
+                    ).scalar())
+                else:
+                    held = self._acquire_row()
+            except SQLAlchemyError as e:
+                logger.error(f"[{self.job_name}] Error acquiring job lease: {e}")
+                held = False
+            self.held = held
+            acquired.append(held)
+            ready.set()
+
+            if held and self._heartbeat(conn):
+                self._give_back(conn)
+        finally:
+            ready.set()
+            if conn is not None:
+                try:
+                    conn.close()
+                except SQLAlchemyError:
+                    pass
+
+    def _heartbeat(self, conn):
+        """Renew until release() (returns True) or until the lease is lost (returns False)."""
+        renewed_at = time.monotonic()
+        wait = self.heartbeat_seconds
+        while not self._release.wait(wait):
+            try:
+                if self._use_advisory_lock:
+                    conn.execute(text("SELECT 1"))
+                    owned = True
+                else:
+                    owned = self._renew_row()
+            except SQLAlchemyError as e:
+                # The advisory lock went away with its connection; a row lease is retried
+                # while there is still time for the job to stop before it expires
+                if not self._use_advisory_lock and \
+                        time.monotonic() - renewed_at < self.ttl_seconds - self.heartbeat_seconds:
+                    logger.warning(f"[{self.job_name}] Error renewing job lease, retrying: {e}")
+                    wait = self.retry_seconds
+                    continue
+                logger.error(f"[{self.job_name}] Error renewing job lease: {e}")
+                owned = False
+
+            if not owned:
+                logger.warning(f"[{self.job_name}] Lease lost by {self.owner}.")
+                self.held = False
+                self.lost.set()
+                if self.on_lost is not None:
+                    self.on_lost()
+                return False
+            renewed_at = time.monotonic()
+            wait = self.heartbeat_seconds
+        return True
+
+    def _give_back(self, conn):
+        try:
+            if self._use_advisory_lock:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.advisory_key})
+            else:
+                with engine.begin() as row_conn:
+                    row_conn.execute(
+                        update(JobLock)
+                        .where(JobLock.job_name == self.job_name, JobLock.owner == self.owner)
+                        .values(expires_at=datetime.now(timezone.utc))
+                    )
+        except SQLAlchemyError as e:
+            logger.error(f"[{self.job_name}] Error releasing job lease: {e}")
+
+    # -------------------------------
+    # Lock row (SQLite and others)
+    # -------------------------------
+    def _acquire_row(self):
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    insert(JobLock).values(
+                        job_name=self.job_name, owner=self.owner,
+                        acquired_at=now, expires_at=expires_at,
+                    )
+                )
+            return True
+        except IntegrityError:
+            pass
+
+        # The row exists: take it over only if the previous holder's lease expired
+        with engine.begin() as conn:
+            result = conn.execute(
+                update(JobLock)
+                .where(
+                    JobLock.job_name == self.job_name,
+                    or_(JobLock.expires_at < now, JobLock.owner == self.owner),
+                )
+                .values(owner=self.owner, acquired_at=now, expires_at=expires_at)
+            )
+        return result.rowcount == 1
+
+    def _renew_row(self):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        with engine.begin() as conn:
+            result = conn.execute(
+                update(JobLock)
+                .where(JobLock.job_name == self.job_name, JobLock.owner == self.owner)
+                .values(expires_at=expires_at)
+            )
+        return result.rowcount == 1
@@ -0,0 +1,246 @@
+# job_scheduler.py
+import time
+import random
+import logging
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+
+from models import SessionLocal, JobRun
+from job_lock import JobLease
+
+logger = logging.getLogger(__name__)
+
+
+class CronSchedule:
+    """
+    Minimal 5-field cron expression: "minute hour day-of-month month day-of-week".
+    Each field supports *, */n, a-b, a-b/n and comma-separated lists.
+    Day-of-week uses 0-6 with 0 = Sunday (7 is accepted as Sunday too).
+    """
+
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.RANGES)
+        )
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step = part.split("/")
+                step = int(step)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(v) for v in part.split("-"))
+            else:
+                start = end = int(part)
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt):
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok  # Standard cron: either restricted field may match
+
+    def next_after(self, after: datetime) -> datetime:
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after + timedelta(days=366)
+        while dt <= limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return dt
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+
+class Job:
+    """
+    A background job definition.
+
+    func(stop_event) runs one iteration and returns the number of items it
+    processed (or None). Long-running jobs should check stop_event.is_set()
+    between items and return early (cooperative cancellation). The event is set
+    on shutdown, and when an exclusive job loses its lease mid-run.
+    """
+
+    def __init__(self, name, func, interval_seconds=None, cron=None, max_concurrency=1,
+                 start_delay_seconds=0, jitter_seconds=0, exclusive=True, record_runs=True):
+        if (interval_seconds is None) == (cron is None):
+            raise ValueError(f"Job {name!r} needs exactly one of interval_seconds or cron")
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.cron = CronSchedule(cron) if cron else None
+        self.max_concurrency = max_concurrency
+        self.start_delay_seconds = start_delay_seconds
+        self.jitter_seconds = jitter_seconds
+        self.exclusive = exclusive      # Only one process (the lease holder) runs it
+        self.record_runs = record_runs  # Write a row into job_runs per run
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.threads = []  # The job loop and its runs still in flight
+        self.run_stops = set()  # Stop events of the runs in flight
+
+    def seconds_until_next_run(self):
+        if self.cron:
+            now = datetime.now()
+            delay = (self.cron.next_after(now) - now).total_seconds()
+        else:
+            delay = self.interval_seconds
+        return delay + random.uniform(0, self.jitter_seconds)
+
+
+class JobScheduler:
+    """
+    Runs registered jobs in daemon threads with:
+      - interval (fixed delay after each run) or cron timing, plus random jitter
+      - staggered first start (start_delay_seconds)
+      - max concurrent runs per job; a run that is due while all slots are busy is skipped
+      - single-leader execution across processes for exclusive jobs (JobLease)
+      - cooperative cancellation on shutdown, and of the runs of a job whose lease is lost
+      - a job_runs row per run with duration, items processed and errors
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self._stop = threading.Event()
+        self._leases = {}
+        self._runs_lock = threading.Lock()
+
+    def add_job(self, name, func, **options):
+        self.jobs[name] = Job(name, func, **options)
+        return self.jobs[name]
+
+    def start(self):
+        for job in self.jobs.values():
+            thread = threading.Thread(target=self._job_loop, args=(job,), name=f"job-{job.name}", daemon=True)
+            thread.start()
+            job.threads.append(thread)
+            print(f"Scheduled job: {job.name}")
+
+    def shutdown(self, timeout=30):
+        """
+        Ask running jobs to stop, wait for them, then release the leases of the jobs
+        that stopped. A job still running after the timeout keeps its lease (and its
+        heartbeat), so no other process starts it while it runs here.
+        """
+        self._stop.set()
+        for job in self.jobs.values():
+            self._stop_runs(job)
+        deadline = time.monotonic() + timeout
+        for job in self.jobs.values():
+            for thread in list(job.threads):
+                thread.join(max(0, deadline - time.monotonic()))
+        for name, lease in self._leases.items():
+            if any(thread.is_alive() for thread in self.jobs[name].threads):
+                logger.warning(f"[{name}] Still running after {timeout}s; keeping its lease.")
+                continue
+            lease.release()
+
+    @property
+    def stopping(self):
+        return self._stop.is_set()
+
+    # -------------------------------
+    # Job loop
+    # -------------------------------
+    def _job_loop(self, job):
+        lease = None
+        if job.exclusive:
+            lease = JobLease(job.name, on_lost=lambda: self._stop_runs(job))
+            self._leases[job.name] = lease
+
+        if self._stop.wait(job.start_delay_seconds):
+            return
+
+        while not self._stop.is_set():
+            if lease and not lease.acquire():
+                # Another process runs this job; retry so we can take over on expiry
+                self._stop.wait(lease.ttl_seconds)
+                continue
+
+            if job.slots.acquire(blocking=False):
+                if job.max_concurrency == 1:
+                    self._run(job)
+                else:
+                    thread = threading.Thread(target=self._run, args=(job,), daemon=True)
+                    thread.start()
+                    job.threads = [t for t in job.threads if t.is_alive()] + [thread]
+            else:
+                logger.warning(f"[{job.name}] Previous run still in progress; skipping this run.")
+                self._record(job, datetime.now(timezone.utc), 0.0, 0, "skipped", None)
+
+            self._stop.wait(job.seconds_until_next_run())
+
+    def _stop_runs(self, job):
+        """Ask the runs of job in flight to stop (shutdown, or its lease was lost)."""
+        with self._runs_lock:
+            for run_stop in job.run_stops:
+                run_stop.set()
+
+    def _run(self, job):
+        started_at = datetime.now(timezone.utc)
+        start = time.monotonic()
+        items, status, error = 0, "success", None
+        run_stop = threading.Event()
+        with self._runs_lock:
+            job.run_stops.add(run_stop)
+        if self._stop.is_set():
+            run_stop.set()
+        try:
+            items = job.func(run_stop) or 0
+            if run_stop.is_set():
+                status = "cancelled"
+        except Exception as e:
+            status = "error"
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            print(f"Error in job {job.name}: {e}")
+        finally:
+            with self._runs_lock:
+                job.run_stops.discard(run_stop)
+            job.slots.release()
+        self._record(job, started_at, time.monotonic() - start, items, status, error)
+
+    def _record(self, job, started_at, duration, items, status, error):
+        if not job.record_runs:
+            return
+        try:
+            with SessionLocal() as db:
+                db.add(JobRun(
+                    job_name=job.name,
+                    started_at=started_at,
+                    finished_at=datetime.now(timezone.utc),
+                    duration_seconds=duration,
+                    items_processed=items,
+                    status=status,
+                    error=error,
+                ))
+                db.commit()
+        except Exception as e:
+            logger.error(f"[{job.name}] Could not record job run: {e}")
@@ -6,7 +6,9 @@ from dotenv import load_dotenv
 import os
 
 from routers import auth, search, alert
-from scheduler import start_background_tasks  # <-- NEW: import the function
+from models import SessionLocal
+from alerting.index import alert_index
+from scheduler import start_background_tasks, stop_background_tasks
 
 load_dotenv()
 
@@ -14,11 +16,16 @@ load_dotenv()
 # Lifespan (Startup/Shutdown) logic
 # ======================================
 def lifespan(app: FastAPI):
+    # Load active alert thresholds into memory before any price is written
+    with SessionLocal() as db:
+        alert_index.load(db)
+
     # Start background tasks (threads)
-    start_background_tasks()
+    scheduler = start_background_tasks()
 
     yield  # Application is up and running
-    print("Application shutting down. Perform cleanup if necessary.")
+    print("Application shutting down. Stopping background tasks.")
+    stop_background_tasks(scheduler)
 
 # ======================================
 # Create the FastAPI App
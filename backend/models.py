@@ -1,7 +1,7 @@
 import os
 from datetime import datetime, timezone
 from sqlalchemy import (
-    create_engine, Column, Integer, String, ForeignKey, Float, DateTime, Boolean
+    create_engine, Column, Integer, String, ForeignKey, Float, DateTime, Boolean, Index, text
 )
 from sqlalchemy.ext.declarative import declarative_base  # To initialize Base for the models
 from sqlalchemy.orm import relationship, sessionmaker
@@ -60,12 +60,18 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey("categories.category_id", ondelete="SET NULL"), nullable=True)
     availability = Column(Boolean, default=True)
     last_updated = Column(DateTime, default=datetime.now(timezone.utc))
+    last_checked = Column(DateTime, nullable=True, index=True)  # Last availability check
     store = relationship("Store", back_populates="products")
     category = relationship("Category", back_populates="products")
     group = relationship("ProductGroup", back_populates="products")
     price_histories = relationship("ProductPriceHistory", back_populates="product", cascade="all, delete-orphan")
     translations = relationship("ProductTitleTranslation", back_populates="product", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # A product is identified by its title within a store; target of the scraper's bulk upsert
+        Index("uq_products_title_store", "title", "store_id", unique=True),
+    )
+
 class ProductTitleTranslation(Base):
     __tablename__ = "product_title_translations"
     translation_id = Column(Integer, primary_key=True, index=True)
@@ -119,10 +125,26 @@ class Alert(Base):
     threshold_price = Column(Float, nullable=False)
     alert_status = Column(String, default="active")  # Options: active, triggered, expired
     created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    # Callables, so every write gets its own timestamp (AlertIndex.sync relies on it)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc),
+                        onupdate=lambda: datetime.now(timezone.utc))
     user = relationship("User", back_populates="alerts")
     product = relationship("Product")
 
+    __table_args__ = (
+        # Partial index used by the set-based alert sweep (only active alerts are scanned)
+        Index(
+            "ix_alerts_active_product_threshold",
+            "product_id", "threshold_price",
+            postgresql_where=text("alert_status = 'active'"),
+            sqlite_where=text("alert_status = 'active'"),
+        ),
+        # Keyset pagination of a user's alerts
+        Index("ix_alerts_user_alert", "user_id", "alert_id"),
+        # Version of the table for AlertIndex.sync (count, max(alert_id), max(updated_at))
+        Index("ix_alerts_updated_at", "updated_at"),
+    )
+
 
 class ProductMatch(Base):
     __tablename__ = "product_matches"
@@ -137,7 +159,7 @@ class ProductPriceHistory(Base):
     product_id = Column(Integer, ForeignKey("products.product_id", ondelete="CASCADE"))
     old_price = Column(Float, nullable=False)
     new_price = Column(Float, nullable=False)
-    change_date = Column(DateTime, default=datetime.now(timezone.utc))
+    change_date = Column(DateTime, default=datetime.now(timezone.utc), index=True)
     product = relationship("Product", back_populates="price_histories")
 
 class UserRecommendation(Base):
@@ -150,6 +172,48 @@ class UserRecommendation(Base):
     user = relationship("User", back_populates="recommendations")
     product = relationship("Product")  # No back_populates needed here
 
+class JobLock(Base):
+    __tablename__ = "job_locks"
+    job_name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)  # host:pid:uuid of the process holding the lease
+    acquired_at = Column(DateTime, default=datetime.now(timezone.utc))
+    expires_at = Column(DateTime, nullable=False)
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+    run_id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String, nullable=False, index=True)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    items_processed = Column(Integer, default=0)
+    status = Column(String, nullable=False)  # Options: success, error, cancelled, skipped
+    error = Column(String, nullable=True)
+
+class ClassificationCache(Base):
+    __tablename__ = "classification_cache"
+    # sha1 of the model fingerprint, normalized title and search value (see scraper/product_classifier.py)
+    title_hash = Column(String, primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.category_id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+
+class SearchTermStats(Base):
+    __tablename__ = "search_term_stats"
+    search_value = Column(String, primary_key=True)
+    crawls = Column(Integer, default=0)
+    last_crawled_at = Column(DateTime, nullable=True)
+    next_due_at = Column(DateTime, nullable=True, index=True)
+    interval_hours = Column(Float, nullable=True)
+    last_yield = Column(Integer, nullable=True)  # Products found by the last crawl
+    new_rate = Column(Float, nullable=True)  # Smoothed share of new products per crawl
+    price_change_rate = Column(Float, nullable=True)  # Smoothed share of products with a new price per crawl
+
+class AvailabilityCheckpoint(Base):
+    __tablename__ = "availability_checkpoints"
+    name = Column(String, primary_key=True)  # The pass being checkpointed, e.g. "update_availability"
+    last_product_id = Column(Integer, nullable=True)  # Last product of the last completed chunk; NULL starts over
+    updated_at = Column(DateTime, nullable=True)
+
 # Create all tables
 try:
     Base.metadata.create_all(bind=engine)
@@ -1,10 +1,16 @@
 # backend/routers/alert.py
-from fastapi import APIRouter, Depends, HTTPException, status,Query
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status,Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, PositiveFloat
 from typing import List, Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from dependencies.deps import db_dependency, get_current_user
-from models import Alert, Product, User
+from models import Alert, Product, ProductTitleTranslation, ProductPriceHistory
+from alerting.evaluator import evaluate_product_alerts
+from alerting.index import alert_index
+from alerting.events import event_broker, TooManyConnections
 
 '''
 in the future, we will implement the email sending functionality in other file
@@ -21,6 +27,9 @@ router = APIRouter(
     tags=["alerts"]
 )
 
+HEARTBEAT_SECONDS = 15
+ALERTS_PAGE_SIZE = 50  # Page size when only after_id is given
+
 class AlertCreateRequest(BaseModel):
     product_id: int
     threshold_price: PositiveFloat
@@ -28,11 +37,93 @@ class AlertCreateRequest(BaseModel):
 class AlertUpdateRequest(BaseModel):
     threshold_price: PositiveFloat
 
+class AlertProductCard(BaseModel):
+    title: str
+    arabic_title: Optional[str] = None
+    price: Optional[float] = None
+    image_url: Optional[str] = None
+    availability: Optional[bool] = None
+    last_old_price: Optional[float] = None
+
 class AlertResponse(BaseModel):
     alert_id: int
     product_id: int
     threshold_price: float
     alert_status: str
+    product: Optional[AlertProductCard] = None  # Only set when include_product=true
+
+
+def query_alerts(
+    db: Session,
+    user_id: int,
+    alert_status: Optional[str] = None,
+    include_product: bool = False,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> List[AlertResponse]:
+    """
+    Load a user's alerts (ordered by alert_id), optionally with a compact
+    product card, in a single query. Without after_id and limit every alert
+    is returned; otherwise one keyset page (ALERTS_PAGE_SIZE by default).
+    """
+    columns = [Alert.alert_id, Alert.product_id, Alert.threshold_price, Alert.alert_status]
+    if include_product:
+        arabic_title = (
+            select(ProductTitleTranslation.translated_title)
+            .where(
+                ProductTitleTranslation.product_id == Alert.product_id,
+                ProductTitleTranslation.language == "ar",
+            )
+            .limit(1)
+            .scalar_subquery()
+        )
+        last_old_price = (
+            select(ProductPriceHistory.old_price)
+            .where(ProductPriceHistory.product_id == Alert.product_id)
+            .order_by(ProductPriceHistory.change_date.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        columns += [
+            Product.title,
+            arabic_title.label("arabic_title"),
+            Product.price,
+            Product.image_url,
+            Product.availability,
+            last_old_price.label("last_old_price"),
+        ]
+
+    query = db.query(*columns).filter(Alert.user_id == user_id)
+    if include_product:
+        query = query.join(Product, Alert.product_id == Product.product_id)
+    if alert_status is not None:
+        query = query.filter(Alert.alert_status == alert_status)
+    if after_id is not None:
+        query = query.filter(Alert.alert_id > after_id)
+    query = query.order_by(Alert.alert_id.asc())
+    if after_id is not None and limit is None:
+        limit = ALERTS_PAGE_SIZE
+    if limit is not None:
+        query = query.limit(limit)
+    rows = query.all()
+
+    return [
+        AlertResponse(
+            alert_id=row.alert_id,
+            product_id=row.product_id,
+            threshold_price=row.threshold_price,
+            alert_status=row.alert_status,
+            product=AlertProductCard(
+                title=row.title,
+                arabic_title=row.arabic_title,
+                price=row.price,
+                image_url=row.image_url,
+                availability=row.availability,
+                last_old_price=row.last_old_price,
+            ) if include_product else None,
+        )
+        for row in rows
+    ]
 
 @router.post("/", response_model=AlertResponse, status_code=status.HTTP_201_CREATED)
 async def create_alert(
@@ -66,6 +157,10 @@ async def create_alert(
     )
     db.add(new_alert)
     db.commit()
+    alert_index.add(new_alert.alert_id, new_alert.product_id, new_alert.threshold_price, new_alert.user_id)
+
+    # The current price may already be at or below the threshold
+    evaluate_product_alerts(db, new_alert.product_id, product.price, notify_watchers=False)
     db.refresh(new_alert)
 
     return AlertResponse(
@@ -79,20 +174,21 @@ async def create_alert(
 async def list_user_alerts(
     db: db_dependency,
     user_id: int = Query(..., description="The ID of the user to fetch alerts for"),
+    include_product: bool = Query(False, description="Embed a compact product card in each alert"),
+    after_id: Optional[int] = Query(None, description="Keyset cursor: only return alerts with a greater alert_id"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Max alerts per page (all alerts when both limit and after_id are omitted)"),
 ):
     """
-    List all alerts for a specific user by user ID.
+    List alerts for a specific user by user ID, one keyset page at a time.
+    Pass the last alert_id of a page as after_id to get the next page.
     """
-    alerts = db.query(Alert).filter(Alert.user_id == user_id).all()
-    return [
-        AlertResponse(
-            alert_id=a.alert_id,
-            product_id=a.product_id,
-            threshold_price=a.threshold_price,
-            alert_status=a.alert_status,
-        )
-        for a in alerts
-    ]
+    return query_alerts(
+        db,
+        user_id,
+        include_product=include_product,
+        after_id=after_id,
+        limit=limit,
+    )
 
 @router.put("/{alert_id}", response_model=AlertResponse)
 async def update_alert(
@@ -110,6 +206,12 @@ async def update_alert(
 
     alert.threshold_price = alert_req.threshold_price
     db.commit()
+    if alert.alert_status == "active":
+        alert_index.add(alert.alert_id, alert.product_id, alert.threshold_price, alert.user_id)
+
+    product = db.query(Product).filter(Product.product_id == alert.product_id).first()
+    if product:
+        evaluate_product_alerts(db, alert.product_id, product.price, notify_watchers=False)
     db.refresh(alert)
 
     return AlertResponse(
@@ -134,6 +236,7 @@ async def delete_alert(
 
     db.delete(alert)
     db.commit()
+    alert_index.remove(alert_id)
     return None
 
 # =============== New Endpoint Below ===============
@@ -141,25 +244,57 @@ async def delete_alert(
 async def get_triggered_alerts(
     db: db_dependency,
     current_user: dict = Depends(get_current_user),
+    include_product: bool = Query(False, description="Embed a compact product card in each alert"),
+    after_id: Optional[int] = Query(None, description="Keyset cursor: only return alerts with a greater alert_id"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Max alerts per page (all alerts when both limit and after_id are omitted)"),
 ):
     """
-    Return all alerts for the current user with status='triggered'.
+    Return alerts for the current user with status='triggered', one keyset page at a time.
     """
-    triggered_alerts = (
-        db.query(Alert)
-        .filter(
-            Alert.user_id == current_user["id"],
-            Alert.alert_status == "triggered"
-        )
-        .all()
+    return query_alerts(
+        db,
+        current_user["id"],
+        alert_status="triggered",
+        include_product=include_product,
+        after_id=after_id,
+        limit=limit,
     )
 
-    return [
-        AlertResponse(
-            alert_id=a.alert_id,
-            product_id=a.product_id,
-            threshold_price=a.threshold_price,
-            alert_status=a.alert_status
-        )
-        for a in triggered_alerts
-    ]
\ No newline at end of file
+@router.get("/stream")
+async def stream_alert_events(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Server-sent events for the current user: 'alert_triggered' and 'price_changed'.
+    Reconnecting clients send Last-Event-ID and get missed events replayed
+    from a short in-memory buffer. A comment line is sent as heartbeat.
+    """
+    # Ids issued by another worker or before a restart are ignored
+    last_event_id = event_broker.parse_event_id(request.headers.get("last-event-id"))
+
+    try:
+        subscription = event_broker.subscribe(current_user["id"], last_event_id)
+    except TooManyConnections:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many open event streams")
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            for event in subscription.replay:
+                yield event_broker.format_sse(event)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield event_broker.format_sse(event)
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
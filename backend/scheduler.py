@@ -1,161 +1,223 @@
 # scheduler.py
 import os
-import time
-import threading
 from dotenv import load_dotenv
 
-from models import SessionLocal, Alert, Product
-from ai_modules.ai_recommendation import continuously_update_recommendations
-from scraper.scraper_manager import ScraperManager
-from scraper.availability_checker import AvailabilityChecker
-from scraper.arabic_manager import ArabicTitleUpdater
+from models import SessionLocal
+from job_scheduler import JobScheduler
+from alerting.evaluator import reconcile_alerts
+from alerting.index import alert_index, ALERT_INDEX_REFRESH_SECONDS
+from alerting.dispatcher import notification_dispatcher
+from alerting.relay import AlertEventRelay
+from ai_modules.ai_recommendation import generate_user_recommendations
 
-load_dotenv()
-
-def continuously_monitor_alerts(interval_seconds: int = 60):
-    """
-    Continuously monitor "active" alerts. If a product's current price
-    is <= the alert threshold_price, mark it as 'triggered'.
-    """
-    while True:
-        with SessionLocal() as db:
-            active_alerts = (
-                db.query(Alert)
-                .join(Product, Alert.product_id == Product.product_id)
-                .filter(Alert.alert_status == "active")
-                .all()
-            )
-            for a in active_alerts:
-                if a.product and a.product.price is not None:
-                    if a.product.price <= a.threshold_price:
-                        a.alert_status = "triggered"
-                        #a.user.send_alert_email(a.product)
-            db.commit()
-        time.sleep(interval_seconds)
+# NOTE: the scraper modules (Selenium, the sklearn classifier pickle) are imported
+# inside the job functions, so the API process never loads them unless it runs those jobs.
 
-def run_alert_monitor(interval_seconds: int = 60):
-    """
-    Wrapper to run alerts in a thread-safe infinite loop.
-    """
-    threading.Thread(
-        target=continuously_monitor_alerts,
-        args=(interval_seconds,),
-        daemon=True
-    ).start()
-    print("Started Alert Monitor.")
+load_dotenv()
 
-def continuously_update_recommendations_loop(interval_seconds: int = 60):
-    """
-    Continuously run recommendation updates every X seconds.
-    """
-    while True:
-        with SessionLocal() as db:
-            continuously_update_recommendations(db)
-        time.sleep(interval_seconds)
+DEPLOYMENT_ENVIRONMENT = os.getenv("DEPLOYMENT_ENVIRONMENT", "DEV")
+ALERT_EVENT_RELAY_SECONDS = int(os.getenv("ALERT_EVENT_RELAY_SECONDS", "5"))
+# Browsers per store for the scraper job; 0 scrapes the stores one after another
+SCRAPER_WORKERS_PER_STORE = int(os.getenv("SCRAPER_WORKERS_PER_STORE", "1"))
+# Check the highest-priority products first, within AVAILABILITY_TIME_BUDGET_SECONDS / AVAILABILITY_PAGE_BUDGET
+AVAILABILITY_PRIORITY_ENABLED = os.getenv("AVAILABILITY_PRIORITY_ENABLED", "true").lower() == "true"
 
-def run_recommendation_updater(interval_seconds: int = 60):
-    """
-    Wrapper to run recommendation updater in a thread-safe infinite loop.
-    """
-    threading.Thread(
-        target=continuously_update_recommendations_loop,
-        args=(interval_seconds,),
-        daemon=True
-    ).start()
-    print("Started Recommendation Updater.")
 
-def continuously_run_scraper_manager():
+def job_timing(prefix: str, default_interval_seconds: int):
     """
-    Continuously run the scraper manager until completion,
-    then wait and restart.
+    Timing options for a job: <PREFIX>_CRON if set, otherwise
+    <PREFIX>_INTERVAL_SECONDS (default: default_interval_seconds).
     """
-    while True:
-        try:
-            print("Starting Scraper Manager...")
-            manager = ScraperManager()
-            manager.scrape_all_products()  # Allow this to run fully
-            print("Scraper Manager task completed. Restarting after delay...")
-        except Exception as e:
-            print(f"Error in Scraper Manager: {e}")
-        time.sleep(3600)  # Wait for 1 hour before restarting
+    cron = os.getenv(f"{prefix}_CRON")
+    if cron:
+        return {"cron": cron}
+    return {"interval_seconds": int(os.getenv(f"{prefix}_INTERVAL_SECONDS", default_interval_seconds))}
 
-def run_scraper_manager():
-    """
-    Wrapper to run the scraper manager in a thread-safe infinite loop.
-    """
-    threading.Thread(
-        target=continuously_run_scraper_manager,
-        daemon=True
-    ).start()
-    print("Started Scraper Manager in the background.")
 
-def continuously_run_availability_checker():
+# ======================================
+# Job functions: one iteration each, returning the number of items processed
+# ======================================
+def sweep_alerts(stop_event):
     """
-    Continuously run the availability checker until completion,
-    then wait and restart.
+    Low-frequency reconciliation sweep over "active" alerts.
+    Alerts are normally evaluated as soon as a price is written
+    (see alerting.evaluator.evaluate_product_alerts); the sweep is only a safety net.
     """
-    while True:
-        try:
-            print("Starting Availability Checker...")
-            checker = AvailabilityChecker(chunk_size=2000)
-            checker.update_availability()  # Allow this to run fully
-            print("Availability Checker task completed. Restarting after delay...")
-        except Exception as e:
-            print(f"Error in Availability Checker: {e}")
-        time.sleep(3600)  # Wait for 1 hour before restarting
+    with SessionLocal() as db:
+        triggered = reconcile_alerts(db)
+    if triggered:
+        print(f"Alert sweep triggered {len(triggered)} alert(s).")
+    return len(triggered)
 
-def run_availability_checker():
+def refresh_alert_index(stop_event):
     """
-    Wrapper to run the availability checker in a thread-safe infinite loop.
+    Sync this process' AlertIndex so alerts written elsewhere are seen quickly: one
+    version query, and only the alerts created or updated since are read (a full
+    reload when alerts were deleted).
     """
-    threading.Thread(
-        target=continuously_run_availability_checker,
-        daemon=True
-    ).start()
-    print("Started Availability Checker in the background.")
+    with SessionLocal() as db:
+        return alert_index.sync(db)
 
-def continuously_run_arabic_title_updater():
+def update_recommendations(stop_event):
     """
-    Continuously run the Arabic title updater until completion,
-    then wait and restart.
+    Run one recommendation update.
     """
-    while True:
-        try:
-            print("Starting Arabic Title Updater...")
-            updater = ArabicTitleUpdater()
-            updater.update_titles()  # Allow this to run fully
-            print("Arabic Title Updater task completed. Restarting after delay...")
-        except Exception as e:
-            print(f"Error in Arabic Title Updater: {e}")
-        time.sleep(3600)  # Wait for 1 hour before restarting
+    print("Running recommendation update...")
+    with SessionLocal() as db:
+        generate_user_recommendations(db)
 
-def run_arabic_title_updater():
+def run_scraper_manager(stop_event):
     """
-    Wrapper to run the Arabic title updater in a thread-safe infinite loop.
-    """
-    threading.Thread(
-        target=continuously_run_arabic_title_updater,
-        daemon=True
-    ).start()
-    print("Started Arabic Title Updater in the background.")
-
-
-def start_background_tasks():
+    Run the scraper manager once until completion (or shutdown).
     """
-    Check environment, and if not DEV, start the scraper, availability checker,
-    and Arabic updater in infinite loops.
-    Then start the recommendation updater & alert monitor for all environments.
+    from scraper.scraper_manager import ScraperManager
+    from scraper.driver_pool import driver_pool
+    try:
+        print("Starting Scraper Manager...")
+        manager = ScraperManager()
+        if SCRAPER_WORKERS_PER_STORE > 0:
+            processed = manager.scrape_all_products_concurrently(
+                workers_per_store=SCRAPER_WORKERS_PER_STORE, stop_event=stop_event
+            )
+        else:
+            processed = manager.scrape_all_products(stop_event=stop_event)
+        print("Scraper Manager task completed.")
+    finally:
+        driver_pool.close_idle()  # Don't keep warm browsers around until the next run
+    return processed
+
+def run_availability_checker(stop_event):
+    """
+    Run the availability checker once until completion (or shutdown).
+    """
+    from scraper.availability_checker import AvailabilityChecker
+    from scraper.driver_pool import driver_pool
+    try:
+        print("Starting Availability Checker...")
+        checker = AvailabilityChecker(chunk_size=2000)
+        if AVAILABILITY_PRIORITY_ENABLED:
+            processed = checker.update_availability_by_priority(stop_event=stop_event)
+        else:
+            processed = checker.update_availability(stop_event=stop_event)
+        print("Availability Checker task completed.")
+    finally:
+        driver_pool.close_idle()  # Don't keep warm browsers around until the next run
+    return processed
+
+def run_arabic_title_updater(stop_event):
+    """
+    Run the Arabic title updater once until completion (or shutdown).
+    """
+    from scraper.arabic_manager import ArabicTitleUpdater
+    from scraper.driver_pool import driver_pool
+    try:
+        print("Starting Arabic Title Updater...")
+        updater = ArabicTitleUpdater()
+        processed = updater.update_titles(stop_event=stop_event)
+        print("Arabic Title Updater task completed.")
+    finally:
+        driver_pool.close_idle()  # Don't keep warm browsers around until the next run
+    return processed
+
+
+# ======================================
+# Job registration
+# ======================================
+def schedule_alerts(scheduler: JobScheduler):
+    scheduler.add_job("alert_sweep", sweep_alerts, **job_timing("ALERT_SWEEP", 3600))
+    scheduler.add_job(
+        "alert_index_refresh", refresh_alert_index,
+        interval_seconds=ALERT_INDEX_REFRESH_SECONDS, exclusive=False, record_runs=False,
+    )
+
+def schedule_alert_events(scheduler: JobScheduler):
+    # Relays events written by other processes to this process' SSE subscribers
+    scheduler.add_job(
+        "alert_event_relay", AlertEventRelay().run_once,
+        interval_seconds=ALERT_EVENT_RELAY_SECONDS, exclusive=False, record_runs=False,
+    )
+
+def schedule_recommendations(scheduler: JobScheduler):
+    scheduler.add_job("recommendation_updater", update_recommendations, **job_timing("RECOMMENDATIONS", 60))
+
+# The Chrome-based jobs are staggered and jittered so they don't all start a browser at once
+def schedule_scraper(scheduler: JobScheduler):
+    scheduler.add_job(
+        "scraper_manager", run_scraper_manager, **job_timing("SCRAPER", 3600),
+        start_delay_seconds=0, jitter_seconds=300,
+    )
+
+def schedule_availability(scheduler: JobScheduler):
+    scheduler.add_job(
+        "availability_checker", run_availability_checker, **job_timing("AVAILABILITY", 3600),
+        start_delay_seconds=20 * 60, jitter_seconds=300,
+    )
+
+def schedule_arabic(scheduler: JobScheduler):
+    scheduler.add_job(
+        "arabic_title_updater", run_arabic_title_updater, **job_timing("ARABIC", 3600),
+        start_delay_seconds=40 * 60, jitter_seconds=300,
+    )
+
+
+# Background jobs that can be started by name (API lifespan or worker.py)
+JOBS = {
+    "alerts": schedule_alerts,
+    "alert_events": schedule_alert_events,
+    "recommendations": schedule_recommendations,
+    "scraper": schedule_scraper,
+    "availability": schedule_availability,
+    "arabic": schedule_arabic,
+}
+
+# Jobs that scrape the live stores: in DEV they only run when named explicitly
+STORE_JOBS = ("scraper", "availability", "arabic")
+
+# Jobs started inside the API process unless API_BACKGROUND_JOBS says otherwise.
+# Heavy jobs (Selenium, sklearn) belong to the worker: python -m worker
+DEFAULT_API_JOBS = "alerts,alert_events"
+
+
+def parse_job_names(value: str):
+    """
+    Turn a comma-separated list of job names into a list. "all" is every job,
+    except the STORE_JOBS in DEV.
+    """
+    if value.strip() == "all":
+        if DEPLOYMENT_ENVIRONMENT == "DEV":
+            return [name for name in JOBS if name not in STORE_JOBS]
+        return list(JOBS)
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in JOBS]
+    if unknown:
+        raise ValueError(f"Unknown background job(s): {', '.join(unknown)}. Choose from: {', '.join(JOBS)}")
+    return names
+
+
+def start_background_tasks(jobs=None):
+    """
+    Start the given background jobs (names from JOBS) on a JobScheduler,
+    plus the notification dispatcher. Returns the scheduler so the caller
+    can shut it down.
+    When jobs is None, the list comes from API_BACKGROUND_JOBS
+    (default: only the lightweight alert jobs).
+    """
+    if jobs is None:
+        jobs = parse_job_names(os.getenv("API_BACKGROUND_JOBS", DEFAULT_API_JOBS))
+
+    scheduler = JobScheduler()
+    for name in jobs:
+        JOBS[name](scheduler)
+    scheduler.start()
+    notification_dispatcher.start()
+
+    print(f"Background tasks have started: {', '.join(jobs) or 'none'}.")
+    return scheduler
+
+
+def stop_background_tasks(scheduler: JobScheduler):
+    """
+    Cooperatively stop running jobs and flush the notification dispatcher.
     """
-    environment = os.getenv("DEPLOYMENT_ENVIRONMENT", "DEV")
-
-    # Always run Recommendation Updater & Alert Monitor
-    run_recommendation_updater()
-    run_alert_monitor()
-
-    # Only run heavy scrapers if environment != DEV
-    if environment != "DEV":
-        run_scraper_manager()
-        run_availability_checker()
-        run_arabic_title_updater()
-
-    print("Background tasks have started.")
+    scheduler.shutdown()
+    notification_dispatcher.stop(timeout=10)
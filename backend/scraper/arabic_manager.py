@@ -97,22 +97,23 @@ class ArabicTitleUpdater:
         except Exception as e:
             logger.error(f"[{product.store.store_name}] Error scraping Product ID {product.product_id}: {e}")
 
-    def process_store(self, store, batch_size=100):
+    def process_store(self, store, batch_size=100, stop_event=None):
         """
         Process all products for a specific store in batches,
         creating/updating the Arabic translation if missing.
+        Stops between batches when stop_event is set. Returns the number of products processed.
         """
+        processed = 0
         scraper_class = self.scrapers.get(store.store_name)
         if not scraper_class:
             logger.error(f"No scraper found for store: {store.store_name}. Skipping.")
-            return
+            return processed
 
-        scraper = scraper_class(store.store_name)
         try:
-            scraper.driver = scraper.setup_driver()
+            scraper = scraper_class(store.store_name)
         except Exception as e:
             logger.error(f"Failed to initialize scraper for store: {store.store_name}. Error: {e}")
-            return
+            return processed
 
         with Session(engine) as session:
             # Build the base query
@@ -135,6 +136,9 @@ class ArabicTitleUpdater:
             logger.info(f"[{store.store_name}] Found {total_products} products to update (no Arabic translation yet).")
 
             for offset in range(0, total_products, batch_size):
+                if stop_event is not None and stop_event.is_set():
+                    logger.info(f"[{store.store_name}] Stopping before batch {offset // batch_size + 1}.")
+                    break
                 batch = product_query.order_by(Product.product_id.asc()).offset(offset).limit(batch_size).all()
                 if not batch:
                     break
@@ -143,6 +147,7 @@ class ArabicTitleUpdater:
 
                 for product in batch:
                     self.scrape_and_update_title(scraper, product, session)
+                processed += len(batch)
 
                 try:
                     session.commit()
@@ -152,12 +157,15 @@ class ArabicTitleUpdater:
                     session.rollback()
 
         scraper.quit_driver()
+        return processed
 
-    def update_titles(self):
+    def update_titles(self, stop_event=None):
         """
         Update Arabic titles for all products, store by store, in chunks,
         with optional starting points for store_id and product_id.
+        Returns the number of products processed.
         """
+        processed = 0
         with Session(engine) as session:
             # 1. Load all stores, optionally starting from start_store_id
             store_query = session.query(Store).order_by(Store.store_id.asc())
@@ -170,10 +178,13 @@ class ArabicTitleUpdater:
 
         # 2. Process each store
         for store in all_stores:
+            if stop_event is not None and stop_event.is_set():
+                break
             logger.info(f"\n[INFO] Processing store: {store.store_name} (Store ID: {store.store_id})")
-            self.process_store(store, batch_size=self.chunk_size)
+            processed += self.process_store(store, batch_size=self.chunk_size, stop_event=stop_event)
 
         logger.info("\n[INFO] All stores processed successfully.")
+        return processed
 
 
 if __name__ == "__main__":
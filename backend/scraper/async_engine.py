@@ -0,0 +1,168 @@
+# backend/scraper/async_engine.py
+import os
+import time
+import random
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+import aiohttp
+from dotenv import load_dotenv
+
+from scraper.http_fetcher import (DEFAULT_HEADERS, HTTP_MAX_CONNECTIONS_PER_HOST, HTTP_TIMEOUT_SECONDS, PAGE_STATUSES,
+                                  FetchStats)
+from scraper.stage_timer import stage_timer
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Pages kept in flight at once across all hosts
+ASYNC_HTTP_CONCURRENCY = int(os.getenv("ASYNC_HTTP_CONCURRENCY", "32"))
+# Politeness limit per host: sustained requests per second and burst size
+HTTP_REQUESTS_PER_SECOND = float(os.getenv("HTTP_REQUESTS_PER_SECOND", "4"))
+HTTP_BURST = int(os.getenv("HTTP_BURST", "8"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allow `rate` requests per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncFetcher:
+    """
+    aiohttp client for many pages in flight from one thread:
+    per-host semaphores (connections), per-host token buckets (politeness),
+    a total timeout per request and retries with backoff on errors, timeouts and 429/5xx.
+
+        async with AsyncFetcher() as fetcher:
+            html = await fetcher.fetch(url)
+    """
+
+    def __init__(self, max_per_host=HTTP_MAX_CONNECTIONS_PER_HOST, requests_per_second=HTTP_REQUESTS_PER_SECOND,
+                 burst=HTTP_BURST, timeout=HTTP_TIMEOUT_SECONDS, retries=2, backoff_seconds=0.5):
+        self.max_per_host = max_per_host
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.stats = FetchStats()
+        self.session = None
+        self._semaphores = {}
+        self._buckets = {}
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            headers=DEFAULT_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit_per_host=self.max_per_host),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    def _host_limits(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+            self._buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+        return self._semaphores[host], self._buckets[host]
+
+    @stage_timer.timed("fetch")
+    async def fetch(self, url):
+        """Return the HTML of url, or None once the retries are used up or it is not an HTML page of PAGE_STATUSES."""
+        semaphore, bucket = self._host_limits(url)
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            async with semaphore:
+                await bucket.acquire()
+                try:
+                    async with self.session.get(url) as response:
+                        if response.status in PAGE_STATUSES:
+                            if "html" not in response.content_type:
+                                return None
+                            # Pages without a charset are UTF-8 for every store we scrape
+                            return await response.text(encoding=response.charset or "utf-8")
+                        if response.status not in RETRY_STATUSES:
+                            logger.info(f"HTTP fetch of {url} returned {response.status}.")
+                            return None
+                        retry_after = response.headers.get("Retry-After")
+                        logger.info(f"HTTP fetch of {url} returned {response.status} (attempt {attempt + 1}).")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.info(f"HTTP fetch failed for {url} (attempt {attempt + 1}): {e!r}")
+
+            if attempt < self.retries:
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else \
+                    self.backoff_seconds * (2 ** attempt) + random.uniform(0, self.backoff_seconds)
+                await asyncio.sleep(delay)
+        return None
+
+    async def fetch_and_parse(self, store_name, url, parse):
+        """fetch() then parse(html); None (recorded as a failure for the store) when either fails."""
+        html = await self.fetch(url)
+        result = parse(html) if html else None
+        self.stats.record(store_name, result is not None)
+        return result
+
+
+async def stream(items, handler, concurrency=ASYNC_HTTP_CONCURRENCY):
+    """
+    Run `await handler(item)` for every item with at most `concurrency` in flight,
+    yielding (item, result) in completion order. Items are pulled lazily, so
+    `items` can be a generator over a large table. A handler that raises yields
+    (item, None).
+
+    Iterate inside `async with contextlib.aclosing(stream(...))`, so that a consumer
+    that stops early cancels the requests still in flight right away, not at GC.
+    """
+    items = iter(items)
+    pending = {}
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[asyncio.ensure_future(handler(item))] = item
+
+            if not pending:
+                return
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    logger.error(f"Async handler failed for {item!r}: {e!r}")
+                    result = None
+                yield item, result
+    finally:
+        # The consumer stopped early (e.g. shutdown): don't leave requests running
+        for task in pending:
+            task.cancel()
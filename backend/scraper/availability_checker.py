@@ -1,20 +1,37 @@
 # backend/scraper/availability_checker.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 from scraper.scraper import AmazonScraper, JarirScraper, ExtraScraper
-from models import Product, Store, ProductPriceHistory, engine
-from datetime import datetime, timezone
+from scraper.http_fetcher import HTTP_FIRST_ENABLED
+from scraper.async_engine import AsyncFetcher, stream, ASYNC_HTTP_CONCURRENCY
+from scraper.browser_profile import page_load_stats
+from scraper.availability_priority import (
+    AvailabilityQueue, TimeBudget, AVAILABILITY_TIME_BUDGET_SECONDS, AVAILABILITY_PAGE_BUDGET
+)
+from scraper.availability_writer import AvailabilityWriter, load_checkpoint, AVAILABILITY_COMMIT_EVERY
+from models import Product, Store, engine
 from collections import defaultdict
+from contextlib import aclosing
+import asyncio
+import time
 import sys
 
 
+# Checkpoint of update_availability in the availability_checkpoints table
+CHECKPOINT_NAME = "update_availability"
+
+
 class AvailabilityChecker:
-    def __init__(self, chunk_size=2000, start_product_id=None):
+    def __init__(self, chunk_size=2000, start_product_id=None,
+                 http_concurrency=ASYNC_HTTP_CONCURRENCY if HTTP_FIRST_ENABLED else 0,
+                 commit_every=AVAILABILITY_COMMIT_EVERY):
         """
         Initialize the AvailabilityChecker.
 
         :param chunk_size: Number of products to process at once (default=2000).
-        :param start_product_id: (Optional) Product ID to start processing from.
+        :param start_product_id: (Optional) Product ID to start processing from, instead of the checkpoint.
+        :param http_concurrency: Product pages kept in flight by the async HTTP pass (0 = Chrome only).
+        :param commit_every: Checked products written per commit (see availability_writer.py).
         """
         self.scrapers = {
             "Amazon": AmazonScraper,
@@ -23,173 +40,262 @@ class AvailabilityChecker:
         }
         self.chunk_size = chunk_size
         self.start_product_id = start_product_id
-
-    def check_store_availability(self, store_name, products):
+        self.http_concurrency = http_concurrency
+        self.writer = AvailabilityWriter(commit_every)
+        # One scraper (and leased WebDriver) per store for the whole run, see close_store_scrapers
+        self.store_scrapers = {}
+
+    def store_scraper(self, store_name):
+        """The scraper of a store for this run, created on first use; None for an unknown store."""
+        if store_name not in self.store_scrapers:
+            scraper_class = self.scrapers.get(store_name)
+            if not scraper_class:
+                print(f"[INFO] No scraper found for store: {store_name}")
+                return None
+            # HTTP is tried first here only when the async pass did not already try it
+            self.store_scrapers[store_name] = (scraper_class(store_name) if self.http_concurrency == 0
+                                               else scraper_class(store_name, fetcher=None))
+        return self.store_scrapers[store_name]
+
+    def close_store_scrapers(self):
+        """Return the drivers of the run's scrapers to the pool."""
+        for store_name, scraper in self.store_scrapers.items():
+            try:
+                scraper.quit_driver()
+            except Exception as e:
+                print(f"[ERROR] Failed to close the driver of store: {store_name}. Error: {e}")
+        self.store_scrapers = {}
+
+    def check_store_availability(self, store_name, products, stop_event=None):
         """
         Check availability for a list of products (all belonging to the same store)
-        and update the database.
+        and queue the updates in the writer.
 
         :param store_name: Name of the store (e.g., 'Amazon', 'Jarir', 'Extra').
         :param products: List of Product objects to process.
+        :param stop_event: Optional threading.Event; when set, stops after the current product.
+        :return: Number of products checked.
         """
-        scraper_class = self.scrapers.get(store_name)
-        if not scraper_class:
-            print(f"[INFO] No scraper found for store: {store_name}")
-            return
-
-        # Initialize the scraper (WebDriver) for this store
-        scraper = scraper_class(store_name)
-        try:
-            scraper.driver = scraper.setup_driver()  # Ensure driver is set up
+        checked = 0
+        # The store's scraper keeps its leased WebDriver until the end of the run
+        scraper = self.store_scraper(store_name)
+        if scraper is None:
+            return checked
+
+        for product in products:
+            if stop_event is not None and stop_event.is_set():
+                break
+            checked += 1
+            try:
+                # --- A) SCRAPE AVAILABILITY & PRICE ---
+                scraped_info = scraper.scrape_availability(product.link)
+                self.apply_scraped_info(product, scraped_info)
+            except Exception as e:
+                print(f"[ERROR] [{store_name}] Error processing Product ID: {product.product_id}, "
+                      f"Link: {product.link}. Error: {e}")
+        return checked
+
+    def apply_scraped_info(self, product, scraped_info):
+        """
+        Queue scraped availability and price of a product in the writer, which writes them
+        with the price history in bulk and evaluates the alerts of products with a new price.
+        Returns False when nothing usable was scraped.
+        """
+        return self.writer.add(product, scraped_info)
 
-            with Session(engine) as db:
-                for product in products:
-                    try:
-                        # --- A) SCRAPE AVAILABILITY & PRICE ---
-                        scraped_info = scraper.scrape_availability(product.link)
-
-                        # If scraping failed or returned no data, skip update
-                        if not scraped_info:
-                            print(f"[WARN] No data scraped for Product ID {product.product_id}, skipping update.")
-                            continue
-
-                        new_availability = scraped_info.get("availability", None)
-                        new_price_str = scraped_info.get("price", "N/A")
-
-                        # If availability is None, skip update
-                        if new_availability is None:
-                            print(f"[WARN] availability=None for Product ID {product.product_id}, skipping update.")
-                            continue
-
-                        # Attempt to convert price to float
-                        new_price = None
-                        if new_price_str != "N/A":
-                            try:
-                                new_price = float(new_price_str)
-                            except ValueError:
-                                print(f"[WARN] Unable to parse price for Product ID {product.product_id}, "
-                                      f"skipping price update.")
-                                new_price = None
-
-                        # --- B) UPDATE FIELDS ---
-                        old_availability = product.availability
-                        old_price = product.price
-
-                        # Always update availability
-                        product.availability = new_availability
-
-                        price_changed = False
-                        price_message = "price not change"
-
-                        if new_price is not None:
-                            # Check if price has changed
-                            if (old_price is None) or (abs(old_price - new_price) > 1e-6):
-                                price_changed = True
-                                old_price_str = f"{old_price:.2f}" if old_price is not None else "N/A"
-                                updated_price_str = f"{new_price:.2f}"
-                                price_message = f"old price: {old_price_str}, new price: {updated_price_str}"
-
-                                # Update the product's price
-                                product.price = new_price
-                                product.last_updated = datetime.now(timezone.utc)
-
-                                # Record the price history
-                                price_history = ProductPriceHistory(
-                                    product_id=product.product_id,
-                                    old_price=old_price if old_price is not None else 0.0,
-                                    new_price=new_price
-                                )
-                                db.add(price_history)
-                            else:
-                                # Price remains unchanged
-                                if new_availability:
-                                    product.last_updated = datetime.now(timezone.utc)
-                                price_message = "price not change"
-                        else:
-                            # If new_price is None, do not update the price in DB
-                            if new_availability:
-                                product.last_updated = datetime.now(timezone.utc)
-                            price_message = "price not change (scraped price is None)"
-
-                        # --- C) Print debug information ---
-                        print(
-                            f"[Availability: {product.availability}] "
-                            f"[Product ID: {product.product_id}] "
-                            f"[{price_message}] "
-                            f"[Last Updated: {product.last_updated}] "
-                            f"[Link: {product.link}]"
-                        )
-
-                        # --- D) Commit the update ---
-                        db.merge(product)
-                        db.commit()
-
-                    except Exception as e:
-                        print(f"[ERROR] [{store_name}] Error processing Product ID: {product.product_id}, "
-                              f"Link: {product.link}. Error: {e}")
-
-        except Exception as e:
-            print(f"[ERROR] Failed to initialize scraper for store: {store_name}. Error: {e}")
-        finally:
-            # Ensure the WebDriver is properly closed
-            scraper.quit_driver()
+    def check_availability_async(self, products, stop_event=None):
+        """
+        Check products over plain HTTP with the async engine: many product pages in
+        flight from this thread, each result written as soon as it arrives.
 
-    def update_availability(self):
+        :return: (number of products checked, {store_name: [products whose page needs Chrome]})
+        """
+        return asyncio.run(self._check_availability_async(products, stop_event))
+
+    async def _check_availability_async(self, products, stop_event):
+        checked = 0
+        needs_browser = defaultdict(list)
+        parsers = {
+            store_name: scraper_class(store_name, driver_pool=None, fetcher=None).parse_availability
+            for store_name, scraper_class in self.scrapers.items()
+        }
+        store_names = {product.product_id: product.store.store_name for product in products}
+
+        async with AsyncFetcher() as fetcher:
+            async def check(product):
+                store_name = store_names[product.product_id]
+                if store_name not in parsers:
+                    return None
+                return await fetcher.fetch_and_parse(store_name, product.link, parsers[store_name])
+
+            async with aclosing(stream(products, check, self.http_concurrency)) as results:
+                async for product, scraped_info in results:
+                    if scraped_info is None:
+                        needs_browser[store_names[product.product_id]].append(product)
+                    else:
+                        checked += 1
+                        try:
+                            self.writer.add(product, scraped_info, flush=False)
+                            if self.writer.full:
+                                # The DB write runs in a thread, so the requests in flight keep going
+                                await asyncio.to_thread(self.writer.flush)
+                        except Exception as e:
+                            print(f"[ERROR] Error processing Product ID: {product.product_id}, "
+                                  f"Link: {product.link}. Error: {e}")
+                    if stop_event is not None and stop_event.is_set():
+                        break
+
+        for store_name, (successes, attempts) in fetcher.stats.summary().items():
+            print(f"[INFO] [{store_name}] {successes}/{attempts} product pages checked over HTTP.")
+        return checked, needs_browser
+
+    def update_availability(self, stop_event=None):
         """
         Update the availability of products in the database in ascending order by product_id.
 
         Steps:
-          1. Fetch all products in ascending order by product_id, optionally starting from start_product_id.
-          2. Process them in chunks (offset/limit).
-          3. For each chunk, fix any naive last_updated timestamps by setting tzinfo to UTC.
-          4. Group products by store_name and call check_store_availability for each group.
-          5. Continue until no more products remain.
+          1. Start from start_product_id, or after the product recorded in the checkpoint
+             by a previous run that did not finish.
+          2. Load chunks of products with product_id greater than the last one of the
+             previous chunk (keyset pagination, so late chunks cost as much as the first).
+          3. Check the chunk over plain HTTP with the async engine (when http_concurrency > 0),
+             then group the products that need a browser by store_name and call
+             check_store_availability for each group, with one scraper per store for the run.
+          4. Write the updates every commit_every products, and once a chunk is done, with its
+             last product_id as the checkpoint.
+          5. Continue until no more products remain (or stop_event is set); a complete pass
+             clears the checkpoint.
+
+        Returns the number of products checked.
         """
-        with Session(engine) as db:
-            product_query = (
-                db.query(Product)
-                .join(Store, Product.store_id == Store.store_id)
-                .order_by(Product.product_id.asc())
-            )
-
-            if self.start_product_id is not None:
-                product_query = product_query.filter(Product.product_id >= self.start_product_id)
-                print(f"[INFO] Starting from product_id >= {self.start_product_id}")
-
-            offset = 0
-
-            while True:
-                # 1. Load a chunk of products
-                chunk = product_query.offset(offset).limit(self.chunk_size).all()
-                if not chunk:
-                    print(f"[INFO] No more products to process.")
-                    break
-
-                print(f"[INFO] Loaded chunk of {len(chunk)} products (offset={offset}).")
-
-                # 2. Fix naive timestamps in the current chunk
-                changed = False
-                for prod in chunk:
-                    if prod.last_updated and prod.last_updated.tzinfo is None:
-                        prod.last_updated = prod.last_updated.replace(tzinfo=timezone.utc)
-                        changed = True
-                if changed:
-                    db.commit()
-                    print(f"[INFO] Fixed naive timestamps in current chunk.")
-
-                # 3. Group products by store
-                store_groups = defaultdict(list)
-                for product in chunk:
-                    store_groups[product.store.store_name].append(product)
+        checked = 0
+        completed = False
+        try:
+            with Session(engine) as db:
+                if self.start_product_id is not None:
+                    last_product_id = self.start_product_id - 1
+                    print(f"[INFO] Starting from product_id >= {self.start_product_id}")
+                else:
+                    last_product_id = load_checkpoint(db, CHECKPOINT_NAME)
+                    if last_product_id is not None:
+                        print(f"[INFO] Resuming after product_id {last_product_id} (checkpoint).")
+
+                while stop_event is None or not stop_event.is_set():
+                    # 2. Load the next chunk of products
+                    product_query = (
+                        db.query(Product)
+                        .join(Store, Product.store_id == Store.store_id)
+                        .options(contains_eager(Product.store))
+                        .order_by(Product.product_id.asc())
+                    )
+                    if last_product_id is not None:
+                        product_query = product_query.filter(Product.product_id > last_product_id)
+                    chunk = product_query.limit(self.chunk_size).all()
+                    if not chunk:
+                        print(f"[INFO] No more products to process.")
+                        completed = True
+                        break
+
+                    print(f"[INFO] Loaded chunk of {len(chunk)} products "
+                          f"(product_id {chunk[0].product_id} to {chunk[-1].product_id}).")
+
+                    # 3. Check over HTTP and in Chrome
+                    checked += self.check_products(chunk, stop_event)
+                    if stop_event is not None and stop_event.is_set():
+                        break
+
+                    # 4. Write what is left of the chunk with the checkpoint
+                    last_product_id = chunk[-1].product_id
+                    self.writer.flush(checkpoint=(CHECKPOINT_NAME, last_product_id))
+        finally:
+            # A stopped run keeps the checkpoint of its last complete chunk
+            self.writer.flush(checkpoint=(CHECKPOINT_NAME, None) if completed else None)
+            self.close_store_scrapers()
+
+        if stop_event is not None and stop_event.is_set():
+            print(f"\n[INFO] Availability check stopped after {checked} products.")
+        else:
+            print("\n[INFO] All products processed successfully.")
+        self.print_page_load_stats()
+        return checked
+
+    def check_products(self, products, stop_event=None):
+        """
+        Check a chunk of products (loaded with their store): server-rendered pages over
+        HTTP (when http_concurrency > 0), then the rest in Chrome, grouped by store.
+        The products are only read; the writer sends their updates in bulk.
+        Returns the number of products checked.
+        """
+        checked = 0
+
+        # Check server-rendered pages over HTTP, keeping the rest for Chrome
+        if self.http_concurrency > 0:
+            http_checked, store_groups = self.check_availability_async(products, stop_event)
+            checked += http_checked
+        else:
+            store_groups = defaultdict(list)
+            for product in products:
+                store_groups[product.store.store_name].append(product)
+
+        # For each store group, check availability in Chrome
+        for store_name, store_products in store_groups.items():
+            checked += self.check_store_availability(store_name, store_products, stop_event)
+        return checked
+
+    def update_availability_by_priority(self, stop_event=None, time_budget_seconds=AVAILABILITY_TIME_BUDGET_SECONDS,
+                                        page_budget=AVAILABILITY_PAGE_BUDGET):
+        """
+        Check products in priority order (see availability_priority.py): products with
+        active alerts, recent views or volatile prices, and products not checked for a
+        long time first. Stops once time_budget_seconds or page_budget products are spent
+        (0 = no limit), when every product has been checked, or when stop_event is set.
 
-                # 4. For each store group, check availability
-                for store_name, products in store_groups.items():
-                    self.check_store_availability(store_name, products)
+        Returns the number of products checked.
+        """
+        start_time = time.time()
+        budget = TimeBudget(stop_event, time_budget_seconds)
+        checked = 0
+        taken = 0
+        try:
+            with Session(engine) as db:
+                queue = AvailabilityQueue.from_database(db)
+                print(f"[INFO] {len(queue.boosted)} products with alerts, recent views or price changes.")
+
+                while not budget.is_set():
+                    size = self.chunk_size if not page_budget else min(self.chunk_size, page_budget - taken)
+                    if size <= 0:
+                        break
+                    product_ids = queue.next_batch(db, size)
+                    if not product_ids:
+                        print(f"[INFO] Every product has been checked in this cycle.")
+                        break
+                    taken += len(product_ids)
+
+                    positions = {product_id: position for position, product_id in enumerate(product_ids)}
+                    products = sorted(
+                        db.query(Product).join(Store, Product.store_id == Store.store_id)
+                        .options(contains_eager(Product.store))
+                        .filter(Product.product_id.in_(product_ids)).all(),
+                        key=lambda product: positions[product.product_id],
+                    )
+                    print(f"[INFO] Checking {len(products)} products by priority ({taken} this cycle).")
+                    checked += self.check_products(products, budget)
+                    self.writer.flush()
+                    if not budget.is_set():
+                        queue.mark_checked(db, product_ids)
+        finally:
+            self.writer.flush()
+            self.close_store_scrapers()
 
-                # Move to the next chunk
-                offset += self.chunk_size
+        print(f"\n[INFO] Checked {checked} products by priority in {time.time() - start_time:.0f} seconds.")
+        self.print_page_load_stats()
+        return checked
 
-        print("\n[INFO] All products processed successfully.")
+    @staticmethod
+    def print_page_load_stats():
+        for store_name, (pages, kilobytes, load_ms) in page_load_stats.summary().items():
+            print(f"[INFO] [{store_name}] {pages} product pages loaded in Chrome, "
+                  f"{kilobytes:.0f} KB and {load_ms:.0f} ms per page on average.")
 
 
 if __name__ == "__main__":
@@ -198,13 +304,30 @@ if __name__ == "__main__":
     # Set up command-line argument parsing
     parser = argparse.ArgumentParser(description="Check product availability and update the database.")
     parser.add_argument('--chunk_size', type=int, default=2000, help='Number of products to process at once.')
-    parser.add_argument('--start_product_id', type=int, default=None, help='Product ID to start processing from.')
+    parser.add_argument('--start_product_id', type=int, default=None,
+                        help='Product ID to start processing from (default: resume from the checkpoint).')
+    parser.add_argument('--commit_every', type=int, default=AVAILABILITY_COMMIT_EVERY,
+                        help='Checked products written per commit.')
+    parser.add_argument('--http_concurrency', type=int, default=ASYNC_HTTP_CONCURRENCY if HTTP_FIRST_ENABLED else 0,
+                        help='Product pages checked over HTTP at once before using Chrome (0 = Chrome only).')
+    parser.add_argument('--priority', action='store_true',
+                        help='Check the highest-priority products first, within the budgets below.')
+    parser.add_argument('--time_budget_seconds', type=float, default=AVAILABILITY_TIME_BUDGET_SECONDS,
+                        help='With --priority: stop after this many seconds (0 = no limit).')
+    parser.add_argument('--page_budget', type=int, default=AVAILABILITY_PAGE_BUDGET,
+                        help='With --priority: check at most this many products (0 = no limit).')
 
     args = parser.parse_args()
 
     # Initialize the AvailabilityChecker
     checker = AvailabilityChecker(
         chunk_size=args.chunk_size,
-        start_product_id=args.start_product_id
+        start_product_id=args.start_product_id,
+        http_concurrency=args.http_concurrency,
+        commit_every=args.commit_every,
     )
-    checker.update_availability()
+    if args.priority:
+        checker.update_availability_by_priority(time_budget_seconds=args.time_budget_seconds,
+                                                page_budget=args.page_budget)
+    else:
+        checker.update_availability()
@@ -0,0 +1,135 @@
+# backend/scraper/availability_priority.py
+"""
+Priority order of the availability checks: products users care about first.
+
+A product's score adds up
+  - ALERT_WEIGHT per active alert,
+  - VIEW_WEIGHT per view in the search history over the last VIEW_WINDOW_DAYS,
+  - VOLATILITY_WEIGHT per price change over the last VOLATILITY_WINDOW_DAYS,
+  - STALENESS_WEIGHT per day since its last check (capped at STALENESS_CAP_DAYS, the
+    score of a product never checked).
+
+Only few products have alerts, views or recent price changes: their bonuses are
+computed once per cycle, while the other products are read from the database in
+order of last check, round by round.
+"""
+import os
+import time
+import heapq
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import select, update, func, or_
+from sqlalchemy.orm import Session
+
+from models import Product, Alert, SearchHistory, ProductPriceHistory
+from scraper.product_writer import chunks
+
+load_dotenv()
+
+# Budget of a priority-ordered availability cycle (0 = no limit)
+AVAILABILITY_TIME_BUDGET_SECONDS = float(os.getenv("AVAILABILITY_TIME_BUDGET_SECONDS", "2700"))
+AVAILABILITY_PAGE_BUDGET = int(os.getenv("AVAILABILITY_PAGE_BUDGET", "0"))
+
+ALERT_WEIGHT = 10.0
+VIEW_WEIGHT = 2.0
+VIEW_WINDOW_DAYS = 7
+VOLATILITY_WEIGHT = 3.0
+VOLATILITY_WINDOW_DAYS = 30
+STALENESS_WEIGHT = 1.0
+STALENESS_CAP_DAYS = 30
+
+
+def staleness_days(last_checked, now):
+    if last_checked is None:
+        return STALENESS_CAP_DAYS
+    if last_checked.tzinfo is None:
+        last_checked = last_checked.replace(tzinfo=timezone.utc)
+    return min(STALENESS_CAP_DAYS, max(0.0, (now - last_checked).total_seconds() / 86400))
+
+
+class TimeBudget:
+    """A stop_event that is also set once the budget is spent."""
+
+    def __init__(self, stop_event=None, seconds=None):
+        self.stop_event = stop_event
+        self.deadline = time.monotonic() + seconds if seconds else None
+
+    def is_set(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+
+class AvailabilityQueue:
+    """Products not checked since the start of the cycle, highest score first."""
+
+    def __init__(self, now=None):
+        self.cycle_start = now or datetime.now(timezone.utc)
+        # {product_id: (bonus, last_checked)} of the products with alerts, views or price changes
+        self.boosted = {}
+
+    @classmethod
+    def from_database(cls, db: Session, now=None):
+        queue = cls(now)
+        now = queue.cycle_start
+        bonuses = {}
+        for weight, counts in (
+            (ALERT_WEIGHT, select(Alert.product_id, func.count())
+                .where(Alert.alert_status == "active")
+                .group_by(Alert.product_id)),
+            (VIEW_WEIGHT, select(SearchHistory.product_id, func.count())
+                .where(SearchHistory.product_id.isnot(None),
+                       SearchHistory.search_date >= now - timedelta(days=VIEW_WINDOW_DAYS))
+                .group_by(SearchHistory.product_id)),
+            (VOLATILITY_WEIGHT, select(ProductPriceHistory.product_id, func.count())
+                .where(ProductPriceHistory.change_date >= now - timedelta(days=VOLATILITY_WINDOW_DAYS))
+                .group_by(ProductPriceHistory.product_id)),
+        ):
+            for product_id, count in db.execute(counts):
+                if product_id is not None:
+                    bonuses[product_id] = bonuses.get(product_id, 0.0) + weight * count
+
+        for ids_chunk in chunks(list(bonuses)):
+            for product_id, last_checked in db.execute(
+                    select(Product.product_id, Product.last_checked).where(Product.product_id.in_(ids_chunk))):
+                queue.boosted[product_id] = (bonuses[product_id], last_checked)
+        return queue
+
+    def score(self, bonus, last_checked):
+        return bonus + STALENESS_WEIGHT * staleness_days(last_checked, self.cycle_start)
+
+    def next_batch(self, db: Session, size):
+        """Ids of the next (at most) size products to check, highest score first."""
+        stale = db.execute(
+            select(Product.product_id, Product.last_checked)
+            .where(or_(Product.last_checked.is_(None), Product.last_checked < self.cycle_start))
+            .order_by(Product.last_checked.asc().nulls_first(), Product.product_id)
+            .limit(size)
+        ).all()
+
+        candidates = [(self.score(0.0, last_checked), product_id)
+                      for product_id, last_checked in stale if product_id not in self.boosted]
+        candidates += [(self.score(bonus, last_checked), product_id)
+                       for product_id, (bonus, last_checked) in self.boosted.items()]
+        batch = heapq.nlargest(size, candidates)
+        if len(stale) == size:
+            # Products past the stale rows read score at most as much as the last of them
+            floor = self.score(0.0, stale[-1].last_checked)
+            batch = [candidate for candidate in batch if candidate[0] >= floor]
+
+        for _, product_id in batch:
+            self.boosted.pop(product_id, None)
+        return [product_id for _, product_id in batch]
+
+    def mark_checked(self, db: Session, product_ids, now=None):
+        """Set last_checked on checked products, including those whose page could not be read."""
+        now = now or datetime.now(timezone.utc)
+        for ids_chunk in chunks(product_ids):
+            db.execute(
+                update(Product)
+                .where(Product.product_id.in_(ids_chunk),
+                       or_(Product.last_checked.is_(None), Product.last_checked < self.cycle_start))
+                .values(last_checked=now)
+            )
+        db.commit()
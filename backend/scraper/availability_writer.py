@@ -0,0 +1,146 @@
+# backend/scraper/availability_writer.py
+"""
+Batch writer of availability checks: the scraped availability and price of
+checked products are collected and written every AVAILABILITY_COMMIT_EVERY
+products with one bulk UPDATE of the products (by primary key), one bulk insert
+of the price history and a single commit, instead of a merge SELECT, an UPDATE
+and a COMMIT per product.
+
+The Product objects handed to add() are only read: the new values go to the
+database through the bulk statements, so the session that loaded the products
+never flushes them one by one.
+"""
+import os
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from models import Product, AvailabilityCheckpoint, engine
+from alerting.evaluator import evaluate_product_alerts
+from scraper.stage_timer import stage_timer
+from scraper.product_writer import insert_price_histories
+
+load_dotenv()
+
+# Checked products per commit
+AVAILABILITY_COMMIT_EVERY = int(os.getenv("AVAILABILITY_COMMIT_EVERY", "200"))
+
+
+def load_checkpoint(db: Session, name):
+    """The last product id recorded for the pass `name`, or None to start from the first product."""
+    checkpoint = db.get(AvailabilityCheckpoint, name)
+    return checkpoint.last_product_id if checkpoint is not None else None
+
+
+def save_checkpoint(db: Session, name, last_product_id):
+    """Record the last product id of the pass `name` (None once the pass is complete); committed by the caller."""
+    checkpoint = db.get(AvailabilityCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = AvailabilityCheckpoint(name=name)
+        db.add(checkpoint)
+    checkpoint.last_product_id = last_product_id
+    checkpoint.updated_at = datetime.now(timezone.utc)
+
+
+class AvailabilityWriter:
+    def __init__(self, commit_every=AVAILABILITY_COMMIT_EVERY):
+        self.commit_every = commit_every
+        self.updates = []  # {"product_id", "availability", "last_checked"[, "price"][, "last_updated"]}
+        self.price_histories = []
+        self.new_prices = []  # (product_id, new price), for the alerts once committed
+
+    @property
+    def full(self):
+        return len(self.updates) >= self.commit_every
+
+    def add(self, product, scraped_info, flush=True):
+        """
+        Queue the scraped availability and price of a product, writing the queue once it
+        holds commit_every products (with flush=False, the caller checks `full` and flushes,
+        e.g. off the event loop). Returns False when nothing usable was scraped.
+        """
+        # If scraping failed or returned no data, skip update
+        if not scraped_info:
+            print(f"[WARN] No data scraped for Product ID {product.product_id}, skipping update.")
+            return False
+
+        new_availability = scraped_info.get("availability", None)
+        new_price_str = scraped_info.get("price", "N/A")
+
+        # If availability is None, skip update
+        if new_availability is None:
+            print(f"[WARN] availability=None for Product ID {product.product_id}, skipping update.")
+            return False
+
+        # Attempt to convert price to float
+        new_price = None
+        if new_price_str != "N/A":
+            try:
+                new_price = float(new_price_str)
+            except ValueError:
+                print(f"[WARN] Unable to parse price for Product ID {product.product_id}, "
+                      f"skipping price update.")
+                new_price = None
+
+        now = datetime.now(timezone.utc)
+        old_price = product.price
+        row = {"product_id": product.product_id, "availability": new_availability, "last_checked": now}
+        last_updated = product.last_updated
+
+        if new_price is not None and (old_price is None or abs(old_price - new_price) > 1e-6):
+            old_price_str = f"{old_price:.2f}" if old_price is not None else "N/A"
+            price_message = f"old price: {old_price_str}, new price: {new_price:.2f}"
+            row["price"] = new_price
+            row["last_updated"] = last_updated = now
+            self.price_histories.append({
+                "product_id": product.product_id,
+                "old_price": old_price if old_price is not None else 0.0,
+                "new_price": new_price,
+                "change_date": now,
+            })
+            self.new_prices.append((product.product_id, new_price))
+        else:
+            if new_availability:
+                row["last_updated"] = last_updated = now
+            price_message = "price not change" if new_price is not None else "price not change (scraped price is None)"
+        self.updates.append(row)
+
+        print(
+            f"[Availability: {new_availability}] "
+            f"[Product ID: {product.product_id}] "
+            f"[{price_message}] "
+            f"[Last Updated: {last_updated}] "
+            f"[Link: {product.link}]"
+        )
+
+        if flush and self.full:
+            self.flush()
+        return True
+
+    @stage_timer.timed("persist")
+    def flush(self, checkpoint=None):
+        """
+        Write the queued updates with a single commit, then evaluate the alerts of the
+        products with a new price. checkpoint=(name, last_product_id) is saved in the
+        same transaction. Returns the number of products written.
+        """
+        if not self.updates and checkpoint is None:
+            return 0
+        updates, price_histories, new_prices = self.updates, self.price_histories, self.new_prices
+        self.updates, self.price_histories, self.new_prices = [], [], []
+
+        with Session(engine) as db:
+            # Rows are grouped by their set of columns, one executemany per group
+            if updates:
+                db.execute(update(Product), updates)
+            history_ids = insert_price_histories(db, price_histories)
+            if checkpoint is not None:
+                save_checkpoint(db, *checkpoint)
+            db.commit()
+
+            # Only the alerts of the products with a new price can be affected
+            for (product_id, price), history_id in zip(new_prices, history_ids):
+                evaluate_product_alerts(db, product_id, price, history_id=history_id)
+        return len(updates)
@@ -0,0 +1,134 @@
+# backend/scraper/browser_profile.py
+"""
+Lean browser profile: the scrapers only read text and attributes, so Chrome is
+started with images disabled and pageLoadStrategy=eager, and images, media,
+fonts and third-party trackers are blocked with CDP Network.setBlockedURLs.
+Blocking is applied per store when a scraper gets a driver (pooled drivers are
+shared by all stores), minus the store's allowlist for sites that break
+without some of these resources.
+"""
+import os
+import logging
+import threading
+from collections import defaultdict
+
+from selenium.common.exceptions import WebDriverException
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LEAN_BROWSER_ENABLED = os.getenv("LEAN_BROWSER_ENABLED", "true").lower() == "true"
+
+BLOCKED_RESOURCE_PATTERNS = [
+    # Images
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    # Media
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    # Fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+
+BLOCKED_THIRD_PARTY_HOSTS = [
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*adservice.google.*",
+    "*connect.facebook.net*",
+    "*analytics.tiktok.com*",
+    "*sc-static.net*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+    "*criteo.*",
+    "*bing.com/bat*",
+]
+
+# Patterns a store needs to render its pages, e.g. {"Jarir": ["*.svg"]}.
+# Extended with LEAN_BROWSER_ALLOW_<STORE>="pattern,pattern".
+STORE_ALLOWLISTS = {}
+
+# Bytes transferred by the page and its resources (cross-origin resources only
+# report a size when they send Timing-Allow-Origin) and navigation timings
+PAGE_METRICS_SCRIPT = """
+const navigation = performance.getEntriesByType("navigation")[0];
+const resources = performance.getEntriesByType("resource");
+return {
+    bytes: (navigation ? navigation.transferSize : 0)
+        + resources.reduce((total, entry) => total + (entry.transferSize || 0), 0),
+    resources: resources.length,
+    dom_content_loaded_ms: navigation ? navigation.domContentLoadedEventEnd : null,
+    load_ms: navigation && navigation.loadEventEnd ? navigation.loadEventEnd : null,
+};
+"""
+
+
+def apply_lean_options(options):
+    """Chrome options of the lean profile (the blocked URLs are per store, see apply_blocking)."""
+    options.page_load_strategy = "eager"  # Return at DOMContentLoaded; the scrapers wait for their elements
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+
+def store_allowlist(store_name):
+    allowed = list(STORE_ALLOWLISTS.get(store_name, []))
+    env_value = os.getenv(f"LEAN_BROWSER_ALLOW_{store_name.upper()}", "")
+    allowed += [pattern.strip() for pattern in env_value.split(",") if pattern.strip()]
+    return allowed
+
+
+def blocked_urls_for(store_name):
+    allowed = set(store_allowlist(store_name))
+    return [pattern for pattern in BLOCKED_RESOURCE_PATTERNS + BLOCKED_THIRD_PARTY_HOSTS if pattern not in allowed]
+
+
+def apply_blocking(driver, store_name):
+    """Block the lean profile's resources for store_name on driver (replaces the previous store's list)."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls_for(store_name)})
+    except (AttributeError, WebDriverException) as e:
+        # Not a Chromium driver, or the command is unsupported: pages still load, just heavier
+        logger.info(f"Could not block resources for {store_name}: {e!r}")
+
+
+class PageLoadStats:
+    """Per-store totals of the pages loaded in Chrome: bytes transferred and load times."""
+
+    def __init__(self):
+        self._pages = defaultdict(int)
+        self._bytes = defaultdict(int)
+        self._load_ms = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def record(self, store_name, metrics):
+        with self._lock:
+            self._pages[store_name] += 1
+            self._bytes[store_name] += metrics.get("bytes") or 0
+            self._load_ms[store_name] += metrics.get("load_ms") or metrics.get("dom_content_loaded_ms") or 0
+
+    def record_page(self, driver, store_name):
+        """Read the performance entries of the page currently loaded in driver."""
+        try:
+            metrics = driver.execute_script(PAGE_METRICS_SCRIPT)
+        except WebDriverException:
+            return
+        if isinstance(metrics, dict):
+            self.record(store_name, metrics)
+
+    def summary(self):
+        """{store_name: (pages, average KB per page, average load ms)}"""
+        with self._lock:
+            return {
+                store_name: (
+                    pages,
+                    self._bytes[store_name] / pages / 1024,
+                    self._load_ms[store_name] / pages,
+                )
+                for store_name, pages in self._pages.items()
+            }
+
+
+# Shared by every scraper of the process
+page_load_stats = PageLoadStats()
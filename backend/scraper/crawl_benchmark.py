@@ -0,0 +1,141 @@
+# backend/scraper/crawl_benchmark.py
+"""
+End-to-end crawl benchmark against the local store simulator (store_simulator.py):
+ScraperManager.scrape_all_products followed by AvailabilityChecker.update_availability,
+on a throwaway SQLite database.
+
+Reports products/minute, DB writes/sec and how the time splits between fetch,
+parse, classify and persist (see stage_timer.py):
+
+    python -m scraper.crawl_benchmark --search_values 20 --latency_ms 80
+    python -m scraper.crawl_benchmark --stores amazon jarir extra --workers_per_store 2
+
+Jarir and Extra are crawled in Chrome, so only Amazon (plain HTTP) runs by default.
+DB_URL and the <STORE>_BASE_URL variables are set here, before the models and
+scrapers are imported, so the benchmark never touches the configured database or stores.
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+STORE_NAMES = {"amazon": "Amazon", "jarir": "Jarir", "extra": "Extra"}
+DEFAULT_SEARCH_VALUES = Path(__file__).resolve().parent / "search_values.json"
+
+
+class WriteCounter:
+    """Counts the INSERT / UPDATE / DELETE statements (and their rows) run on an engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.statements = 0
+        self.rows = 0
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            self.statements += 1
+            self.rows += max(cursor.rowcount, 1)
+
+
+def run_benchmark(simulator, stores, search_values, model_file, workers_per_store=None, check_availability=True,
+                  crawls=1, adaptive_recrawl=False):
+    """
+    Crawl `search_values` on the simulator's `stores` (keys of STORE_NAMES) `crawls` times and return
+    {phase: {"seconds", "products", "writes", "stages"}} for the "scrape" (or "scrape 1", "scrape 2", ...)
+    and "availability" phases.
+    """
+    for store_key in STORE_NAMES:
+        os.environ[f"{store_key.upper()}_BASE_URL"] = simulator.base_url(store_key)
+    workdir = tempfile.mkdtemp(prefix="crawl_benchmark_")
+    os.environ["DB_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+
+    from models import Base, engine
+    from scraper.stage_timer import stage_timer
+    from scraper.scraper_manager import ScraperManager
+    from scraper.availability_checker import AvailabilityChecker
+
+    if not str(engine.url).startswith(os.environ["DB_URL"]):
+        raise RuntimeError(f"models was imported before the benchmark set DB_URL ({engine.url}).")
+    Base.metadata.create_all(bind=engine)
+    writes = WriteCounter(engine)
+
+    search_values_file = os.path.join(workdir, "search_values.json")
+    with open(search_values_file, "w") as f:
+        json.dump({"search_values": search_values}, f)
+
+    manager = ScraperManager(search_values_file, model_file, adaptive_recrawl=adaptive_recrawl)
+    manager.scrapers = [scraper for scraper in manager.scrapers
+                        if scraper.store_name in {STORE_NAMES[store_key] for store_key in stores}]
+
+    def phase(run):
+        stage_timer.reset()
+        statements_before = writes.statements
+        start = time.perf_counter()
+        products = run()
+        return {
+            "seconds": time.perf_counter() - start,
+            "products": products,
+            "writes": writes.statements - statements_before,
+            "stages": stage_timer.summary(),
+        }
+
+    results = {}
+    for crawl in range(1, crawls + 1):
+        name = f"scrape {crawl}" if crawls > 1 else "scrape"
+        if workers_per_store:
+            results[name] = phase(lambda: manager.scrape_all_products_concurrently(workers_per_store))
+        else:
+            results[name] = phase(manager.scrape_all_products)
+    if check_availability:
+        results["availability"] = phase(AvailabilityChecker().update_availability)
+    return results
+
+
+def print_report(results):
+    for name, result in results.items():
+        seconds = result["seconds"]
+        print(f"\n{name}: {result['products']} products in {seconds:.1f} s, "
+              f"{result['products'] / seconds * 60:.0f} products/minute, "
+              f"{result['writes']} DB writes ({result['writes'] / seconds:.1f}/s)")
+        # Stage times are summed over threads and tasks, so they can add up to more than the wall time
+        total = sum(stage_seconds for _, stage_seconds in result["stages"].values()) or 1
+        for stage, (calls, stage_seconds) in sorted(result["stages"].items(), key=lambda item: -item[1][1]):
+            print(f"  {stage:9} {stage_seconds:8.2f} s {stage_seconds / total:6.1%} ({calls} calls)")
+
+
+if __name__ == "__main__":
+    from scraper.store_simulator import StoreSimulator
+
+    parser = argparse.ArgumentParser(description="Benchmark the crawl end to end against simulated stores.")
+    parser.add_argument("--stores", nargs="+", choices=sorted(STORE_NAMES), default=["amazon"])
+    parser.add_argument("--search_values", type=int, default=10, help="Search values taken from search_values.json.")
+    parser.add_argument("--model_file", default="ai_modules/classification_model.pkl")
+    parser.add_argument("--workers_per_store", type=int, default=None,
+                        help="Scrape with scrape_all_products_concurrently (default: sequential).")
+    parser.add_argument("--crawls", type=int, default=1, help="Crawls in a row (later ones mostly see known products).")
+    parser.add_argument("--adaptive_recrawl", action="store_true",
+                        help="Only crawl due search values (back-to-back crawls then skip most of them).")
+    parser.add_argument("--skip_availability", action="store_true")
+    parser.add_argument("--latency_ms", type=float, default=50)
+    parser.add_argument("--jitter_ms", type=float, default=20)
+    parser.add_argument("--failure_rate", type=float, default=0.0)
+    parser.add_argument("--products_per_page", type=int, default=24)
+    parser.add_argument("--pages_per_search", type=int, default=3)
+    parser.add_argument("--price_change_rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(DEFAULT_SEARCH_VALUES) as f:
+        values = json.load(f)["search_values"][:args.search_values]
+
+    with StoreSimulator(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, failure_rate=args.failure_rate,
+                        products_per_page=args.products_per_page, pages_per_search=args.pages_per_search,
+                        price_change_rate=args.price_change_rate) as store_simulator:
+        report = run_benchmark(store_simulator, args.stores, values, args.model_file,
+                               args.workers_per_store, not args.skip_availability, args.crawls,
+                               args.adaptive_recrawl)
+        print_report(report)
+        print(f"\nSimulator requests: {dict(store_simulator.requests)}, 503s: {dict(store_simulator.failures)}")
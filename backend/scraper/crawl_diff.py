@@ -0,0 +1,117 @@
+# backend/scraper/crawl_diff.py
+"""
+Per-crawl diff of scraped products against what is already stored, so that the
+writer only receives new or changed products, and each product at most once per
+crawl (the same product is often found through several search values).
+
+Products are identified by store and title, like the uq_products_title_store
+index; their fingerprint hashes price, link, image, title and search value (the
+columns the writer updates, so a product found through another search value
+still gets it written). Both are kept as
+64-bit integers, seeded from the database when the crawl starts. The fingerprint
+of a product to store only replaces the known one once its batch is committed
+(commit_seen); a failed batch is forgotten (forget), so its products are tried
+again when they are found again. The diff also
+counts, per search value, the products found, new and with a new price (see
+search_term_scheduler.py).
+"""
+import hashlib
+from collections import defaultdict, Counter
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Store, Product
+from scraper.product_writer import parse_price
+
+
+def digest(*parts, size=8):
+    return int.from_bytes(hashlib.blake2b("\x1f".join(map(str, parts)).encode("utf-8"), digest_size=size).digest(), "big")
+
+
+def product_key(store_name, title):
+    return digest(store_name, title)
+
+
+def fingerprint(price, link, image_url, title, search_value):
+    # The price has the upper 32 bits to itself, so price changes can be told apart
+    return digest(price, size=4) << 32 | digest(link, image_url, title, search_value, size=4)
+
+
+def price_changed(previous, current):
+    return previous >> 32 != current >> 32
+
+
+class CrawlDiff:
+    def __init__(self):
+        self.fingerprints = {}
+        self._seen = set()
+        self._pending = {}  # {key: fingerprint} of the products handed to the writer, not yet committed
+        self.new = self.changed = self.unchanged = self.duplicates = 0
+        # {search_value: Counter(found=, new=, price_changed=)}
+        self.search_terms = defaultdict(Counter)
+
+    @classmethod
+    def from_database(cls, db: Session):
+        """A diff knowing every stored product."""
+        crawl_diff = cls()
+        rows = db.execute(
+            select(Store.store_name, Product.title, Product.price, Product.link, Product.image_url,
+                   Product.search_value)
+            .join(Store, Product.store_id == Store.store_id)
+            .execution_options(yield_per=10000)
+        )
+        for store_name, title, price, link, image_url, search_value in rows:
+            crawl_diff.fingerprints[product_key(store_name, title)] = fingerprint(
+                price, link, image_url, title, search_value
+            )
+        return crawl_diff
+
+    def should_store(self, data):
+        """
+        Whether a scraped product (store_to_database dict) is new or changed, and not
+        already seen in this crawl. The fingerprint of a product to store is only
+        remembered by commit_seen.
+        """
+        term = self.search_terms[data["search_value"]]
+        term["found"] += 1
+
+        key = product_key(data["store"], data["title"])
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(key)
+
+        current = fingerprint(parse_price(data["price"]), data["link"], data["image_url"], data["title"],
+                              data["search_value"])
+        previous = self.fingerprints.get(key)
+        if previous == current:
+            self.unchanged += 1
+            return False
+        if previous is None:
+            self.new += 1
+            term["new"] += 1
+        else:
+            self.changed += 1
+            if price_changed(previous, current):
+                term["price_changed"] += 1
+        self._pending[key] = current
+        return True
+
+    def commit_seen(self, batch):
+        """Remember the fingerprints of products whose write was committed."""
+        for data in batch:
+            key = product_key(data["store"], data["title"])
+            if key in self._pending:
+                self.fingerprints[key] = self._pending.pop(key)
+
+    def forget(self, batch):
+        """Products whose write failed: stored again when they are found again in this crawl."""
+        for data in batch:
+            key = product_key(data["store"], data["title"])
+            self._pending.pop(key, None)
+            self._seen.discard(key)
+
+    def summary(self):
+        return (f"{self.new} new, {self.changed} changed, {self.unchanged} unchanged, "
+                f"{self.duplicates} duplicates skipped")
@@ -0,0 +1,260 @@
+# backend/scraper/driver_pool.py
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+import psutil
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from dotenv import load_dotenv
+
+from scraper.browser_profile import LEAN_BROWSER_ENABLED, apply_lean_options
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "6"))
+DRIVER_MAX_PAGES = int(os.getenv("DRIVER_MAX_PAGES", "200"))
+DRIVER_MAX_MEMORY_MB = int(os.getenv("DRIVER_MAX_MEMORY_MB", "1024"))
+DRIVER_IDLE_SECONDS = int(os.getenv("DRIVER_IDLE_SECONDS", "300"))
+DRIVER_LEASE_TIMEOUT_SECONDS = int(os.getenv("DRIVER_LEASE_TIMEOUT_SECONDS", "600"))
+
+
+def create_driver(lean=LEAN_BROWSER_ENABLED):
+    """Start a headless Chrome configured for scraping (see browser_profile.py for the lean profile)."""
+    options = webdriver.ChromeOptions()
+    # Basic optimizations
+    options.add_argument("--headless")  # Run without GUI
+    options.add_argument("--disable-gpu")  # Disable GPU for headless mode
+    options.add_argument("--no-sandbox")  # Required for Docker containers
+    options.add_argument("--disable-dev-shm-usage")  # Use /tmp for shared memory
+
+    # Lower memory and CPU consumption
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-infobars")
+    options.add_argument("--disable-browser-side-navigation")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-popup-blocking")
+
+    # Use a custom user-agent to avoid detection
+    options.add_argument(
+        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36"
+    )
+    if lean:
+        apply_lean_options(options)
+    return webdriver.Chrome(options=options)
+
+
+def driver_process_tree(driver):
+    """The chromedriver process of a driver plus every Chrome process it started."""
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        return [process] + process.children(recursive=True)
+    except (AttributeError, psutil.Error):
+        return []
+
+
+def driver_memory_mb(driver):
+    """Resident memory of chromedriver and its Chrome processes, in MB."""
+    total = 0
+    for process in driver_process_tree(driver):
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+def kill_processes(processes):
+    for process in processes:
+        try:
+            process.kill()
+        except psutil.Error:
+            pass
+    psutil.wait_procs(processes, timeout=5)
+
+
+def kill_orphaned_drivers():
+    """
+    Kill chromedriver / Chrome processes left behind by crashed or un-quit drivers:
+      - chromedriver re-parented to init (its Python process died)
+      - automation Chrome re-parented to init or to this process (its chromedriver died;
+        in a container this process may be PID 1 and adopt them)
+    Chrome started by a live chromedriver is never a direct child of either, so it is kept.
+    Returns the number of processes killed.
+    """
+    adopters = {1, os.getpid()}
+    orphans = []
+    for process in psutil.process_iter(["pid", "ppid", "name", "cmdline"]):
+        name = (process.info["name"] or "").lower()
+        ppid = process.info["ppid"]
+        if name.startswith("chromedriver"):
+            if ppid == 1 and os.getpid() != 1:
+                orphans.append(process)
+        elif name.startswith(("chrome", "google-chrome")):
+            if ppid in adopters and "--enable-automation" in (process.info["cmdline"] or []):
+                orphans.append(process)
+
+    to_kill = []
+    for process in orphans:
+        try:
+            to_kill += [process] + process.children(recursive=True)
+        except psutil.Error:
+            pass
+    kill_processes(to_kill)
+    if to_kill:
+        logger.warning(f"Killed {len(to_kill)} orphaned chromedriver/Chrome process(es).")
+    return len(to_kill)
+
+
+class DriverPoolExhausted(Exception):
+    """No driver became available within the lease timeout."""
+
+
+class PooledDriver:
+    """A Chrome instance owned by the pool, with the usage used to decide when to recycle it."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+        self.released_at = self.created_at
+
+
+class DriverPool:
+    """
+    Pool of warm Chrome instances shared by the scrapers of a process.
+
+    - acquire() hands out an idle driver after a health check (a trivial script
+      must run), or starts a new one while fewer than `size` drivers exist;
+      otherwise it waits for a release.
+    - release() returns the driver to the pool, unless it loaded `max_pages`
+      pages or uses more than `max_memory_mb`; then it is killed (with its whole
+      process tree) and replaced lazily on the next acquire.
+    - Drivers idle for more than `idle_seconds` are closed, and orphaned
+      chromedriver/Chrome processes are killed when the pool first starts a
+      driver and when it closes.
+    """
+
+    def __init__(self, size=DRIVER_POOL_SIZE, max_pages=DRIVER_MAX_PAGES, max_memory_mb=DRIVER_MAX_MEMORY_MB,
+                 idle_seconds=DRIVER_IDLE_SECONDS, lease_timeout=DRIVER_LEASE_TIMEOUT_SECONDS, factory=create_driver):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.idle_seconds = idle_seconds
+        self.lease_timeout = lease_timeout
+        self.factory = factory
+        self._idle = []
+        self._leased = 0
+        self._condition = threading.Condition()
+        self._orphans_checked = False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.lease_timeout
+        while True:
+            with self._condition:
+                while not self._idle and self._leased >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DriverPoolExhausted(f"No WebDriver available after {self.lease_timeout} seconds")
+                    self._condition.wait(remaining)
+                self._leased += 1
+                pooled = self._idle.pop() if self._idle else None
+                check_orphans = not self._orphans_checked
+                self._orphans_checked = True
+
+            # Health checks and Chrome startup run outside the lock
+            if pooled is not None:
+                if self._is_healthy(pooled):
+                    return pooled
+                self._discard(pooled, "failed health check")
+                self._return_slot()
+                continue
+
+            try:
+                if check_orphans:
+                    kill_orphaned_drivers()
+                return PooledDriver(self.factory())
+            except Exception:
+                self._return_slot()
+                raise
+
+    def release(self, pooled):
+        reason = None
+        if pooled.pages >= self.max_pages:
+            reason = f"loaded {pooled.pages} pages"
+        else:
+            memory_mb = driver_memory_mb(pooled.driver)
+            if memory_mb > self.max_memory_mb:
+                reason = f"uses {memory_mb:.0f} MB"
+
+        with self._condition:
+            self._leased -= 1
+            if reason is None:
+                pooled.released_at = time.monotonic()
+                self._idle.append(pooled)
+            stale = self._take_stale_idle()
+            self._condition.notify()
+
+        if reason:
+            self._discard(pooled, reason)
+        for idle in stale:
+            self._discard(idle, "idle")
+
+    @contextmanager
+    def lease(self):
+        pooled = self.acquire()
+        try:
+            yield pooled
+        finally:
+            self.release(pooled)
+
+    def close_idle(self):
+        """Close every idle driver (e.g. at the end of a crawl)."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._discard(pooled, "pool closed")
+
+    def close(self):
+        self.close_idle()
+        kill_orphaned_drivers()
+
+    # -------------------------------
+    # Internals
+    # -------------------------------
+    @staticmethod
+    def _is_healthy(pooled):
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except WebDriverException:
+            return False
+
+    def _take_stale_idle(self):
+        now = time.monotonic()
+        stale = [p for p in self._idle if now - p.released_at > self.idle_seconds]
+        self._idle = [p for p in self._idle if p not in stale]
+        return stale
+
+    def _return_slot(self):
+        with self._condition:
+            self._leased -= 1
+            self._condition.notify()
+
+    @staticmethod
+    def _discard(pooled, reason):
+        logger.info(f"Recycling WebDriver ({reason}).")
+        processes = driver_process_tree(pooled.driver)
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+        # quit() can leave Chrome behind when the driver hung or crashed
+        kill_processes([p for p in processes if p.is_running()])
+
+
+# Shared by every scraper of the process
+driver_pool = DriverPool()
@@ -0,0 +1,71 @@
+# backend/scraper/extraction_check.py
+"""
+Check the in-browser extraction scripts against the BeautifulSoup parsers on recorded pages.
+
+Each page is opened in Chrome and read both ways: page_source parsed with
+BeautifulSoup (parse_search_page, parse_availability, parse_arabic_title) and the
+store's execute_script extraction (search_page_in_browser, availability_in_browser,
+arabic_title_in_browser). See recorded_pages.py for the page names.
+
+    python -m scraper.extraction_check [path/to/recorded_pages]
+
+Exits with 1 when any page gives different results.
+"""
+import sys
+import time
+import argparse
+
+from scraper.recorded_pages import PAGES_DIR, recorded_pages, page_parsers
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def check_page(scraper, page):
+    """
+    Load the page in the scraper's driver and compare both extractions;
+    returns [(name, matches, soup result, browser result, soup ms, browser ms)].
+    """
+    scraper.load_page(page.path.resolve().as_uri())
+    results = []
+    for name, (parse, extract_in_browser) in page_parsers(scraper, page.page_type).items():
+        # Timings include the transfer over the WebDriver wire, which is what the scripts save
+        soup_result, soup_ms = timed(lambda: parse(scraper.driver.page_source))
+        browser_result, browser_ms = timed(extract_in_browser)
+        results.append((name, soup_result == browser_result, soup_result, browser_result, soup_ms, browser_ms))
+    return results
+
+
+def check_pages(pages_dir=PAGES_DIR):
+    scrapers = {}
+    mismatches = 0
+    try:
+        for page in recorded_pages(pages_dir):
+            if page.store_key not in scrapers:
+                scrapers[page.store_key] = page.scraper()
+
+            for name, matches, soup_result, browser_result, soup_ms, browser_ms in check_page(
+                    scrapers[page.store_key], page):
+                status = "OK" if matches else "MISMATCH"
+                print(f"[{status}] {page.path.name} ({name}): BeautifulSoup {soup_ms:.1f} ms, "
+                      f"in browser {browser_ms:.1f} ms")
+                if not matches:
+                    mismatches += 1
+                    print(f"  BeautifulSoup: {soup_result}")
+                    print(f"  In browser:    {browser_result}")
+    finally:
+        for scraper in scrapers.values():
+            scraper.quit_driver()
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare in-browser extraction with the BeautifulSoup parsers.")
+    parser.add_argument("pages_dir", nargs="?", default=str(PAGES_DIR),
+                        help="Directory of recorded <store>_<search|product>_<name>.html pages")
+    args = parser.parse_args()
+
+    sys.exit(1 if check_pages(args.pages_dir) else 0)
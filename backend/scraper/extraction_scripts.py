@@ -0,0 +1,104 @@
+# backend/scraper/extraction_scripts.py
+"""
+JavaScript run in the browser with driver.execute_script to read product
+fields straight from the DOM. They return the same raw fields as the
+BeautifulSoup extractors in scraper.py (same selectors, same text rules),
+so both go through the same build_* methods; only a small JSON payload
+crosses the WebDriver wire instead of the whole page_source.
+Check them against the BeautifulSoup path with scraper/extraction_check.py.
+"""
+
+# text(el, sep) mirrors BeautifulSoup's el.get_text(sep, strip=True)
+HELPERS = """
+const text = (el, sep = "") => {
+    if (!el) return null;
+    const parts = [];
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode()) {
+        const value = walker.currentNode.nodeValue.trim();
+        if (value) parts.push(value);
+    }
+    return parts.join(sep);
+};
+const attr = (el, name) => (el ? el.getAttribute(name) : null);
+"""
+
+# arguments[0]: number of tiles already read, so each scroll only returns the new ones
+JARIR_TILES = HELPERS + """
+const tiles = Array.from(document.querySelectorAll("div.product-tile__item--spacer")).slice(arguments[0] || 0);
+return tiles.map(tile => ({
+    title: text(tile.querySelector("p.product-title__title")),
+    href: attr(tile.querySelector("a.product-tile__link"), "href"),
+    price: text(tile.querySelector("div.price")),
+    info: text(tile.querySelector("p.product-title__info"), " | "),
+    image: attr(tile.querySelector("img.image--contain[loading='eager']"), "src"),
+}));
+"""
+
+AMAZON_SEARCH_PAGE = HELPERS + """
+const tiles = [];
+for (const item of document.querySelectorAll("div.s-result-item[data-component-type='s-search-result']")) {
+    const anchor = item.querySelector("a.a-link-normal.s-line-clamp-4.s-link-style.a-text-normal");
+    if (!anchor) continue;
+    const heading = anchor.querySelector("h2.a-size-base-plus.a-spacing-none.a-color-base.a-text-normal");
+    tiles.push({
+        title: text(heading || anchor),
+        href: attr(anchor, "href"),
+        price: text(item.querySelector("span.a-price span.a-offscreen")),
+        image: attr(item.querySelector("img.s-image"), "src"),
+    });
+}
+return {
+    has_results: document.querySelector("div.s-main-slot") !== null,
+    tiles: tiles,
+    has_next_page: document.querySelector("a.s-pagination-next") !== null,
+};
+"""
+
+EXTRA_TILES = HELPERS + """
+return Array.from(document.querySelectorAll("section.product-tile-wrapper")).map(tile => ({
+    title: text(tile.querySelector("span.product-name-data")),
+    href: attr(tile.querySelector("a.product-tile-content-wrapper"), "href"),
+    price: text(tile.querySelector("section.price strong")),
+    info: Array.from(tile.querySelectorAll("ul.product-stats li")).map(li => text(li)),
+    image: attr(tile.querySelector("picture img"), "src"),
+}));
+"""
+
+AMAZON_AVAILABILITY = HELPERS + """
+return {
+    has_title: document.querySelector("#productTitle") !== null,
+    not_found: document.querySelector('a[href*="/ref=cs_404_"], a[href*="/dogsofamazon"]') !== null,
+    add_to_cart: document.querySelector("#add-to-cart-button") !== null,
+    availability_text: text(document.querySelector("#availability")
+        || document.querySelector("#availabilityInsideBuyBox_feature_div")),
+    apex_price: text(document.querySelector("span.a-price.a-text-price.a-size-medium.apexPriceToPay span.a-offscreen")),
+    price_whole: text(document.querySelector("span.a-price-whole")),
+    price_fraction: text(document.querySelector("span.a-price-fraction")),
+    fallback_price: text(document.querySelector("div.a-section.aok-relative span.aok-offscreen")
+        || document.querySelector("#price_inside_buybox")),
+};
+"""
+
+JARIR_AVAILABILITY = HELPERS + """
+return {
+    has_title: document.querySelector("h2.product-title__title") !== null,
+    notify_me: document.querySelector("button.button--primary.button--fluid.button--secondary") !== null,
+    add_to_cart: document.querySelector("button.button--add-to-cart.button--primary.button--fluid") !== null,
+    price: text(document.querySelector("div.price-box__row div.price span.price__currency + span")),
+};
+"""
+
+EXTRA_AVAILABILITY = HELPERS + """
+return {
+    has_title: document.querySelector("h1.product-name") !== null,
+    status: text(document.querySelector("div.product-status-text.svelte-agjy")),
+    price: text(document.querySelector("section.price span.price strong")),
+};
+"""
+
+# arguments[0]: CSS selector of the title element
+ELEMENT_TEXT = """
+const element = document.querySelector(arguments[0]);
+return element ? element.textContent : null;
+"""
@@ -0,0 +1,128 @@
+# backend/scraper/http_fetcher.py
+import os
+import logging
+import threading
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+from scraper.stage_timer import stage_timer
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "4"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "15"))
+HTTP_FIRST_ENABLED = os.getenv("HTTP_FIRST_ENABLED", "true").lower() == "true"
+
+# Statuses whose HTML goes to the parsers: the page itself, or the store's "page not found"
+# page, which tells a delisted product apart from a failed request
+PAGE_STATUSES = {200, 404, 410}
+
+# Same identity as the Chrome driver, so both paths get the same markup
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9,ar;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+
+class FetchStats:
+    """
+    Per-store counts of HTTP attempts that produced a usable page.
+    When a store keeps failing over plain HTTP (JS-rendered pages, bot walls),
+    only every `probe_every`-th page is still tried over HTTP.
+    """
+
+    def __init__(self, min_attempts=20, min_ratio=0.2, probe_every=20):
+        self.min_attempts = min_attempts
+        self.min_ratio = min_ratio
+        self.probe_every = probe_every
+        self._attempts = defaultdict(int)
+        self._successes = defaultdict(int)
+        self._skipped = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, store_name, success):
+        with self._lock:
+            self._attempts[store_name] += 1
+            if success:
+                self._successes[store_name] += 1
+
+    def success_ratio(self, store_name):
+        with self._lock:
+            attempts = self._attempts[store_name]
+            return self._successes[store_name] / attempts if attempts else None
+
+    def worth_trying(self, store_name):
+        with self._lock:
+            attempts = self._attempts[store_name]
+            if attempts < self.min_attempts or self._successes[store_name] / attempts >= self.min_ratio:
+                return True
+            self._skipped[store_name] += 1
+            return self._skipped[store_name] % self.probe_every == 0
+
+    def summary(self):
+        with self._lock:
+            return {
+                store_name: (self._successes[store_name], attempts)
+                for store_name, attempts in self._attempts.items()
+            }
+
+
+class HttpFetcher:
+    """
+    Plain HTTP client shared by the scrapers: one requests.Session with keep-alive,
+    gzip, at most `max_connections_per_host` connections per host (callers wait
+    for a free connection) and retries with backoff on 429/5xx.
+    """
+
+    def __init__(self, max_connections_per_host=HTTP_MAX_CONNECTIONS_PER_HOST, timeout=HTTP_TIMEOUT_SECONDS,
+                 retries=2):
+        self.timeout = timeout
+        self.stats = FetchStats()
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=10,  # Number of hosts kept
+            pool_maxsize=max_connections_per_host,
+            pool_block=True,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"],
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @stage_timer.timed("fetch")
+    def fetch(self, url):
+        """Return the HTML of url, or None when the request fails or is not an HTML page of PAGE_STATUSES."""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.info(f"HTTP fetch failed for {url}: {e}")
+            return None
+        content_type = response.headers.get("Content-Type", "text/html").lower()
+        if response.status_code not in PAGE_STATUSES or "html" not in content_type:
+            logger.info(f"HTTP fetch of {url} returned {response.status_code}.")
+            return None
+        if "charset" not in content_type:
+            # requests would fall back to ISO-8859-1 and garble Arabic titles
+            response.encoding = "utf-8"
+        return response.text
+
+    def close(self):
+        self.session.close()
+
+
+# Shared by every scraper of the process (None disables the HTTP-first path)
+http_fetcher = HttpFetcher() if HTTP_FIRST_ENABLED else None
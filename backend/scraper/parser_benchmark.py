@@ -0,0 +1,138 @@
+# backend/scraper/parser_benchmark.py
+"""
+Offline throughput benchmark of the extraction logic on the recorded page corpus
+(see recorded_pages.py): parse_search_page on search pages, parse_availability and
+parse_arabic_title on product pages, for every installed BeautifulSoup backend.
+
+Reports pages/sec and the peak memory allocated per page (tracemalloc), and exits
+with 1 when a result is worse than the baseline by more than --tolerance:
+
+    python -m scraper.parser_benchmark
+    python -m scraper.parser_benchmark --update_baseline   # after an intended change
+
+Baselines are machine-dependent: update them on the machine that runs the check.
+"""
+import gc
+import sys
+import json
+import time
+import argparse
+import importlib.util
+import tracemalloc
+from pathlib import Path
+
+from scraper.recorded_pages import PAGES_DIR, recorded_pages, page_parsers
+
+BASELINE_PATH = Path(__file__).resolve().parent / "fixtures" / "parser_baseline.json"
+
+# BeautifulSoup tree builders and the module each one needs
+BACKENDS = {"html.parser": None, "lxml": "lxml", "html5lib": "html5lib"}
+
+
+def installed_backends():
+    return [name for name, module in BACKENDS.items() if module is None or importlib.util.find_spec(module)]
+
+
+def parse_jobs(backend, pages_dir=PAGES_DIR):
+    """{operation: [(parse, html)]} over the corpus, with every scraper using backend."""
+    jobs = {}
+    for page in recorded_pages(pages_dir):
+        scraper = page.scraper()
+        scraper.html_parser = backend
+        html = page.read()
+        for operation, (parse, _) in page_parsers(scraper, page.page_type).items():
+            jobs.setdefault(operation, []).append((parse, html))
+    return jobs
+
+
+def measure(jobs, repeats):
+    """
+    Pages/sec of the fastest of `repeats` passes over the jobs (like timeit, the least
+    disturbed pass), and average peak KB allocated per page.
+    """
+    best = None
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        for parse, html in jobs:
+            parse(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak_total = 0
+    tracemalloc.start()
+    try:
+        for parse, html in jobs:
+            gc.collect()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            parse(html)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "pages_per_second": round(len(jobs) / best, 1),
+        "peak_kb_per_page": round(peak_total / len(jobs) / 1024, 1),
+    }
+
+
+def run_benchmark(backends=None, pages_dir=PAGES_DIR, repeats=5):
+    """{backend: {operation: {"pages_per_second": ..., "peak_kb_per_page": ...}}}"""
+    return {
+        backend: {
+            operation: measure(jobs, repeats)
+            for operation, jobs in sorted(parse_jobs(backend, pages_dir).items())
+        }
+        for backend in backends or installed_backends()
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """Descriptions of the results more than `tolerance` (a fraction) worse than the baseline."""
+    found = []
+    for backend, operations in results.items():
+        for operation, result in operations.items():
+            expected = baseline.get(backend, {}).get(operation)
+            if expected is None:
+                continue
+            if result["pages_per_second"] < expected["pages_per_second"] * (1 - tolerance):
+                found.append(f"{backend} {operation}: {result['pages_per_second']} pages/s "
+                             f"(baseline {expected['pages_per_second']})")
+            if result["peak_kb_per_page"] > expected["peak_kb_per_page"] * (1 + tolerance):
+                found.append(f"{backend} {operation}: {result['peak_kb_per_page']} KB/page "
+                             f"(baseline {expected['peak_kb_per_page']})")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the page parsers on the recorded page corpus.")
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=None,
+                        help="BeautifulSoup backends to run (default: every installed one).")
+    parser.add_argument("--pages_dir", default=str(PAGES_DIR))
+    parser.add_argument("--repeats", type=int, default=5, help="Timed passes over the corpus; the fastest counts.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown / extra memory (0.25 = 25%%).")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--update_baseline", action="store_true", help="Save the results as the new baseline.")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.backends, args.pages_dir, args.repeats)
+    for backend, operations in results.items():
+        for operation, result in operations.items():
+            print(f"{backend:12} {operation:13} {result['pages_per_second']:9.1f} pages/s "
+                  f"{result['peak_kb_per_page']:9.1f} KB/page")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline saved to {baseline_path}")
+        sys.exit(0)
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update_baseline to create it.")
+        sys.exit(0)
+    found = regressions(results, json.loads(baseline_path.read_text()), args.tolerance)
+    for regression in found:
+        print(f"[REGRESSION] {regression}")
+    sys.exit(1 if found else 0)
@@ -0,0 +1,72 @@
+# backend/scraper/product_classifier.py
+"""
+Category prediction for scraped products: one predict() call per batch (a search
+page) for the products not classified before, and a persistent cache table
+(classification_cache) so an unchanged product is never classified again.
+
+Cache keys hash the normalized title and search value with the fingerprint of the
+model file, so retraining the model invalidates the cache.
+"""
+import hashlib
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import ClassificationCache
+from scraper.stage_timer import stage_timer
+from scraper.product_writer import dialect_insert, chunks
+
+
+def model_fingerprint(model_bytes):
+    return hashlib.sha1(model_bytes).hexdigest()[:16]
+
+
+def normalize(text):
+    # The model's vectorizer lowercases and tokenizes, so case and spacing do not change its prediction
+    return " ".join((text or "").lower().split())
+
+
+class ProductClassifier:
+    def __init__(self, model, fingerprint):
+        """
+        :param model: Fitted classification pipeline, predicting a category_id from "<title> <search_value>".
+        :param fingerprint: Identifies the model in the cache keys (see model_fingerprint).
+        """
+        self.model = model
+        self.fingerprint = fingerprint
+
+    def cache_key(self, title, search_value):
+        return hashlib.sha1(
+            f"{self.fingerprint}\n{normalize(title)}\n{normalize(search_value)}".encode("utf-8")
+        ).hexdigest()
+
+    @stage_timer.timed("classify")
+    def classify(self, db: Session, products):
+        """
+        Category ids of [(title, search_value)], from the cache or else from a single
+        predict() call. New predictions are added to the cache (committed by the caller).
+        """
+        keys = [self.cache_key(title, search_value) for title, search_value in products]
+
+        categories = {}
+        for keys_chunk in chunks(list(set(keys))):
+            categories.update(db.execute(
+                select(ClassificationCache.title_hash, ClassificationCache.category_id)
+                .where(ClassificationCache.title_hash.in_(keys_chunk))
+            ).all())
+
+        missing = {}
+        for key, (title, search_value) in zip(keys, products):
+            if key not in categories:
+                missing[key] = f"{title} {search_value}"
+        if missing:
+            predictions = self.model.predict(list(missing.values()))
+            new_entries = [{"title_hash": key, "category_id": int(category_id)}
+                           for key, category_id in zip(missing, predictions)]
+            categories.update((entry["title_hash"], entry["category_id"]) for entry in new_entries)
+
+            insert = dialect_insert(db, ClassificationCache).on_conflict_do_nothing()
+            for entries_chunk in chunks(new_entries):
+                db.execute(insert, entries_chunk)
+
+        return [categories[key] for key in keys]
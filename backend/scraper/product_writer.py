@@ -0,0 +1,189 @@
+# backend/scraper/product_writer.py
+"""
+Batch writer of scraped products: a page of products costs one lookup of the
+existing rows, one INSERT ... ON CONFLICT (title, store_id) DO UPDATE, one bulk
+insert of the price history and a single commit, instead of two SELECTs and a
+COMMIT per product.
+
+The upsert relies on the uq_products_title_store unique index. SQLite uses its
+own ON CONFLICT DO UPDATE rather than INSERT OR REPLACE, which would delete and
+re-insert the row (new product_id, cascading deletes of its alerts and history).
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import Store, Product, ProductPriceHistory
+from alerting.evaluator import evaluate_product_alerts
+
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Rows per statement, well below SQLite's limit of bound parameters
+STATEMENT_ROWS = 500
+
+# Columns refreshed on products that already exist (the category and info of a product are kept)
+UPDATED_COLUMNS = ("price", "link", "image_url", "search_value", "last_updated")
+
+
+def parse_price(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def dialect_insert(db: Session, table):
+    """insert(table) of the session's dialect, which supports ON CONFLICT."""
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise RuntimeError(f"Bulk product upserts are not supported on {dialect}.")
+    return UPSERT_INSERTS[dialect](table)
+
+
+def insert_price_histories(db: Session, price_histories):
+    """Bulk insert of ProductPriceHistory rows; returns their history_id, in order."""
+    if not price_histories:
+        return []
+    return list(db.scalars(
+        insert(ProductPriceHistory).returning(ProductPriceHistory.history_id, sort_by_parameter_order=True),
+        price_histories,
+    ))
+
+
+def chunks(items, size=STATEMENT_ROWS):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class ProductWriter:
+    def __init__(self, classify):
+        """
+        :param classify: classify(db, [(title, search_value)]) -> [category_id], called once per batch
+                         with the new products only.
+        """
+        self.classify = classify
+        self._store_ids = {}
+
+    def store_id(self, db: Session, store_name):
+        """Id of a store, created on first use; cached for the writer's lifetime."""
+        if store_name not in self._store_ids:
+            store = db.query(Store).filter_by(store_name=store_name).first()
+            if not store:
+                store = Store(store_name=store_name)
+                db.add(store)
+                db.commit()
+            self._store_ids[store_name] = store.store_id
+        return self._store_ids[store_name]
+
+    @staticmethod
+    def existing_products(db: Session, keys):
+        """{(title, store_id): row} of the products already stored for the given keys."""
+        titles_by_store = {}
+        for title, store_id in keys:
+            titles_by_store.setdefault(store_id, []).append(title)
+
+        existing = {}
+        for store_id, titles in titles_by_store.items():
+            for titles_chunk in chunks(titles):
+                rows = db.execute(
+                    select(Product.product_id, Product.title, Product.store_id, Product.price, Product.link,
+                           Product.image_url, Product.search_value, Product.last_updated)
+                    .where(Product.store_id == store_id, Product.title.in_(titles_chunk))
+                    .order_by(Product.product_id)
+                )
+                for row in rows:
+                    existing.setdefault((row.title, row.store_id), row)
+        return existing
+
+    def upsert_statement(self, db: Session):
+        stmt = dialect_insert(db, Product)
+        return stmt.on_conflict_do_update(
+            index_elements=[Product.title, Product.store_id],
+            set_={column: stmt.excluded[column] for column in UPDATED_COLUMNS},
+        ).returning(Product.product_id, Product.title, Product.store_id)
+
+    def write(self, db: Session, batch):
+        """
+        Store a batch of scraped products (store_to_database dicts) with a single commit,
+        then evaluate the alerts of the products whose price changed. Returns the number
+        of products in the batch.
+        """
+        now = datetime.now(timezone.utc)
+
+        # The last occurrence of a product in the batch wins, as it would have row by row
+        products = {}
+        for data in batch:
+            products[(data["title"], self.store_id(db, data["store"]))] = data
+        existing = self.existing_products(db, products.keys())
+
+        rows, new_rows, price_histories, new_prices, messages = [], {}, [], [], {}
+        for key, data in products.items():
+            price = parse_price(data["price"])
+            current = existing.get(key)
+            if current is None:
+                info = data.get("info")
+                new_rows[key] = {
+                    "title": data["title"], "price": price, "info": None if info == "N/A" or not info else info,
+                    "search_value": data["search_value"], "link": data["link"], "image_url": data["image_url"],
+                    "availability": True, "store_id": key[1], "last_updated": now,
+                }
+                continue
+
+            changes = []
+            if current.price != price:
+                changes.append(f"Price updated from {current.price} to {price}")
+                price_histories.append({
+                    "product_id": current.product_id,
+                    "old_price": current.price if current.price is not None else 0.0,
+                    "new_price": price if price is not None else 0.0,
+                    "change_date": now,
+                })
+                new_prices.append((current.product_id, price))
+            if current.link != data["link"]:
+                changes.append("Link updated")
+            if current.image_url != data["image_url"]:
+                changes.append("Image URL updated")
+            if current.search_value != data["search_value"]:
+                changes.append(f"Search value updated to {data['search_value']}")
+            messages[key] = changes
+            if changes:
+                # Only a price change moves last_updated; columns outside UPDATED_COLUMNS are not updated
+                rows.append({
+                    "title": data["title"], "price": price, "info": None, "search_value": data["search_value"],
+                    "link": data["link"], "image_url": data["image_url"], "availability": True,
+                    "store_id": key[1], "category_id": None,
+                    "last_updated": now if current.price != price else current.last_updated,
+                })
+
+        # One classification call for all the new products of the batch
+        categories = dict(zip(new_rows, self.classify(
+            db, [(row["title"], row["search_value"]) for row in new_rows.values()]
+        ))) if new_rows else {}
+        for key, row in new_rows.items():
+            rows.append({**row, "category_id": categories[key]})
+
+        product_ids = {key: row.product_id for key, row in existing.items()}
+        for rows_chunk in chunks(rows):
+            for product_id, title, store_id in db.execute(self.upsert_statement(db), rows_chunk):
+                product_ids[(title, store_id)] = product_id
+        history_ids = insert_price_histories(db, price_histories)
+        db.commit()
+
+        # Only the alerts of the products with a new price can be affected
+        for (product_id, price), history_id in zip(new_prices, history_ids):
+            evaluate_product_alerts(db, product_id, price, history_id=history_id)
+
+        for key, data in products.items():
+            prefix = (f"[{data['search_value']}][{data.get('current_index')}/{data.get('total_values')}]"
+                      f"[{data['store']}][Product ID: {product_ids.get(key)}] {data['title']}")
+            if key in categories:
+                print(f"{prefix}: Added to database with category {categories[key]}.")
+            elif messages[key]:
+                print(prefix)
+                for message in messages[key]:
+                    print(f" - {message}")
+            else:
+                print(f"{prefix}: No changes.")
+        return len(batch)
@@ -0,0 +1,110 @@
+# backend/scraper/recorded_pages.py
+"""
+Corpus of recorded store pages used by the offline checks (extraction_check.py,
+parser_benchmark.py, test_fixture_pages.py), and a recorder for new pages.
+
+Pages live in scraper/fixtures/pages and are named
+<store>_<search|product>_<name>.html, with <name> ending in _en or _ar, e.g.
+jarir_search_en.html or extra_product_unavailable_en.html.
+
+Record a live page (rendered in Chrome, as the scrapers see it):
+
+    python -m scraper.recorded_pages extra product "https://www.extra.com/ar-sa/.../p/1000100" phone_ar
+"""
+import argparse
+from pathlib import Path
+
+from selenium.common.exceptions import TimeoutException
+
+from scraper.scraper import AmazonScraper, JarirScraper, ExtraScraper
+from scraper.waits import wait_for_element
+
+PAGES_DIR = Path(__file__).resolve().parent / "fixtures" / "pages"
+
+SCRAPERS = {
+    "amazon": AmazonScraper,
+    "jarir": JarirScraper,
+    "extra": ExtraScraper,
+}
+
+PAGE_TYPES = ("search", "product")
+
+# Element that shows a search page is rendered
+SEARCH_READY_SELECTORS = {
+    "amazon": "div.s-main-slot",
+    "jarir": JarirScraper.TILE_SELECTOR,
+    "extra": "section.product-tile-wrapper",
+}
+
+
+class RecordedPage:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.store_key, _, rest = self.path.stem.partition("_")
+        self.page_type = rest.split("_")[0]
+        self.language = "ar" if self.path.stem.endswith("_ar") else "en"
+
+    @property
+    def valid(self):
+        return self.store_key in SCRAPERS and self.page_type in PAGE_TYPES
+
+    def scraper(self):
+        """A scraper of the page's store that never touches the network."""
+        return SCRAPERS[self.store_key](self.store_key.capitalize(), driver_pool=None, fetcher=None)
+
+    def read(self):
+        return self.path.read_text(encoding="utf-8")
+
+    def __repr__(self):
+        return f"RecordedPage({self.path.name!r})"
+
+
+def recorded_pages(pages_dir=PAGES_DIR):
+    """The valid recorded pages of pages_dir, sorted by name."""
+    pages = [RecordedPage(path) for path in sorted(Path(pages_dir).glob("*.html"))]
+    return [page for page in pages if page.valid]
+
+
+def page_parsers(scraper, page_type):
+    """
+    {name: (parse(html), extract_in_browser())} of the extractions that apply to a
+    page type; product pages give both the availability and the (Arabic) title.
+    """
+    if page_type == "search":
+        return {"search": (scraper.parse_search_page, scraper.search_page_in_browser)}
+    return {
+        "availability": (scraper.parse_availability, scraper.availability_in_browser),
+        "title": (
+            lambda html: scraper.parse_arabic_title(html, scraper.title_selector),
+            lambda: scraper.arabic_title_in_browser(scraper.title_selector),
+        ),
+    }
+
+
+def record_page(store_key, page_type, url, name, pages_dir=PAGES_DIR, wait_seconds=20):
+    """Load url in Chrome, wait until it is rendered and save its page_source; returns the saved path."""
+    scraper = SCRAPERS[store_key](store_key.capitalize(), driver_pool=None, fetcher=None)
+    selector = SEARCH_READY_SELECTORS[store_key] if page_type == "search" else scraper.title_selector
+    try:
+        scraper.load_page(url)
+        try:
+            wait_for_element(scraper.driver, scraper.store_name, selector, default=wait_seconds)
+        except TimeoutException:
+            print(f"{selector} did not appear after {wait_seconds}s; saving the page as it is.")
+        path = Path(pages_dir) / f"{store_key}_{page_type}_{name}.html"
+        path.write_text(scraper.driver.page_source, encoding="utf-8")
+        return path
+    finally:
+        scraper.quit_driver()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record a store page into the fixture corpus.")
+    parser.add_argument("store", choices=sorted(SCRAPERS))
+    parser.add_argument("page_type", choices=PAGE_TYPES)
+    parser.add_argument("url")
+    parser.add_argument("name", help="Page name, ending in _en or _ar (e.g. laptop_en)")
+    parser.add_argument("--pages_dir", default=str(PAGES_DIR))
+    args = parser.parse_args()
+
+    print(f"Saved {record_page(args.store, args.page_type, args.url, args.name, args.pages_dir)}")
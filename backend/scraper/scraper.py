@@ -1,48 +1,115 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
 from bs4 import BeautifulSoup
-from time import sleep
 import urllib.parse
 import re
+import os
+
+from scraper import extraction_scripts
+from scraper.waits import wait_for_element, wait_for_staleness, wait_for_count_increase
+from scraper.stage_timer import stage_timer
+from scraper.browser_profile import LEAN_BROWSER_ENABLED, apply_blocking, page_load_stats
+from scraper.driver_pool import driver_pool as shared_driver_pool, create_driver
+from scraper.http_fetcher import http_fetcher as shared_http_fetcher
 
 
 class StoreScraper:
-    def __init__(self, store_name):
+    # Search result pages can be parsed from plain HTTP (see search_page_url / parse_search_page)
+    server_rendered_search = False
+    # BeautifulSoup tree builder used by the parse_* methods
+    html_parser = "html.parser"
+    # execute_script versions of extract_search_page / extract_availability (see extraction_scripts.py)
+    search_page_script = None
+    availability_script = None
+    # Title element of a product page (English or Arabic)
+    title_selector = None
+    # Root of the store's site, used for search URLs and product links
+    default_base_url = None
+
+    def __init__(self, store_name, driver_pool=shared_driver_pool, fetcher=shared_http_fetcher, base_url=None):
+        """
+        :param driver_pool: Pool to lease warm drivers from; None starts (and quits) a private Chrome.
+        :param fetcher: HttpFetcher tried before Chrome by fetch_and_parse; None always uses Chrome.
+        :param base_url: Site root instead of default_base_url (also set with <STORE>_BASE_URL),
+            e.g. a local store simulator.
+        """
         self.store_name = store_name
-        self.driver = self.setup_driver()
+        base_url = base_url or os.getenv(f"{store_name.upper()}_BASE_URL") or self.default_base_url or ""
+        self.base_url = base_url.rstrip("/")
+        self.driver_pool = driver_pool
+        self.fetcher = fetcher
+        self._lease = None
+        self._page_loaded = False
+        self.driver = None  # Started on the first page that needs a browser
 
     def setup_driver(self):
-
-        options = webdriver.ChromeOptions()
-        # Basic optimizations
-        options.add_argument("--headless")  # Run without GUI
-        options.add_argument("--disable-gpu")  # Disable GPU for headless mode
-        options.add_argument("--no-sandbox")  # Required for Docker containers
-        options.add_argument("--disable-dev-shm-usage")  # Use /tmp for shared memory
-
-        # Lower memory and CPU consumption
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-infobars")
-        options.add_argument("--disable-browser-side-navigation")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--disable-popup-blocking")
-
-        # Use a custom user-agent to avoid detection
-        options.add_argument(
-            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36"
-        )
-        driver = webdriver.Chrome(options=options)
-        return driver
+        if self.driver_pool is None:
+            return create_driver()
+        if self._lease is None:
+            self._lease = self.driver_pool.acquire()
+        return self._lease.driver
 
     def quit_driver(self):
-        if self.driver:
+        """Return the driver to the pool (or quit a private one)."""
+        self.record_page_load()
+        if self._lease is not None:
+            self.driver_pool.release(self._lease)
+            self._lease = None
+            self.driver = None
+        elif self.driver:
             self.driver.quit()
             self.driver = None
 
+    @stage_timer.timed("fetch")
+    def load_page(self, url):
+        """Navigate to url, counting the page against the pooled driver's recycle limit."""
+        if self._lease is not None and self._lease.pages >= self.driver_pool.max_pages:
+            # A long-lived scraper (e.g. one per store for a whole availability run) gets a fresh driver
+            self.quit_driver()
+        if self.driver is None:
+            self.driver = self.setup_driver()
+            if LEAN_BROWSER_ENABLED:
+                apply_blocking(self.driver, self.store_name)
+        else:
+            self.record_page_load()
+        self.driver.get(url)
+        self._page_loaded = True
+        if self._lease is not None:
+            self._lease.pages += 1
+
+    def record_page_load(self):
+        """Add the bytes and load time of the current page to page_load_stats, once it is done with."""
+        if self._page_loaded and self.driver is not None:
+            page_load_stats.record_page(self.driver, self.store_name)
+        self._page_loaded = False
+
+    def fetch_and_parse(self, url, parse, wait_selector=None, wait_seconds=10, extract_in_browser=None):
+        """
+        Get url over plain HTTP and parse it; parse(html) returns None when the
+        expected elements are missing (JS-rendered page, bot wall...). In that case,
+        or when the request fails, the page is loaded in Chrome and parsed again.
+        :param wait_selector: CSS selector to wait for in Chrome before parsing.
+        :param wait_seconds: Timeout of that wait until the store's latencies are known (see waits.py).
+        :param extract_in_browser: Returns the same result as parse from the loaded page
+            with execute_script, instead of transferring and parsing page_source.
+        """
+        if self.fetcher is not None and self.fetcher.stats.worth_trying(self.store_name):
+            html = self.fetcher.fetch(url)
+            result = parse(html) if html else None
+            self.fetcher.stats.record(self.store_name, result is not None)
+            if result is not None:
+                return result
+
+        self.load_page(url)
+        if wait_selector:
+            try:
+                wait_for_element(self.driver, self.store_name, wait_selector, kind=wait_selector, default=wait_seconds)
+            except TimeoutException:
+                pass  # Extracted anyway: parsers report a page without the expected elements as None
+        if extract_in_browser is not None:
+            return extract_in_browser()
+        return parse(self.driver.page_source)
+
     def clean_image_url(self, image_url):
         if image_url.startswith("//"):
             image_url = "https:" + image_url
@@ -70,156 +137,203 @@ class StoreScraper:
         except (ValueError, IndexError):
             return "N/A"
 
+    @staticmethod
+    def element_text(element, separator=""):
+        """get_text(separator, strip=True) of element, or None when it is missing (same as text() in the scripts)."""
+        return element.get_text(separator, strip=True) if element is not None else None
+
+    @staticmethod
+    def element_attribute(element, name):
+        return element.get(name) if element is not None else None
+
+    # Raw fields are extracted either from BeautifulSoup (extract_*) or in the browser
+    # (*_script), then turned into results by the same build_* methods.
+
+    def build_search_page(self, tiles):
+        return [self.build_product(tile) for tile in tiles]
+
+    @stage_timer.timed("parse")
+    def parse_search_page(self, html):
+        return self.build_search_page(self.extract_search_page(BeautifulSoup(html, self.html_parser)))
+
+    @stage_timer.timed("parse")
+    def search_page_in_browser(self, *args):
+        """parse_search_page for the page loaded in the driver, extracted by search_page_script."""
+        return self.build_search_page(self.driver.execute_script(self.search_page_script, *args))
+
+    @stage_timer.timed("parse")
+    def parse_availability(self, html):
+        """Availability and price from a product page, or None when it is not a rendered product page."""
+        return self.build_availability(self.extract_availability(BeautifulSoup(html, self.html_parser)))
+
+    @stage_timer.timed("parse")
+    def availability_in_browser(self):
+        """parse_availability for the page loaded in the driver, extracted by availability_script."""
+        return self.build_availability(self.driver.execute_script(self.availability_script))
+
+    def build_arabic_title(self, text):
+        if text is None:
+            return None
+        return {"store": self.store_name, "title_arabic": " ".join(text.split())}
+
+    @stage_timer.timed("parse")
+    def parse_arabic_title(self, html, selector):
+        """Arabic title from a product page, or None when the title element is missing."""
+        title_element = BeautifulSoup(html, self.html_parser).select_one(selector)
+        return self.build_arabic_title(title_element.get_text() if title_element is not None else None)
+
+    @stage_timer.timed("parse")
+    def arabic_title_in_browser(self, selector):
+        return self.build_arabic_title(self.driver.execute_script(extraction_scripts.ELEMENT_TEXT, selector))
+
+    def scrape_arabic_title(self, url):
+        return self.fetch_and_parse(
+            url,
+            lambda html: self.parse_arabic_title(html, self.title_selector),
+            wait_selector=self.title_selector,
+            extract_in_browser=lambda: self.arabic_title_in_browser(self.title_selector),
+        )
+
 
 class JarirScraper(StoreScraper):
+    html_parser = "lxml"
+    TILE_SELECTOR = "div.product-tile__item--spacer"
+    title_selector = "h2.product-title__title"
+    default_base_url = "https://www.jarir.com"
+    search_page_script = extraction_scripts.JARIR_TILES
+    availability_script = extraction_scripts.JARIR_AVAILABILITY
+
     def handle_popups(self):
         """Handle popups for language selection and cookie consent."""
         try:
-            WebDriverWait(self.driver, 5).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "button#switcher-button-en"))
-            ).click()
+            wait_for_element(self.driver, self.store_name, "button#switcher-button-en", kind="language popup",
+                             default=5, clickable=True, expected=False).click()
             print("Language selected: English")
         except TimeoutException:
             print("Language popup did not appear or was already handled.")
 
         try:
-            WebDriverWait(self.driver, 5).until(
-                EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))
-            ).click()
+            wait_for_element(self.driver, self.store_name, "#onetrust-accept-btn-handler", kind="cookie popup",
+                             default=5, clickable=True, expected=False).click()
             print("Accepted cookie consent.")
         except TimeoutException:
             print("Cookie consent popup did not appear or was already handled.")
 
+    def extract_search_page(self, soup):
+        """Raw fields of the product tiles of a Jarir search page, or of a fragment made of tiles."""
+        return [
+            {
+                "title": self.element_text(tile.select_one("p.product-title__title")),
+                "href": self.element_attribute(tile.select_one("a.product-tile__link"), "href"),
+                "price": self.element_text(tile.select_one("div.price")),
+                "info": self.element_text(tile.select_one("p.product-title__info"), " | "),
+                # Focus on `loading="eager"` to get the correct image
+                "image": self.element_attribute(tile.select_one("img.image--contain[loading='eager']"), "src"),
+            }
+            for tile in soup.select(self.TILE_SELECTOR)
+        ]
+
+    def build_product(self, tile):
+        return {
+            "store": self.store_name,
+            "title": tile["title"] if tile["title"] is not None else "No title",
+            "link": f"{self.base_url}{tile['href']}" if tile["href"] is not None else "No link",
+            "price": self.normalize_price(tile["price"] if tile["price"] is not None else "N/A"),
+            "info": tile["info"] if tile["info"] is not None else "No additional info available",
+            "image_url": self.clean_image_url(tile["image"]) if tile["image"] else "",
+        }
+
     def scrape_products(self, search_value, max_scrolls=5):
-        """Scrape products from the Jarir website."""
+        """Scrape products from the Jarir website (client-rendered with infinite scroll: Chrome only)."""
         encoded_search_value = urllib.parse.quote(search_value)
-        url = f"https://www.jarir.com/sa-en/catalogsearch/result?search={encoded_search_value}&country=sa"
+        url = f"{self.base_url}/sa-en/catalogsearch/result?search={encoded_search_value}&country=sa"
 
         try:
-            self.driver.get(url)
+            self.load_page(url)
             self.handle_popups()
 
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "product-tile__item--spacer"))
-            )
+            wait_for_element(self.driver, self.store_name, self.TILE_SELECTOR, kind="search tiles", default=20)
             print(f"Scraping results from {self.store_name} for: {search_value}")
 
             unique_products = set()
+            parsed_tiles = 0
 
             def extract_products():
-                """Extract product details using BeautifulSoup."""
-                page_source = self.driver.page_source
-                soup = BeautifulSoup(page_source, "html.parser")
-                product_elements = soup.find_all("div", class_="product-tile__item--spacer")
-
-                if not product_elements:
-                    print("No product tiles found. The page structure might have changed.")
-
-                for product in product_elements:
-                    try:
-                        # Extract title and link
-                        title_elem = product.find("p", class_="product-title__title")
-                        link_elem = product.find("a", class_="product-tile__link")
-
-                        # Extract price
-                        price_elem = product.find("div", class_="price")
-                        raw_price = price_elem.get_text(strip=True) if price_elem else "N/A"
-                        price = self.normalize_price(raw_price)
-
-                        # Extract info
-                        info_elem = product.find("p", class_="product-title__info")
-                        info = (
-                            info_elem.get_text(" | ", strip=True)
-                            if info_elem
-                            else "No additional info available"
-                        )
-
-                        # Extract image (focus on `loading="eager"` to get the correct image)
-                        image_elem = product.find("img", {"loading": "eager", "class": "image--contain"})
-                        image_url = self.clean_image_url(image_elem["src"]) if image_elem else ""
-
-                        # Format the product link
-                        title = title_elem.get_text(strip=True) if title_elem else "No title"
-                        link = f"https://www.jarir.com{link_elem['href']}" if link_elem else "No link"
-
-                        product_key = (title, link)
-                        if product_key not in unique_products:
-                            unique_products.add(product_key)
-                            yield {
-                                "store": self.store_name,
-                                "title": title,
-                                "link": link,
-                                "price": price,
-                                "info": info,
-                                "image_url": image_url,
-                            }
-                    except AttributeError as e:
-                        print(f"Error extracting product details: {e}. Skipping product...")
+                """Extract only the tiles added since the previous pass (tiles are appended while scrolling)."""
+                nonlocal parsed_tiles
+                new_products = self.search_page_in_browser(parsed_tiles)
+                if not new_products:
+                    if parsed_tiles == 0:
+                        print("No product tiles found. The page structure might have changed.")
+                    return
+                parsed_tiles += len(new_products)
+
+                for product in new_products:
+                    product_key = (product["title"], product["link"])
+                    if product_key not in unique_products:
+                        unique_products.add(product_key)
+                        yield product
 
             yield from extract_products()
 
-            # Implement scrolling for dynamic content loading
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
+            # Implement scrolling for dynamic content loading: wait for new tiles, or for the
+            # network to go quiet without any (end of the results)
             for _ in range(max_scrolls):
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                sleep(3)
-                yield from extract_products()
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
-                if new_height == last_height:
+                tiles = wait_for_count_increase(self.driver, self.store_name, self.TILE_SELECTOR, parsed_tiles)
+                if tiles == parsed_tiles:
                     print("No more products to load.")
                     break
-                last_height = new_height
+                yield from extract_products()
 
         except (TimeoutException, WebDriverException) as e:
             print(f"Error during scraping: {e}")
 
 
     def scrape_arabic(self, url):
-        self.driver.get(url)
         try:
-            title_element = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "h2.product-title__title"))
-            )
-            title = title_element.text.strip()
-            return {"store": self.store_name, "title_arabic": title}
+            return self.scrape_arabic_title(url)
         except Exception as e:
             print(f"[Jarir] Error fetching Arabic title: {e}")
             return None
 
-    def scrape_availability(self, product_link):
+    def extract_availability(self, soup):
+        return {
+            "has_title": soup.select_one("h2.product-title__title") is not None,
+            "notify_me": soup.select_one("button.button--primary.button--fluid.button--secondary") is not None,
+            "add_to_cart": soup.select_one("button.button--add-to-cart.button--primary.button--fluid") is not None,
+            "price": self.element_text(soup.select_one("div.price-box__row div.price span.price__currency + span")),
+        }
+
+    def build_availability(self, fields):
         """
-        Check the availability and price of a product on Jarir's website using BeautifulSoup.
-        :param product_link: The URL of the product page.
-        :return: A dictionary with 'availability' (bool) and 'price' (float or 'N/A').
+        Availability and price from a Jarir product page,
+        or None when it has no product title (not a rendered product page).
         """
-        try:
-            # Navigate to the product page
-            self.driver.get(product_link)
-
-            # Get the page source after loading the product page
-            page_source = self.driver.page_source
-
-            # Parse the page source with BeautifulSoup
-            soup = BeautifulSoup(page_source, "html.parser")
-
-            # Check for availability
-            notify_me_buttons = soup.select("button.button--primary.button--fluid.button--secondary")
-            add_to_cart_buttons = soup.select("button.button--add-to-cart.button--primary.button--fluid")
-
-            # Determine availability
-            availability = bool(add_to_cart_buttons or not notify_me_buttons)
+        if not fields["has_title"]:
+            return None
 
-            # Extract the price
-            price_element = soup.select_one("div.price-box__row div.price span.price__currency + span")
-            price = "N/A"
+        # Determine availability
+        availability = bool(fields["add_to_cart"] or not fields["notify_me"])
 
-            if price_element:
-                raw_price = price_element.get_text(strip=True).replace(",", "")
-                price = self.normalize_price(raw_price)
+        # Extract the price
+        price = "N/A"
+        if fields["price"] is not None:
+            price = self.normalize_price(fields["price"].replace(",", ""))
 
-            # Return both availability and price
-            return {"availability": availability, "price": price}
+        # Return both availability and price
+        return {"availability": availability, "price": price}
 
+    def scrape_availability(self, product_link):
+        """
+        Check the availability and price of a product on Jarir's website.
+        :param product_link: The URL of the product page.
+        :return: A dictionary with 'availability' (bool) and 'price' (float or 'N/A'),
+                 or None when the page could not be recognized.
+        """
+        try:
+            return self.fetch_and_parse(product_link, self.parse_availability, wait_selector=self.title_selector,
+                                        extract_in_browser=self.availability_in_browser)
         except Exception as e:
             print(f"[{self.store_name}] Error checking availability and price for {product_link}: {e}")
             return {"availability": False, "price": "N/A"}
@@ -227,170 +341,189 @@ class JarirScraper(StoreScraper):
 
 
 class AmazonScraper(StoreScraper):
-    def scrape_products(self, search_value, max_pages=5):
-        """Scrape products from Amazon for a given search value."""
+    server_rendered_search = True
+    title_selector = "span#productTitle"
+    # Links of the "page not found" (dog) page that Amazon serves for a delisted product
+    not_found_selector = 'a[href*="/ref=cs_404_"], a[href*="/dogsofamazon"]'
+    default_base_url = "https://www.amazon.sa"
+    search_page_script = extraction_scripts.AMAZON_SEARCH_PAGE
+    availability_script = extraction_scripts.AMAZON_AVAILABILITY
+
+    def search_page_url(self, search_value, page):
         encoded_search_value = urllib.parse.quote(search_value)
-        base_url = f"https://www.amazon.sa/s?k={encoded_search_value}&language=en_AE"
+        return f"{self.base_url}/s?k={encoded_search_value}&language=en_AE&page={page}"
+
+    def extract_search_page(self, soup):
+        tiles = []
+        for product in soup.select("div.s-result-item[data-component-type='s-search-result']"):
+            # Locate the product title anchor
+            title_anchor = product.select_one("a.a-link-normal.s-line-clamp-4.s-link-style.a-text-normal")
+            if not title_anchor:
+                continue  # Skip if no title anchor found
+
+            # Prefer the nested <h2> within the anchor
+            title_h2 = title_anchor.select_one("h2.a-size-base-plus.a-spacing-none.a-color-base.a-text-normal")
+            tiles.append({
+                "title": self.element_text(title_h2 or title_anchor),
+                "href": title_anchor.get("href"),
+                "price": self.element_text(product.select_one("span.a-price span.a-offscreen")),
+                "image": self.element_attribute(product.select_one("img.s-image"), "src"),
+            })
+
+        return {
+            "has_results": soup.select_one("div.s-main-slot") is not None,
+            "tiles": tiles,
+            # The 'Next' link is a plain <a> only while there are more pages
+            "has_next_page": soup.select_one("a.s-pagination-next") is not None,
+        }
+
+    def build_search_page(self, page):
+        """
+        Products of an Amazon search results page and whether a next page exists,
+        or None when the result list is missing (captcha, bot wall...).
+        """
+        if not page["has_results"]:
+            return None
 
+        products = []
+        unique_products = set()
+        for tile in page["tiles"]:
+            if tile["href"] is None:
+                continue
+            product = self.build_product(tile)
+
+            # Deduplicate products
+            product_key = (product["title"], product["link"])
+            if product_key not in unique_products:
+                unique_products.add(product_key)
+                products.append(product)
+        return products, page["has_next_page"]
+
+    def build_product(self, tile):
+        return {
+            "store": self.store_name,
+            "title": tile["title"],
+            "link": f"{self.base_url}{tile['href']}",
+            "price": self.normalize_price(tile["price"]) if tile["price"] is not None else "N/A",
+            "info": "N/A",
+            "image_url": tile["image"] or "",
+        }
+
+    def scrape_products(self, search_value, max_pages=5):
+        """Scrape products from Amazon for a given search value."""
         try:
             for page in range(1, max_pages + 1):
-                url = f"{base_url}&page={page}"
+                url = self.search_page_url(search_value, page)
                 print(f"Loading page {page} for Amazon - URL: {url}")
-                self.driver.get(url)
-
-                # Wait for the product list to load
-                WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "div.s-main-slot"))
-                )
-                print(f"Scraping results from {self.store_name} - Page {page} for: {search_value}")
-
-                unique_products = set()
-
-                def extract_products():
-                    """Extract product details using BeautifulSoup."""
-                    page_source = self.driver.page_source
-                    soup = BeautifulSoup(page_source, "html.parser")
-                    
-                    # Adjusted selector for product elements
-                    product_elements = soup.select("div.s-result-item[data-component-type='s-search-result']")
-                    
-                    for product in product_elements:
-                        try:
-                            # Locate the product title anchor
-                            title_anchor = product.select_one("a.a-link-normal.s-line-clamp-4.s-link-style.a-text-normal")
-                            if not title_anchor:
-                                continue  # Skip if no title anchor found
-                            
-                            # Look for the nested <h2> within the anchor
-                            title_h2 = title_anchor.select_one("h2.a-size-base-plus.a-spacing-none.a-color-base.a-text-normal")
-                            if title_h2:
-                                title = title_h2.get_text(strip=True)
-                            else:
-                                title = title_anchor.get_text(strip=True)
-                            
-                            # Product link
-                            link = f"https://www.amazon.sa{title_anchor['href']}"
-                            
-                            # Product price
-                            price_elem = product.select_one("span.a-price span.a-offscreen")
-                            price = self.normalize_price(price_elem.get_text(strip=True)) if price_elem else "N/A"
-                            
-                            # Product image
-                            image_elem = product.select_one("img.s-image")
-                            image_url = image_elem["src"] if image_elem else ""
-                            
-                            # Deduplicate products
-                            product_key = (title, link)
-                            if product_key not in unique_products:
-                                unique_products.add(product_key)
-                                yield {
-                                    "store": self.store_name,
-                                    "title": title,
-                                    "link": link,
-                                    "price": price,
-                                    "info": "N/A",
-                                    "image_url": image_url,
-                                }
-                        except Exception as e:
-                            print(f"Error extracting product details: {e}. Skipping product...")
-
 
+                # Wait for the product list to load when Chrome is needed
+                result = self.fetch_and_parse(url, self.parse_search_page, wait_selector="div.s-main-slot",
+                                              wait_seconds=20, extract_in_browser=self.search_page_in_browser)
+                if result is None:
+                    print(f"No result list found on page {page}. Stopping pagination.")
+                    break
+                products, has_next_page = result
 
-                yield from extract_products()
+                print(f"Scraping results from {self.store_name} - Page {page} for: {search_value}")
+                yield from products
 
-                # Check for 'Next' button to paginate
-                try:
-                    next_button = self.driver.find_element(By.CSS_SELECTOR, "a.s-pagination-next")
-                    if not next_button.is_enabled():
-                        print("No more pages to load.")
-                        break
-                except NoSuchElementException:
-                    print("No 'Next' button found. Stopping pagination.")
+                if not has_next_page:
+                    print("No more pages to load.")
                     break
 
         except (TimeoutException, WebDriverException) as e:
             print(f"Error during scraping: {e}")
 
     def scrape_arabic(self, url):
-        self.driver.get(url)
         try:
-            title_element = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "span#productTitle"))
-            )
-            title = title_element.text.strip()
-            return {"store": self.store_name, "title_arabic": title}
+            return self.scrape_arabic_title(url)
         except Exception as e:
             print(f"[Amazon] Error fetching Arabic title: {e}")
             return None
-    
-    def scrape_availability(self, product_link):
+
+    def extract_availability(self, soup):
+        return {
+            "has_title": soup.select_one("#productTitle") is not None,
+            "not_found": soup.select_one(self.not_found_selector) is not None,
+            "add_to_cart": soup.select_one("#add-to-cart-button") is not None,
+            "availability_text": self.element_text(
+                soup.select_one("#availability") or soup.select_one("#availabilityInsideBuyBox_feature_div")
+            ),
+            "apex_price": self.element_text(
+                soup.select_one("span.a-price.a-text-price.a-size-medium.apexPriceToPay span.a-offscreen")
+            ),
+            "price_whole": self.element_text(soup.select_one("span.a-price-whole")),
+            "price_fraction": self.element_text(soup.select_one("span.a-price-fraction")),
+            "fallback_price": self.element_text(
+                soup.select_one("div.a-section.aok-relative span.aok-offscreen") or soup.select_one("#price_inside_buybox")
+            ),
+        }
+
+    def build_availability(self, fields):
         """
-        Check availability and price of a product on Amazon based on its link.
+        Availability and price from an Amazon product page. A "page not found" page (a
+        delisted product) is unavailable; any other page without #productTitle (captcha,
+        bot wall) gives None.
         1) If #add-to-cart-button is present => consider available
         2) Otherwise parse #availability or #availabilityInsideBuyBox_feature_div for text.
         3) Extract price from multiple possible selectors (apexPriceToPay, a-price-whole + a-price-fraction, etc.)
         """
-        try:
-            self.driver.get(product_link)
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
+        if not fields["has_title"]:
+            return {"availability": False, "price": "N/A"} if fields["not_found"] else None
+
+        # ----------- AVAILABILITY DETECTION -----------
+        # 1) If #add-to-cart-button is present => consider it available
+        availability = fields["add_to_cart"]
 
-            # ----------- AVAILABILITY DETECTION -----------
-            availability = False
+        # 2) Parse text in #availability or #availabilityInsideBuyBox_feature_div
+        #    Check for phrases like "In Stock", "Only X left", "Currently unavailable", etc.
+        if fields["availability_text"] is not None:
+            availability_text = fields["availability_text"].lower()
 
-            # 1) If #add-to-cart-button is present => consider it available
-            add_to_cart_button = soup.select_one("#add-to-cart-button")
-            if add_to_cart_button:
+            # If we find "in stock" or "only x left" => available
+            if ("in stock" in availability_text) or ("only" in availability_text and "left" in availability_text):
                 availability = True
 
-            # 2) If not found, parse text in #availability and #availabilityInsideBuyBox_feature_div
-            #    Check for phrases like "In Stock", "Only X left", "Currently unavailable", etc.
-            availability_container = soup.select_one("#availability") or soup.select_one("#availabilityInsideBuyBox_feature_div")
-            if availability_container:
-                availability_text = availability_container.get_text(strip=True).lower()
-                
-                # If we find "in stock" or "only x left" => available
-                if ("in stock" in availability_text) or ("only" in availability_text and "left" in availability_text):
-                    availability = True
-                
-                # If we see "currently unavailable", "out of stock", "temporarily out of stock" => not available
-                if ("unavailable" in availability_text) or ("out of stock" in availability_text):
-                    availability = False
-
-            # ----------- PRICE DETECTION -----------
-            # If not available => skip price
-            price = "N/A"
-            if availability:
-                # Attempt each known pattern:
-                # 1) apexPriceToPay
-                apex_elem = soup.select_one("span.a-price.a-text-price.a-size-medium.apexPriceToPay span.a-offscreen")
-                if apex_elem and apex_elem.text.strip():
-                    raw_price = apex_elem.get_text(strip=True)
+            # If we see "currently unavailable", "out of stock", "temporarily out of stock" => not available
+            if ("unavailable" in availability_text) or ("out of stock" in availability_text):
+                availability = False
+
+        # ----------- PRICE DETECTION -----------
+        # If not available => skip price
+        price = "N/A"
+        if availability:
+            # Attempt each known pattern:
+            # 1) apexPriceToPay
+            if fields["apex_price"]:
+                price = self._extract_and_normalize_price(fields["apex_price"])
+
+            if price == "N/A":
+                # 2) a-price-whole + a-price-fraction
+                if fields["price_whole"] is not None and fields["price_fraction"] is not None:
+                    combined_price = fields["price_whole"].replace(",", "")
+                    # remove any trailing '.' in the whole_elem text
+                    if combined_price.endswith("."):
+                        combined_price = combined_price[:-1]
+                    raw_price = f"{combined_price}.{fields['price_fraction']}"
                     price = self._extract_and_normalize_price(raw_price)
 
-                if price == "N/A":
-                    # 2) a-price-whole + a-price-fraction
-                    whole_elem = soup.select_one("span.a-price-whole")
-                    fraction_elem = soup.select_one("span.a-price-fraction")
-                    if whole_elem and fraction_elem:
-                        combined_price = whole_elem.get_text(strip=True).replace(",", "")
-                        frac = fraction_elem.get_text(strip=True)
-                        # remove any trailing '.' in the whole_elem text
-                        if combined_price.endswith("."):
-                            combined_price = combined_price[:-1]
-                        raw_price = f"{combined_price}.{frac}"
-                        price = self._extract_and_normalize_price(raw_price)
-
-                if price == "N/A":
-                    # 3) fallback: .aok-offscreen or #price_inside_buybox
-                    fallback_elem = soup.select_one("div.a-section.aok-relative span.aok-offscreen")
-                    if not fallback_elem:
-                        fallback_elem = soup.select_one("#price_inside_buybox")
-                    if fallback_elem and fallback_elem.text.strip():
-                        raw_price = fallback_elem.get_text(strip=True)
-                        price = self._extract_and_normalize_price(raw_price)
-
-            return {"availability": availability, "price": price}
+            if price == "N/A":
+                # 3) fallback: .aok-offscreen or #price_inside_buybox
+                if fields["fallback_price"]:
+                    price = self._extract_and_normalize_price(fields["fallback_price"])
 
+        return {"availability": availability, "price": price}
+
+    def scrape_availability(self, product_link):
+        """
+        Check availability and price of a product on Amazon based on its link.
+        Returns None when the page could not be recognized as a product page.
+        """
+        try:
+            # In Chrome, the "page not found" page is ready as soon as its links are there
+            return self.fetch_and_parse(product_link, self.parse_availability,
+                                        wait_selector=f"{self.title_selector}, {self.not_found_selector}",
+                                        extract_in_browser=self.availability_in_browser)
         except Exception as e:
             print(f"[Amazon] Error checking availability and price for {product_link}: {e}")
             return {"availability": False, "price": "N/A"}
@@ -409,9 +542,37 @@ class AmazonScraper(StoreScraper):
 
 
 class ExtraScraper(StoreScraper):
+    title_selector = "h1.product-name"
+    default_base_url = "https://www.extra.com"
+    search_page_script = extraction_scripts.EXTRA_TILES
+    availability_script = extraction_scripts.EXTRA_AVAILABILITY
+
+    def extract_search_page(self, soup):
+        """Raw fields of the product tiles of an Extra search page."""
+        return [
+            {
+                "title": self.element_text(tile.select_one("span.product-name-data")),
+                "href": self.element_attribute(tile.select_one("a.product-tile-content-wrapper"), "href"),
+                "price": self.element_text(tile.select_one("section.price strong")),
+                "info": [self.element_text(li) for li in tile.select("ul.product-stats li")],
+                "image": self.element_attribute(tile.select_one("picture img"), "src"),
+            }
+            for tile in soup.select("section.product-tile-wrapper")
+        ]
+
+    def build_product(self, tile):
+        return {
+            "store": self.store_name,
+            "title": tile["title"] if tile["title"] is not None else "No title",
+            "link": f"{self.base_url}{tile['href']}" if tile["href"] is not None else "No link",
+            "price": self.normalize_price(tile["price"] if tile["price"] is not None else "N/A"),
+            "info": "; ".join(tile["info"]) if tile["info"] else "No additional info available",
+            "image_url": self.clean_image_url(tile["image"] or ""),
+        }
+
     def scrape_products(self, search_value, max_pages=5):
-        """Scrape products from Extra for a given search value."""
-        base_url = f"https://www.extra.com/en-sa/search/?q={urllib.parse.quote(search_value)}%3Arelevance%3Atype%3APRODUCT&text={urllib.parse.quote(search_value)}&pageSize=96&sort=relevance"
+        """Scrape products from Extra for a given search value (client-rendered tiles: Chrome only)."""
+        base_url = f"{self.base_url}/en-sa/search/?q={urllib.parse.quote(search_value)}%3Arelevance%3Atype%3APRODUCT&text={urllib.parse.quote(search_value)}&pageSize=96&sort=relevance"
 
         unique_products = set()
 
@@ -419,68 +580,31 @@ class ExtraScraper(StoreScraper):
             for page in range(1, max_pages + 1):
                 url = f"{base_url}&pg={page}"
                 print(f"Loading page {page} for Extra - URL: {url}")
-                self.driver.get(url)
+                self.load_page(url)
 
                 # Wait for product tiles to load
                 try:
-                    WebDriverWait(self.driver, 20).until(
-                        EC.presence_of_all_elements_located((By.CLASS_NAME, "product-tile-wrapper"))
-                    )
+                    wait_for_element(self.driver, self.store_name, "section.product-tile-wrapper", kind="search tiles",
+                                     default=20)
                 except TimeoutException:
                     print(f"No products found on page {page}. Stopping pagination.")
                     break
 
                 print(f"Scraping results from Extra - Page {page} for: {search_value}")
 
-                def extract_products():
-                    """Extract product details using BeautifulSoup."""
-                    page_source = self.driver.page_source
-                    soup = BeautifulSoup(page_source, "html.parser")
-                    product_elements = soup.select("section.product-tile-wrapper")
-
-                    for product in product_elements:
-                        try:
-                            # Extract product details
-                            title_elem = product.select_one("span.product-name-data")
-                            title = title_elem.get_text(strip=True) if title_elem else "No title"
-
-                            link_elem = product.select_one("a.product-tile-content-wrapper")
-                            link = f"https://www.extra.com{link_elem['href']}" if link_elem else "No link"
-
-                            price_elem = product.select_one("section.price strong")
-                            raw_price = price_elem.get_text(strip=True) if price_elem else "N/A"
-                            price = self.normalize_price(raw_price)
-
-                            stats = product.select("ul.product-stats li")
-                            info = "; ".join([li.get_text(strip=True) for li in stats]) if stats else "No additional info available"
-
-                            image_elem = product.select_one("picture img")
-                            image_url = image_elem["src"] if image_elem else ""
-
-                            # Deduplicate products
-                            product_key = (title, link)
-                            if product_key not in unique_products:
-                                unique_products.add(product_key)
-                                yield {
-                                    "store": self.store_name,
-                                    "title": title,
-                                    "link": link,
-                                    "price": price,
-                                    "info": info,
-                                    "image_url": self.clean_image_url(image_url),
-                                }
-                        except AttributeError as e:
-                            print(f"Failed to extract some product details: {e}. Skipping...")
-                yield from extract_products()
+                # Deduplicate products
+                for product in self.search_page_in_browser():
+                    product_key = (product["title"], product["link"])
+                    if product_key not in unique_products:
+                        unique_products.add(product_key)
+                        yield product
 
                 # Check for the "Next" button and click it
                 try:
                     next_button = self.driver.find_element(By.CSS_SELECTOR, "li.next > div.icon-inline")
                     if next_button.is_displayed() and "hidden" not in next_button.get_attribute("class"):
                         next_button.click()
-                        WebDriverWait(self.driver, 10).until(
-                            EC.staleness_of(next_button)
-                        )  # Wait for the page to refresh
+                        wait_for_staleness(self.driver, self.store_name, next_button)  # Wait for the page to refresh
                     else:
                         print("No more pages to load. Stopping pagination.")
                         break
@@ -492,51 +616,47 @@ class ExtraScraper(StoreScraper):
             print(f"Error during scraping: {e}")
 
     def scrape_arabic(self, url):
-        self.driver.get(url)
         try:
-            title_element = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "h1.product-name"))
-            )
-            title = title_element.text.strip()
-            return {"store": self.store_name, "title_arabic": title}
+            return self.scrape_arabic_title(url)
         except Exception as e:
             print(f"[Extra] Error fetching Arabic title: {e}")
             return None
-    
-    def scrape_availability(self, product_link):
-        """
-        Check the availability and price of a product on Extra's website using BeautifulSoup.
-        :param product_link: The URL of the product page.
-        :return: A dictionary with 'availability' (bool) and 'price' (float or 'N/A').
-        """
-        try:
-            # Navigate to the product page
-            self.driver.get(product_link)
-
-            # Get the page source after loading the product page
-            page_source = self.driver.page_source
 
-            # Parse the page source with BeautifulSoup
-            soup = BeautifulSoup(page_source, "html.parser")
+    def extract_availability(self, soup):
+        return {
+            "has_title": soup.select_one("h1.product-name") is not None,
+            "status": self.element_text(soup.select_one("div.product-status-text.svelte-agjy")),
+            "price": self.element_text(soup.select_one("section.price span.price strong")),
+        }
 
-            # Locate the product availability status
-            product_status_element = soup.select_one("div.product-status-text.svelte-agjy")
-            availability = True  # Default to available
+    def build_availability(self, fields):
+        """
+        Availability and price from an Extra product page,
+        or None when it has no product name (not a rendered product page).
+        """
+        if not fields["has_title"]:
+            return None
 
-            # Check if the status text indicates "Unavailable"
-            if product_status_element and "Unavailable" in product_status_element.get_text(strip=True):
-                availability = False  # Product is unavailable
+        # Default to available unless the status text indicates "Unavailable"
+        availability = not (fields["status"] is not None and "Unavailable" in fields["status"])
 
-            # Locate the price element
-            price_element = soup.select_one("section.price span.price strong")
-            price = "N/A"
-            if price_element:
-                raw_price = price_element.get_text(strip=True)
-                price = self.normalize_price(raw_price)
+        price = "N/A"
+        if fields["price"] is not None:
+            price = self.normalize_price(fields["price"])
 
-            # Return both availability and price
-            return {"availability": availability, "price": price}
+        # Return both availability and price
+        return {"availability": availability, "price": price}
 
+    def scrape_availability(self, product_link):
+        """
+        Check the availability and price of a product on Extra's website.
+        :param product_link: The URL of the product page.
+        :return: A dictionary with 'availability' (bool) and 'price' (float or 'N/A'),
+                 or None when the page could not be recognized.
+        """
+        try:
+            return self.fetch_and_parse(product_link, self.parse_availability, wait_selector=self.title_selector,
+                                        extract_in_browser=self.availability_in_browser)
         except Exception as e:
             print(f"[Extra] Error checking availability and price for {product_link}: {e}")
             return {"availability": False, "price": "N/A"}
@@ -1,16 +1,28 @@
 from scraper.scraper import AmazonScraper, JarirScraper, ExtraScraper
-from models import Store, Product, ProductPriceHistory, engine
+from scraper.http_fetcher import http_fetcher
+from scraper.browser_profile import page_load_stats
+from scraper.async_engine import AsyncFetcher, stream
+from scraper.stage_timer import stage_timer
+from scraper.product_writer import ProductWriter
+from scraper.product_classifier import ProductClassifier, model_fingerprint
+from scraper.crawl_diff import CrawlDiff
+from scraper.search_term_scheduler import SearchTermScheduler, ADAPTIVE_RECRAWL_ENABLED
+from models import engine
 from sqlalchemy.orm import Session
 import json
 import time
-from datetime import datetime, timezone
+import queue
+import asyncio
+import threading
+from contextlib import aclosing
 import random
 import os
 import pickle  # For loading the classification model
 
 
 class ScraperManager:
-    def __init__(self, search_values_file="search_values.json", model_file="ai_modules/classification_model.pkl"):
+    def __init__(self, search_values_file="search_values.json", model_file="ai_modules/classification_model.pkl",
+                 write_batch_size=100, adaptive_recrawl=ADAPTIVE_RECRAWL_ENABLED):
         self.search_values_file = os.path.join(
             os.path.dirname(__file__), search_values_file
         )
@@ -23,7 +35,19 @@ class ScraperManager:
 
         # Load the pre-trained classification model
         with open(self.model_file, "rb") as f:
-            self.classification_model = pickle.load(f)
+            model_bytes = f.read()
+        self.classification_model = pickle.loads(model_bytes)
+        self.classifier = ProductClassifier(self.classification_model, model_fingerprint(model_bytes))
+
+        # Scraped products are written in batches of up to write_batch_size (about a search page)
+        self.write_batch_size = write_batch_size
+        self.writer = ProductWriter(self.classifier.classify)
+        # Set for the duration of a crawl: only new or changed products reach the writer
+        self.crawl_diff = None
+        # Search values of the crawl whose scrape failed in some store, after its retries
+        self.failed_search_values = set()
+        # Crawl only the search values that are due, see search_term_scheduler.py
+        self.scheduler = SearchTermScheduler() if adaptive_recrawl else None
 
     def load_search_values(self):
         """Load search values from a JSON file and shuffle them."""
@@ -33,139 +57,85 @@ class ScraperManager:
             random.shuffle(search_values)  # Shuffle the search values
             return search_values
 
-    def classify_product(self, title, search_value):
-        """Classify a product using the pre-trained model."""
-        combined_text = f"{title} {search_value}"
-        predicted_category_id = int(self.classification_model.predict([combined_text])[0])  # Cast to int
-        return predicted_category_id
+    def due_search_values(self):
+        """The shuffled search values, without those not due for a crawl yet (with adaptive recrawl)."""
+        search_values = self.load_search_values()
+        if self.scheduler is None:
+            return search_values
+        with Session(engine) as db:
+            due = self.scheduler.due(db, search_values)
+        print(f"[INFO] {len(due)}/{len(search_values)} search values are due for a crawl.")
+        return due
 
+    def record_search_values(self, search_values):
+        """
+        Record what the crawl of each search value found and schedule its next crawl.
+        A value whose scrape failed or found nothing keeps its current interval instead.
+        """
+        if self.scheduler is None:
+            return
+        with Session(engine) as db:
+            for search_value in search_values:
+                found = self.crawl_diff.search_terms.get(search_value, {})
+                if search_value in self.failed_search_values or not found.get("found"):
+                    self.scheduler.postpone(db, search_value)
+                    continue
+                self.scheduler.record(db, search_value, found.get("found", 0), found.get("new", 0),
+                                      found.get("price_changed", 0))
+            db.commit()
 
-    def store_to_database(self, db: Session, data: dict):
-        """Store a scraped product in the database and log actions."""
-        current_index = data.get("current_index")
-        total_values = data.get("total_values")
+    @stage_timer.timed("persist")
+    def store_products(self, db: Session, batch):
+        """Store a batch of scraped products (a page, typically) with a single commit. Returns the batch size."""
+        return self.writer.write(db, batch)
 
-        try:
-            price = float(data["price"])
-        except (ValueError, TypeError):
-            price = None
-
-        info = data.get("info")
-        if info == "N/A" or not info:
-            info = None
-
-        store_name = data["store"]
-        title = data["title"]
-        search_value = data["search_value"]
-        link = data["link"]
-        image_url = data["image_url"]
-
-        # Ensure the store exists in the database
-        store = db.query(Store).filter_by(store_name=store_name).first()
-        if not store:
-            store = Store(store_name=store_name)
-            db.add(store)
-            db.commit()
-            db.refresh(store)
-
-        # Classify the product to predict its category
-        predicted_category_id = self.classify_product(title, search_value)
-
-        # Check if the product already exists
-        existing_product = db.query(Product).filter_by(
-            title=title, store_id=store.store_id
-        ).first()
-
-        if existing_product:
-            updated = False
-            price_changed = False
-            messages = []
-
-            # Check if price changed
-            if existing_product.price != price:
-                price_changed = True
-                price_history = ProductPriceHistory(
-                    product_id=existing_product.product_id,
-                    old_price=existing_product.price if existing_product.price is not None else 0.0,
-                    new_price=price if price is not None else 0.0,
-                    change_date=datetime.now(timezone.utc)
-                )
-                db.add(price_history)
-                messages.append(f"Price updated from {existing_product.price} to {price}")
-                existing_product.price = price
-                updated = True
-
-            if existing_product.link != link:
-                messages.append("Link updated")
-                existing_product.link = link
-                updated = True
-
-            if existing_product.image_url != image_url:
-                messages.append("Image URL updated")
-                existing_product.image_url = image_url
-                updated = True
-
-            if existing_product.search_value != search_value:
-                messages.append(f"Search value updated to {search_value}")
-                existing_product.search_value = search_value
-                updated = True
-
-            # Only update last_updated if the price changed
-            if price_changed:
-                existing_product.last_updated = datetime.now(timezone.utc)
-
-            if updated:
-                db.commit()
-                print(f"[{search_value}][{current_index}/{total_values}][{store_name}][Product ID: {existing_product.product_id}] {title}")
-                for msg in messages:
-                    print(f" - {msg}")
-            else:
-                print(f"[{search_value}][{current_index}/{total_values}][{store_name}][Product ID: {existing_product.product_id}] {title}: No changes.")
+    def store_to_database(self, db: Session, data: dict):
+        """Store a single scraped product in the database and log actions."""
+        return self.store_products(db, [data])
 
-        else:
-            # Add new product with the predicted category ID
-            new_product = Product(
-                title=title,
-                price=price,
-                info=info,
-                search_value=search_value,
-                link=link,
-                image_url=image_url,
-                availability=True,
-                store_id=store.store_id,
-                category_id=predicted_category_id,  # Use the predicted category
-                last_updated=datetime.now(timezone.utc)  # For a brand-new product
-            )
-            db.add(new_product)
-            db.commit()
-            print(f"[{search_value}][{current_index}/{total_values}][{store_name}][Product ID: {new_product.product_id}] {title}: Added to database with category {predicted_category_id}.")
+    @staticmethod
+    def product_data(product, search_value, current_index, total_values):
+        """The store_to_database input for a scraped product."""
+        return {
+            "store": product["store"],
+            "title": product["title"],
+            "price": product["price"],
+            "info": product["info"],
+            "search_value": search_value,
+            "link": product["link"],
+            "image_url": product["image_url"],
+            "current_index": current_index,
+            "total_values": total_values
+        }
 
-    def run_scraper_for_value(self, scraper, search_value, current_index, total_values):
-        """Run a single scraper for a given search value."""
+    def run_scraper_for_value(self, scraper, search_value, current_index, total_values, handle_product=None):
+        """
+        Run a single scraper for a given search value. Returns the number of products handled.
+        Each product is passed to handle_product(product_data); by default products are
+        stored in batches of write_batch_size.
+        """
+        stored = 0
+        batch = []
         with Session(engine) as db:
+            if handle_product is None:
+                def handle_product(product_data):
+                    batch.append(product_data)
+                    if len(batch) >= self.write_batch_size:
+                        self._store_batch(db, batch)
             print(f"[{search_value}][{current_index}/{total_values}] Using scraper: {scraper.store_name}")
             retries = 3
             while retries > 0:
+                stored = 0
                 try:
-                    if not scraper.driver:
-                        scraper.driver = scraper.setup_driver()
-
                     for product in scraper.scrape_products(search_value):
-                        product_data = {
-                            "store": product["store"],
-                            "title": product["title"],
-                            "price": product["price"],
-                            "info": product["info"],
-                            "search_value": search_value,
-                            "link": product["link"],
-                            "image_url": product["image_url"],
-                            "current_index": current_index,
-                            "total_values": total_values
-                        }
-                        self.store_to_database(db, product_data)
+                        handle_product(self.product_data(product, search_value, current_index, total_values))
+                        stored += 1
+                    self._store_batch(db, batch)
                     break
 
                 except Exception as e:
+                    # Keep the products scraped before the error
+                    self._store_batch(db, batch)
                     retries -= 1
                     print(
                         f"[{search_value}][{current_index}/{total_values}][{scraper.store_name}] Error: {e}. Retries left: {retries}"
@@ -175,28 +145,313 @@ class ScraperManager:
                         print(
                             f"[{search_value}][{current_index}/{total_values}][{scraper.store_name}] Failed after multiple attempts. Skipping."
                         )
+                        self.failed_search_values.add(search_value)
                     else:
                         time.sleep(5)
 
             scraper.quit_driver()
+        return stored
 
-    def scrape_all_products(self):
-        """Scrape products sequentially for each store."""
+    def scrape_all_products(self, stop_event=None):
+        """
+        Scrape products sequentially for each store.
+        If stop_event is set, stops after the current search value.
+        Returns the number of products stored.
+        """
         start_time = time.time()
-        search_values = self.load_search_values()
+        search_values = self.due_search_values()
         total_values = len(search_values)
+        stored = 0
+        crawled = []
+        self.start_crawl_diff()
 
         for i, search_value in enumerate(search_values, start=1):
+            if stop_event is not None and stop_event.is_set():
+                print(f"\nScraping stopped before search value '{search_value}' ({i}/{total_values}).")
+                break
             print(f"\nStarting scraping for search value: '{search_value}' ({i}/{total_values})")
 
             for scraper in self.scrapers:
-                self.run_scraper_for_value(scraper, search_value, i, total_values)
+                stored += self.run_scraper_for_value(scraper, search_value, i, total_values)
+            crawled.append(search_value)
 
         end_time = time.time()
         elapsed_time = end_time - start_time
         print(f"\nAll scraping completed in {elapsed_time:.2f} seconds.")
+        self.print_fetch_stats()
+        self.record_search_values(crawled)
+        self.end_crawl_diff()
+        return stored
+
+    def scrape_all_products_concurrently(self, workers_per_store=1, stop_event=None, queue_size=500):
+        """
+        Scrape all stores at the same time.
+
+        Every store gets its own queue of search values and workers_per_store
+        worker threads, each owning its own WebDriver, so at most
+        workers_per_store browsers run per store. Stores with server-rendered
+        search pages get a single thread instead, which keeps many pages in
+        flight with the async engine. Workers only scrape; scraped
+        products go through a bounded queue to a single writer thread, which
+        stores the new and changed ones in batches, in the order they were
+        scraped (one DB session, no concurrent writes to the same product).
+        Returns the number of products stored.
+        """
+        start_time = time.time()
+        search_values = self.due_search_values()
+        total_values = len(search_values)
+        results = queue.Queue(maxsize=queue_size)
+        outcome = {}
+        self.start_crawl_diff()
+
+        writer = threading.Thread(target=self._write_products, args=(results, outcome), name="scraper-writer")
+        writer.start()
+
+        workers = []
+        for store_scraper in self.scrapers:
+            if store_scraper.server_rendered_search and http_fetcher is not None:
+                worker = threading.Thread(
+                    target=self._http_store_worker,
+                    args=(store_scraper, search_values, results, total_values, stop_event),
+                    name=f"scraper-{store_scraper.store_name}-http",
+                )
+                worker.start()
+                workers.append(worker)
+                continue
+
+            values = queue.Queue()
+            for i, search_value in enumerate(search_values, start=1):
+                values.put((i, search_value))
+
+            for n in range(workers_per_store):
+                # The first worker reuses the manager's scraper, the others get their own (and their own driver)
+                worker = threading.Thread(
+                    target=self._store_worker,
+                    args=(store_scraper if n == 0 else None, type(store_scraper), store_scraper.store_name,
+                          values, results, total_values, stop_event),
+                    name=f"scraper-{store_scraper.store_name}-{n + 1}",
+                )
+                worker.start()
+                workers.append(worker)
+
+        for worker in workers:
+            worker.join()
+        results.put(None)  # All workers are done: let the writer finish
+        writer.join()
+        if "error" in outcome:
+            # The scraped products were not stored: the search values are not recorded as crawled
+            raise RuntimeError(f"Scraper writer failed after storing {outcome['stored']} products") \
+                from outcome["error"]
+
+        elapsed_time = time.time() - start_time
+        print(f"\nAll scraping completed in {elapsed_time:.2f} seconds "
+              f"({len(self.scrapers)} stores x {workers_per_store} worker(s)).")
+        self.print_fetch_stats()
+        if stop_event is not None and stop_event.is_set():
+            # Values left in the workers' queues were not crawled
+            self.record_search_values([value for value in search_values if value in self.crawl_diff.search_terms])
+        else:
+            self.record_search_values(search_values)
+        self.end_crawl_diff()
+        return outcome["stored"]
+
+    def start_crawl_diff(self):
+        """Fingerprint the stored products, so the crawl only writes what is new or changed."""
+        with Session(engine) as db:
+            self.crawl_diff = CrawlDiff.from_database(db)
+        self.failed_search_values = set()
+        print(f"[INFO] Crawl diff seeded with {len(self.crawl_diff.fingerprints)} stored products.")
+
+    def end_crawl_diff(self):
+        print(f"[INFO] Crawl diff: {self.crawl_diff.summary()}.")
+        self.crawl_diff = None
+
+    @staticmethod
+    def print_fetch_stats():
+        """
+        Per-store share of pages that were parsed from plain HTTP, without Chrome,
+        and average size and load time of the pages loaded in Chrome.
+        """
+        if http_fetcher is not None:
+            for store_name, (successes, attempts) in http_fetcher.stats.summary().items():
+                print(f"[{store_name}] HTTP-first success ratio: {successes}/{attempts} ({successes / attempts:.0%})")
+        for store_name, (pages, kilobytes, load_ms) in page_load_stats.summary().items():
+            print(f"[{store_name}] Chrome pages: {pages}, {kilobytes:.0f} KB and {load_ms:.0f} ms per page on average")
+
+    def _store_worker(self, scraper, scraper_class, store_name, values, results, total_values, stop_event):
+        """Take search values from a store's queue until it is empty and push scraped products to results."""
+        if scraper is None:
+            try:
+                scraper = scraper_class(store_name)
+            except Exception as e:
+                print(f"[{store_name}] Failed to start a scraper worker: {e}")
+                return
+
+        try:
+            while stop_event is None or not stop_event.is_set():
+                try:
+                    current_index, search_value = values.get_nowait()
+                except queue.Empty:
+                    break
+                self.run_scraper_for_value(scraper, search_value, current_index, total_values,
+                                           handle_product=results.put)
+        finally:
+            scraper.quit_driver()
+
+    def _http_store_worker(self, scraper, search_values, results, total_values, stop_event):
+        """
+        Scrape every search value of a server-rendered store over HTTP from this thread;
+        the values whose first page needs a browser are then scraped with Chrome.
+        """
+        needs_browser = asyncio.run(
+            self._scrape_search_pages_async(scraper, search_values, results, total_values, stop_event)
+        )
+        if needs_browser:
+            print(f"[{scraper.store_name}] {len(needs_browser)} search value(s) need a browser.")
+        browser_scraper = type(scraper)(scraper.store_name, fetcher=None)
+        for current_index, search_value in needs_browser:
+            if stop_event is not None and stop_event.is_set():
+                break
+            self.run_scraper_for_value(browser_scraper, search_value, current_index, total_values,
+                                       handle_product=results.put)
+
+    async def _scrape_search_pages_async(self, scraper, search_values, results, total_values, stop_event,
+                                         max_pages=5):
+        """
+        Walk the search pages of many search values at once. Products go to the
+        results queue as each value completes (put() blocks while the writer is
+        behind, which throttles the crawl; it then waits in a thread, so the requests in
+        flight keep going). Returns the (index, value) pairs whose first page could not
+        be parsed from HTTP.
+        """
+        needs_browser = []
+
+        async with AsyncFetcher() as fetcher:
+            async def scrape_value(indexed_value):
+                _, search_value = indexed_value
+                products = []
+                for page in range(1, max_pages + 1):
+                    result = await fetcher.fetch_and_parse(
+                        scraper.store_name, scraper.search_page_url(search_value, page), scraper.parse_search_page
+                    )
+                    if result is None:
+                        # Keep the pages already read, like the browser path stopping at a failed page
+                        return products if page > 1 else None
+                    page_products, has_next_page = result
+                    products += page_products
+                    if not has_next_page:
+                        break
+                return products
+
+            async with aclosing(stream(enumerate(search_values, start=1), scrape_value)) as scraped:
+                async for (current_index, search_value), products in scraped:
+                    if products is None:
+                        needs_browser.append((current_index, search_value))
+                    else:
+                        print(f"[{search_value}][{current_index}/{total_values}][{scraper.store_name}] "
+                              f"{len(products)} products over HTTP")
+                        for product in products:
+                            product_data = self.product_data(product, search_value, current_index, total_values)
+                            try:
+                                results.put_nowait(product_data)
+                            except queue.Full:
+                                await asyncio.to_thread(results.put, product_data)
+                    if stop_event is not None and stop_event.is_set():
+                        break
+
+        for store_name, (successes, attempts) in fetcher.stats.summary().items():
+            print(f"[{store_name}] {successes}/{attempts} search pages parsed over HTTP.")
+        return needs_browser
+
+    def _store_batch(self, db, batch):
+        """
+        Store the products of batch and empty it. During a crawl, unchanged products and
+        products already stored by the crawl are skipped. When the batch fails, its products
+        are stored one by one, so that a bad product only loses itself. Returns the number of
+        products handled (stored or skipped).
+        """
+        skipped = 0
+        if self.crawl_diff is not None:
+            size = len(batch)
+            batch[:] = [product_data for product_data in batch if self.crawl_diff.should_store(product_data)]
+            skipped = size - len(batch)
+        if not batch:
+            return skipped
+        try:
+            count = self.store_products(db, batch)
+            self._commit_seen(batch)
+            return skipped + count
+        except Exception as e:
+            db.rollback()
+            failed = [(batch[0], e)] if len(batch) == 1 else []
+            count = 0
+            if len(batch) > 1:
+                print(f"[WARN] Failed to store a batch of {len(batch)} products ({e}); storing them one by one.")
+                for product_data in batch:
+                    try:
+                        count += self.store_to_database(db, product_data)
+                        self._commit_seen([product_data])
+                    except Exception as product_error:
+                        db.rollback()
+                        failed.append((product_data, product_error))
+            for product_data, error in failed:
+                print(f"[{product_data['search_value']}][{product_data['store']}] "
+                      f"Failed to store {product_data['title']}: {error}")
+            if self.crawl_diff is not None:
+                self.crawl_diff.forget([product_data for product_data, _ in failed])
+            return skipped + count
+        finally:
+            batch.clear()
+
+    def _commit_seen(self, batch):
+        if self.crawl_diff is not None:
+            self.crawl_diff.commit_seen(batch)
+
+    def _write_products(self, results, outcome):
+        """
+        Single DB writer: store products from the results queue until it receives None,
+        in batches of the products waiting in the queue (up to write_batch_size).
+        Sets outcome["stored"] to the number of products stored, and outcome["error"] if
+        the writer failed; it then keeps consuming the queue, so the workers never block on it.
+        """
+        count = 0
+        done = False
+        try:
+            with Session(engine) as db:
+                while not done:
+                    batch = [results.get()]
+                    if batch[0] is None:
+                        done = True
+                        break
+                    while len(batch) < self.write_batch_size:
+                        try:
+                            product_data = results.get_nowait()
+                        except queue.Empty:
+                            break
+                        if product_data is None:
+                            done = True
+                            break
+                        batch.append(product_data)
+                    count += self._store_batch(db, batch)
+        except Exception as e:
+            outcome["error"] = e
+            print(f"[ERROR] Scraper writer failed: {e}. Discarding the remaining products.")
+            while not done:
+                done = results.get() is None
+        finally:
+            outcome["stored"] = count
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrape all stores for every search value.")
+    parser.add_argument('--workers_per_store', type=int, default=None,
+                        help='Scrape stores concurrently with this many browsers per store (default: sequential).')
+    args = parser.parse_args()
+
     manager = ScraperManager("search_values.json")
-    manager.scrape_all_products()
+    if args.workers_per_store:
+        manager.scrape_all_products_concurrently(workers_per_store=args.workers_per_store)
+    else:
+        manager.scrape_all_products()
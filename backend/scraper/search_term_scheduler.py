@@ -0,0 +1,93 @@
+# backend/scraper/search_term_scheduler.py
+"""
+Adaptive recrawl of search values: each value has a next-due time, and a crawl
+only covers the values that are due (values never crawled are always due).
+
+After a crawl, the share of new products and of products with a new price found
+through a value (smoothed over crawls) decides its next interval: halved when at
+least RECRAWL_CHANGE_TARGET of its products changed, otherwise 1.5 times longer,
+within RECRAWL_MIN_HOURS and RECRAWL_MAX_HOURS. A crawl that failed or found
+nothing says nothing about the value: it keeps its current interval (postpone).
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import SearchTermStats
+
+load_dotenv()
+
+ADAPTIVE_RECRAWL_ENABLED = os.getenv("ADAPTIVE_RECRAWL_ENABLED", "true").lower() == "true"
+RECRAWL_MIN_HOURS = float(os.getenv("RECRAWL_MIN_HOURS", "1"))
+RECRAWL_MAX_HOURS = float(os.getenv("RECRAWL_MAX_HOURS", "48"))
+RECRAWL_CHANGE_TARGET = float(os.getenv("RECRAWL_CHANGE_TARGET", "0.1"))
+
+# Weight of the latest crawl in the smoothed rates
+RATE_SMOOTHING = 0.5
+
+
+class SearchTermScheduler:
+    def __init__(self, min_hours=RECRAWL_MIN_HOURS, max_hours=RECRAWL_MAX_HOURS, change_target=RECRAWL_CHANGE_TARGET):
+        self.min_hours = min_hours
+        self.max_hours = max_hours
+        self.change_target = change_target
+
+    def due(self, db: Session, search_values, now=None):
+        """The search values due for a crawl, in their given order."""
+        now = now or datetime.now(timezone.utc)
+        not_due = set(db.scalars(
+            select(SearchTermStats.search_value).where(SearchTermStats.next_due_at > now)
+        ))
+        return [search_value for search_value in search_values if search_value not in not_due]
+
+    def next_interval(self, stats):
+        """Hours until the next crawl of a search value, from its smoothed rates."""
+        if stats.interval_hours is None:
+            return self.min_hours
+        if (stats.new_rate or 0.0) + (stats.price_change_rate or 0.0) >= self.change_target:
+            hours = stats.interval_hours / 2
+        else:
+            hours = stats.interval_hours * 1.5
+        return min(self.max_hours, max(self.min_hours, hours))
+
+    def record(self, db: Session, search_value, found, new, price_changed, now=None):
+        """Update the stats of a crawled search value and schedule its next crawl (committed by the caller)."""
+        now = now or datetime.now(timezone.utc)
+        stats = db.get(SearchTermStats, search_value)
+        if stats is None:
+            stats = SearchTermStats(search_value=search_value, crawls=0)
+            db.add(stats)
+
+        # A first crawl finds only new products, which says nothing about how often they change:
+        # it keeps the shortest interval and is not part of the smoothed rates
+        first_crawl = not stats.crawls
+        new_rate = new / found if found else 0.0
+        price_change_rate = price_changed / found if found else 0.0
+        if (stats.crawls or 0) > 1:
+            new_rate = RATE_SMOOTHING * new_rate + (1 - RATE_SMOOTHING) * (stats.new_rate or 0.0)
+            price_change_rate = (RATE_SMOOTHING * price_change_rate
+                                 + (1 - RATE_SMOOTHING) * (stats.price_change_rate or 0.0))
+        stats.crawls = (stats.crawls or 0) + 1
+        stats.last_yield = found
+        stats.new_rate = new_rate
+        stats.price_change_rate = price_change_rate
+        stats.interval_hours = self.min_hours if first_crawl else self.next_interval(stats)
+        stats.last_crawled_at = now
+        stats.next_due_at = now + timedelta(hours=stats.interval_hours)
+        return stats
+
+    def postpone(self, db: Session, search_value, now=None):
+        """
+        Schedule the next crawl of a search value whose crawl failed or found nothing
+        after its current interval, leaving its stats as they are (committed by the caller).
+        """
+        now = now or datetime.now(timezone.utc)
+        stats = db.get(SearchTermStats, search_value)
+        if stats is None:
+            stats = SearchTermStats(search_value=search_value, crawls=0)
+            db.add(stats)
+        stats.next_due_at = now + timedelta(hours=stats.interval_hours or self.min_hours)
+        return stats
@@ -0,0 +1,77 @@
+# backend/scraper/stage_timer.py
+"""
+Time spent per crawl stage (fetch, parse, classify, persist), summed over all
+threads and tasks. Stages can nest: a stage only counts its own time, e.g.
+persisting a product does not include classifying it.
+
+    @stage_timer.timed("parse")
+    def parse_search_page(self, html): ...
+
+    with stage_timer.stage("persist"):
+        ...
+"""
+import time
+import inspect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+
+# Seconds spent in the nested stages of the innermost running stage (per thread / asyncio task)
+_current_children = contextvars.ContextVar("stage_timer_children", default=None)
+
+
+class StageTimer:
+    def __init__(self):
+        self._seconds = defaultdict(float)
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        children = [0.0]
+        token = _current_children.set(children)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_children.reset(token)
+            parent = _current_children.get()
+            if parent is not None:
+                parent[0] += elapsed
+            with self._lock:
+                self._seconds[name] += elapsed - children[0]
+                self._counts[name] += 1
+
+    def timed(self, name):
+        """Decorator running a function (or coroutine function) inside stage(name)."""
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.stage(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        """{stage: (calls, seconds)}"""
+        with self._lock:
+            return {name: (self._counts[name], seconds) for name, seconds in self._seconds.items()}
+
+    def reset(self):
+        with self._lock:
+            self._seconds.clear()
+            self._counts.clear()
+
+
+# Shared by the scrapers, fetchers and managers of the process
+stage_timer = StageTimer()
@@ -0,0 +1,254 @@
+# backend/scraper/store_simulator.py
+"""
+Local HTTP simulator of the three stores, for benchmarking the crawl without
+touching the real sites. Search and product pages carry the markup the scrapers
+select on; products are derived from the search term, so every run sees the same
+catalogue. Latency, failures (503) and price changes are configurable.
+
+Point the scrapers at it with base_url or <STORE>_BASE_URL, e.g.
+AMAZON_BASE_URL=http://127.0.0.1:8800/amazon:
+
+    python -m scraper.store_simulator --port 8800 --latency_ms 80 --failure_rate 0.02
+"""
+import time
+import zlib
+import random
+import argparse
+import threading
+from collections import Counter
+from urllib.parse import urlsplit, parse_qs, urlencode, quote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STORES = ("amazon", "jarir", "extra")
+BRANDS = ("Samsung", "Apple", "HP", "Lenovo", "Sony", "Xiaomi", "Dell", "Huawei", "Asus", "Canon")
+
+
+class StoreSimulator:
+    """
+    :param latency_ms: Mean response time added to every request (normally distributed, +/- jitter_ms).
+    :param failure_rate: Share of requests answered with 503.
+    :param price_change_rate: Share of product page views showing a price different from the search page.
+    :param unavailable_rate: Share of products shown as out of stock on their product page.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=50, jitter_ms=20, failure_rate=0.0,
+                 products_per_page=24, pages_per_search=3, price_change_rate=0.1, unavailable_rate=0.05, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.products_per_page = products_per_page
+        self.pages_per_search = pages_per_search
+        self.price_change_rate = price_change_rate
+        self.unavailable_rate = unavailable_rate
+        self.requests = Counter()
+        self.failures = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def root_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_url(self, store_key):
+        return f"{self.root_url}/{store_key}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="store-simulator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # -------------------------------
+    # Catalogue
+    # -------------------------------
+    def _chance(self, rate):
+        with self._lock:
+            return self._random.random() < rate
+
+    @staticmethod
+    def product_id(store_key, term, page, index):
+        return zlib.crc32(f"{store_key}|{term}|{page}|{index}".encode()) % 10 ** 9
+
+    @staticmethod
+    def title(product_id, term=None):
+        brand = BRANDS[product_id % len(BRANDS)]
+        return f"{brand} {term.title() if term else 'Product'} Model {product_id}"
+
+    @staticmethod
+    def base_price(product_id):
+        return 49 + product_id % 5000
+
+    def search_results(self, store_key, term, page):
+        """[(product_id, title, price)] of a search results page."""
+        return [
+            (pid, self.title(pid, term), self.base_price(pid))
+            for pid in (self.product_id(store_key, term, page, i) for i in range(self.products_per_page))
+        ]
+
+    def product_page_state(self, product_id):
+        """(available, price) shown on a product page."""
+        available = (product_id % 1000) / 1000 >= self.unavailable_rate
+        price = self.base_price(product_id)
+        if self._chance(self.price_change_rate):
+            price = round(price * self._random.choice((0.9, 0.95, 1.05, 1.1)))
+        return available, price
+
+    # -------------------------------
+    # Pages
+    # -------------------------------
+    def render(self, store_key, path, query):
+        """HTML for a store path, or None when the path is unknown."""
+        if store_key == "amazon":
+            if path == "/s":
+                page = int(query.get("page", ["1"])[0])
+                return self._amazon_search(query.get("k", [""])[0], page)
+            if "/dp/" in path:
+                return self._amazon_product(int(path.rsplit("/dp/", 1)[1].strip("/")))
+        elif store_key == "jarir":
+            if path == "/sa-en/catalogsearch/result":
+                return self._jarir_search(query.get("search", [""])[0])
+            if path.endswith(".html"):
+                return self._jarir_product(int(path[:-len(".html")].rsplit("-", 1)[1]))
+        elif store_key == "extra":
+            if path.rstrip("/") == "/en-sa/search":
+                return self._extra_search(query.get("text", [""])[0], int(query.get("pg", ["1"])[0]), query)
+            if "/p/" in path:
+                return self._extra_product(int(path.rsplit("/p/", 1)[1].strip("/")))
+        return None
+
+    @staticmethod
+    def _page(title, body):
+        return f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{title}</title></head><body>{body}</body></html>'
+
+    def _amazon_search(self, term, page):
+        tiles = "".join(f"""
+<div class="s-result-item s-asin" data-asin="{pid}" data-component-type="s-search-result">
+  <a class="a-link-normal s-line-clamp-4 s-link-style a-text-normal" href="/{quote(title.replace(' ', '-'))}/dp/{pid}"><h2 class="a-size-base-plus a-spacing-none a-color-base a-text-normal"><span>{title}</span></h2></a>
+  <span class="a-price"><span class="a-offscreen">SAR {price:,}.00</span></span>
+  <img class="s-image" src="/images/{pid}.jpg" alt="">
+</div>""" for pid, title, price in self.search_results("amazon", term, page))
+        next_link = (f'<a class="s-pagination-next" href="/s?{urlencode({"k": term, "page": page + 1})}">Next</a>'
+                     if page < self.pages_per_search else '<span class="s-pagination-next s-pagination-disabled">Next</span>')
+        return self._page(f"Amazon.sa : {term}", f'<div class="s-main-slot">{tiles}</div>{next_link}')
+
+    def _amazon_product(self, pid):
+        available, price = self.product_page_state(pid)
+        if available:
+            buybox = (f'<div id="availability"><span>In Stock</span></div><input id="add-to-cart-button" type="submit">'
+                      f'<span class="a-price a-text-price a-size-medium apexPriceToPay"><span class="a-offscreen">SAR {price:,}.00</span></span>')
+        else:
+            buybox = '<div id="availability"><span>Currently unavailable.</span></div>'
+        return self._page(self.title(pid), f'<span id="productTitle">{self.title(pid)}</span>{buybox}')
+
+    def _jarir_search(self, term):
+        # Infinite scroll in the real store: every tile is served at once
+        tiles = "".join(f"""
+<div class="product-tile__item product-tile__item--spacer">
+  <a class="product-tile__link" href="/sa-en/{quote(title.lower().replace(' ', '-'))}-{pid}.html"><p class="product-title__title">{title}</p><p class="product-title__info"><span>{pid % 16 + 1}GB</span><span>Black</span></p></a>
+  <div class="price"><span class="price__currency">SAR</span><span>{price:,}</span></div>
+  <img class="image--contain" loading="eager" src="/images/{pid}.jpg?locale=en-GB,ar-SA" alt="">
+</div>""" for page in range(1, self.pages_per_search + 1) for pid, title, price in self.search_results("jarir", term, page))
+        return self._page("Jarir Bookstore", f'<div class="product-list">{tiles}</div>')
+
+    def _jarir_product(self, pid):
+        available, price = self.product_page_state(pid)
+        button = ('<button class="button button--add-to-cart button--primary button--fluid">Add to cart</button>' if available
+                  else '<button class="button button--primary button--fluid button--secondary">Notify me</button>')
+        return self._page(self.title(pid), f"""
+<h2 class="product-title__title">{self.title(pid)}</h2>
+<div class="price-box__row"><div class="price"><span class="price__currency">SAR</span><span>{price:,}</span></div></div>
+{button}""")
+
+    def _extra_search(self, term, page, query):
+        tiles = "".join(f"""
+<section class="product-tile-wrapper">
+  <a class="product-tile-content-wrapper" href="/en-sa/p/{pid}"><picture><img src="/images/{pid}_800.jpg" alt=""></picture>
+    <span class="product-name-data">{title}</span><ul class="product-stats"><li>{pid % 16 + 1}GB</li><li>Black</li></ul>
+    <section class="price"><span class="price"><strong>{price:,}</strong></span></section></a>
+</section>""" for pid, title, price in self.search_results("extra", term, page))
+        next_query = urlencode({**{key: values[0] for key, values in query.items()}, "pg": page + 1})
+        hidden = " hidden" if page >= self.pages_per_search else ""
+        pagination = (f'<ul class="pagination"><li class="next"><div class="icon-inline{hidden}" '
+                      f'onclick="location.search = \'?{next_query}\'">&gt;</div></li></ul>')
+        return self._page("eXtra", f'<div class="product-list">{tiles}</div>{pagination}')
+
+    def _extra_product(self, pid):
+        available, price = self.product_page_state(pid)
+        status = "" if available else '<div class="product-status-text svelte-agjy">Unavailable</div>'
+        return self._page(self.title(pid), f"""
+<h1 class="product-name">{self.title(pid)}</h1>{status}
+<section class="price"><span class="price"><strong>{price:,}</strong> <span>SAR</span></span></section>""")
+
+    # -------------------------------
+    # HTTP
+    # -------------------------------
+    def _handler_class(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real stores
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                store_key, _, path = url.path.lstrip("/").partition("/")
+                with simulator._lock:
+                    simulator.requests[store_key] += 1
+                    delay = max(0.0, simulator._random.gauss(simulator.latency_ms, simulator.jitter_ms)) / 1000
+                time.sleep(delay)
+
+                if simulator._chance(simulator.failure_rate):
+                    with simulator._lock:
+                        simulator.failures[store_key] += 1
+                    self._respond(503, "<html><body>Service Unavailable</body></html>")
+                    return
+
+                html = simulator.render(store_key, "/" + path, parse_qs(url.query)) if store_key in STORES else None
+                if html is None:
+                    self._respond(404, "<html><body>Not found</body></html>")
+                else:
+                    self._respond(200, html)
+
+            def _respond(self, status, html):
+                body = html.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve simulated Amazon, Jarir and Extra pages.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency_ms", type=float, default=50)
+    parser.add_argument("--failure_rate", type=float, default=0.0)
+    parser.add_argument("--price_change_rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    simulator = StoreSimulator(args.host, args.port, latency_ms=args.latency_ms, failure_rate=args.failure_rate,
+                               price_change_rate=args.price_change_rate)
+    for store_key in STORES:
+        print(f"{store_key}: {simulator.base_url(store_key)}")
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        simulator.server.server_close()
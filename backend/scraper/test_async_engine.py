@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+import unittest
+from contextlib import aclosing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scraper.async_engine import AsyncFetcher, TokenBucket, stream
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Serves /ok/<n>; /flaky answers 503 once, then 200. Tracks concurrent requests."""
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    flaky_calls = 0
+
+    def do_GET(self):
+        cls = FlakyHandler
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            if self.path == "/flaky":
+                cls.flaky_calls += 1
+            status = 503 if self.path == "/flaky" and cls.flaky_calls == 1 else 200
+        time.sleep(0.05)
+
+        body = f"<html><body><p id='path'>{self.path}</p></body></html>".encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with cls.lock:
+            cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAsyncEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_stream_respects_the_per_host_limit(self):
+        FlakyHandler.max_in_flight = 0
+
+        async def crawl():
+            async with AsyncFetcher(max_per_host=3, requests_per_second=1000, burst=1000) as fetcher:
+                urls = [f"{self.base_url}/ok/{i}" for i in range(12)]
+                return [result async for _, result in stream(urls, fetcher.fetch, concurrency=10)]
+
+        pages = asyncio.run(crawl())
+        self.assertEqual(len(pages), 12)
+        self.assertTrue(all("<p id='path'>/ok/" in page for page in pages))
+        self.assertLessEqual(FlakyHandler.max_in_flight, 3)
+
+    def test_retries_after_a_server_error(self):
+        FlakyHandler.flaky_calls = 0
+
+        async def fetch():
+            async with AsyncFetcher(retries=1, backoff_seconds=0.01) as fetcher:
+                return await fetcher.fetch(f"{self.base_url}/flaky")
+
+        self.assertIn("/flaky", asyncio.run(fetch()))
+        self.assertEqual(FlakyHandler.flaky_calls, 2)
+
+    def test_token_bucket_limits_the_request_rate(self):
+        async def take(count):
+            bucket = TokenBucket(rate=20, capacity=1)
+            start = time.monotonic()
+            for _ in range(count):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        # One token is available at once, the other 4 come at 20 per second
+        self.assertGreaterEqual(asyncio.run(take(5)), 0.19)
+
+    def test_stopping_early_cancels_requests_in_flight(self):
+        async def run():
+            started, cancelled = [], []
+
+            async def handler(item):
+                started.append(item)
+                try:
+                    await asyncio.sleep(0 if item == 0 else 10)
+                except asyncio.CancelledError:
+                    cancelled.append(item)
+                    raise
+                return item
+
+            async with aclosing(stream(range(5), handler, concurrency=3)) as results:
+                async for item, _ in results:
+                    break
+            await asyncio.sleep(0)  # Let the cancellations run
+            return started, cancelled
+
+        started, cancelled = asyncio.run(run())
+        self.assertEqual(sorted(cancelled), sorted(started[1:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from models import Product, Store, Alert, engine
+from scraper.availability_priority import AvailabilityQueue
+
+
+class TestAvailabilityQueue(unittest.TestCase):
+    def setUp(self):
+        self.db = Session(engine)
+        self.now = datetime.now(timezone.utc)
+        store = Store(store_name="Priority Test Store")
+        self.db.add(store)
+        self.db.flush()
+        self.store_id = store.store_id
+
+    def tearDown(self):
+        self.db.rollback()
+        product_ids = [product.product_id for product in self.db.query(Product).filter_by(store_id=self.store_id)]
+        self.db.query(Alert).filter(Alert.product_id.in_(product_ids)).delete()
+        self.db.query(Product).filter(Product.product_id.in_(product_ids)).delete()
+        self.db.query(Store).filter_by(store_id=self.store_id).delete()
+        self.db.commit()
+        self.db.close()
+
+    def add_product(self, title, checked_days_ago=None, alerts=0):
+        last_checked = None if checked_days_ago is None else self.now - timedelta(days=checked_days_ago)
+        product = Product(title=title, store_id=self.store_id, link="http://example.com", last_checked=last_checked)
+        self.db.add(product)
+        self.db.flush()
+        for _ in range(alerts):
+            self.db.add(Alert(user_id=1, product_id=product.product_id, threshold_price=10, alert_status="active"))
+        self.db.commit()
+        return product.product_id
+
+    def test_watched_and_stale_products_come_first(self):
+        recent = self.add_product("recent", checked_days_ago=0.1)
+        week_old = self.add_product("week old", checked_days_ago=7)
+        never = self.add_product("never checked")
+        watched = self.add_product("watched", checked_days_ago=0.1, alerts=1)
+
+        queue = AvailabilityQueue.from_database(self.db, self.now)
+        self.assertEqual(queue.next_batch(self.db, 2), [never, watched])
+        queue.mark_checked(self.db, [never, watched])
+        self.assertEqual(queue.next_batch(self.db, 2), [week_old, recent])
+
+    def test_checked_products_wait_for_the_next_cycle(self):
+        first = self.add_product("first", checked_days_ago=2)
+        second = self.add_product("second", checked_days_ago=1)
+
+        queue = AvailabilityQueue.from_database(self.db, self.now)
+        self.assertEqual(queue.next_batch(self.db, 1), [first])
+        queue.mark_checked(self.db, [first])
+        self.assertEqual(queue.next_batch(self.db, 5), [second])
+        queue.mark_checked(self.db, [second])
+        self.assertEqual(queue.next_batch(self.db, 5), [])
+
+        self.assertEqual(AvailabilityQueue.from_database(self.db).next_batch(self.db, 5), [first, second])
+
+
+if __name__ == "__main__":
+    unittest.main()
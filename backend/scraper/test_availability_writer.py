@@ -0,0 +1,136 @@
+import threading
+import unittest
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import Product, Store, ProductPriceHistory, AvailabilityCheckpoint, engine
+from scraper.availability_writer import AvailabilityWriter, load_checkpoint, save_checkpoint
+from scraper.availability_checker import AvailabilityChecker, CHECKPOINT_NAME
+
+STORE_NAME = "Availability Test Store"
+
+
+class FakeScraper:
+    """Scrapes every product as available at 5.0, stopping the run after `stop_after` pages."""
+
+    def __init__(self, stop_event=None, stop_after=None):
+        self.links = []
+        self.created = 0
+        self.stop_event = stop_event
+        self.stop_after = stop_after
+
+    def __call__(self, store_name, fetcher=None):
+        # Stands in for the scraper class
+        self.created += 1
+        return self
+
+    def scrape_availability(self, link):
+        self.links.append(link)
+        if self.stop_after is not None and len(self.links) >= self.stop_after:
+            self.stop_event.set()
+        return {"availability": True, "price": "5.0"}
+
+    def quit_driver(self):
+        pass
+
+
+class TestAvailabilityWriter(unittest.TestCase):
+    def setUp(self):
+        self.db = Session(engine)
+        store = Store(store_name=STORE_NAME)
+        self.db.add(store)
+        self.db.flush()
+        self.products = [Product(title=f"Product {i}", price=5.0 if i % 2 else None, store_id=store.store_id,
+                                 link=f"http://example.com/{i}", availability=False) for i in range(5)]
+        self.db.add_all(self.products)
+        self.db.commit()
+        self.product_ids = [product.product_id for product in self.products]
+        # A checkpoint of a real pass on this database is put back after the test
+        checkpoint = self.db.get(AvailabilityCheckpoint, CHECKPOINT_NAME)
+        self.saved_checkpoint = (checkpoint.last_product_id,) if checkpoint is not None else None
+
+    def tearDown(self):
+        self.db.rollback()
+        self.db.query(ProductPriceHistory).filter(ProductPriceHistory.product_id.in_(self.product_ids)).delete()
+        self.db.query(Product).filter(Product.product_id.in_(self.product_ids)).delete()
+        self.db.query(Store).filter_by(store_name=STORE_NAME).delete()
+        if self.saved_checkpoint is None:
+            self.db.query(AvailabilityCheckpoint).filter_by(name=CHECKPOINT_NAME).delete()
+        else:
+            save_checkpoint(self.db, CHECKPOINT_NAME, *self.saved_checkpoint)
+        self.db.commit()
+        self.db.close()
+
+    def stored(self):
+        self.db.expire_all()
+        return [self.db.get(Product, product_id) for product_id in self.product_ids]
+
+    def test_updates_are_written_every_commit_every_products(self):
+        writer = AvailabilityWriter(commit_every=3)
+        for product in self.products[:2]:
+            writer.add(product, {"availability": True, "price": "5.0"})
+        self.assertFalse(any(product.availability for product in self.stored()))
+
+        writer.add(self.products[2], {"availability": True, "price": "5.0"})
+        self.assertEqual([product.availability for product in self.stored()], [True, True, True, False, False])
+        self.assertTrue(all(product.last_checked for product in self.stored()[:3]))
+        # Only the products without a price got a new one
+        history = self.db.query(ProductPriceHistory).filter(ProductPriceHistory.product_id.in_(self.product_ids))
+        self.assertEqual(sorted(row.product_id for row in history), [self.product_ids[0], self.product_ids[2]])
+
+    def test_nothing_scraped_is_not_written(self):
+        writer = AvailabilityWriter()
+        self.assertFalse(writer.add(self.products[0], None))
+        self.assertFalse(writer.add(self.products[0], {"availability": None}))
+        self.assertEqual(writer.flush(), 0)
+
+    def test_keyset_pass_resumes_from_the_checkpoint(self):
+        stop_event = threading.Event()
+        first = FakeScraper(stop_event, stop_after=3)
+        checker = AvailabilityChecker(chunk_size=2, start_product_id=self.product_ids[0], http_concurrency=0)
+        checker.scrapers = {STORE_NAME: first}
+        self.assertEqual(checker.update_availability(stop_event), 3)
+        # One scraper for the store over both chunks; the stopped chunk is not checkpointed
+        self.assertEqual(first.created, 1)
+        self.assertEqual(load_checkpoint(self.db, CHECKPOINT_NAME), self.product_ids[1])
+        self.assertEqual([product.availability for product in self.stored()], [True, True, True, False, False])
+
+        second = FakeScraper()
+        checker = AvailabilityChecker(chunk_size=2, http_concurrency=0)
+        checker.scrapers = {STORE_NAME: second}
+        checker.update_availability()
+        self.assertEqual(second.links[:3], [f"http://example.com/{i}" for i in range(2, 5)])
+        self.assertTrue(all(product.availability for product in self.stored()))
+        self.db.expire_all()
+        self.assertIsNone(load_checkpoint(self.db, CHECKPOINT_NAME))
+
+    def test_chunks_cost_a_fixed_number_of_statements(self):
+        store_id = self.products[0].store_id
+        more = [Product(title=f"Product {i}", price=5.0, store_id=store_id, link=f"http://example.com/{i}")
+                for i in range(5, 40)]
+        self.db.add_all(more)
+        self.db.commit()
+        self.product_ids += [product.product_id for product in more]
+
+        statements = []
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            checker = AvailabilityChecker(chunk_size=10, start_product_id=self.product_ids[0], http_concurrency=0)
+            checker.scrapers = {STORE_NAME: FakeScraper()}
+            self.assertEqual(checker.update_availability(), 40)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+
+        # One SELECT per chunk (and the empty one ending the pass), nothing per product
+        product_selects = [statement for statement in statements
+                           if statement.lstrip().startswith("SELECT") and "FROM products" in statement]
+        self.assertEqual(len(product_selects), 5)
+        self.assertLess(len(statements), 40)
+        self.assertTrue(all(product.availability for product in self.stored()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from scraper import browser_profile
+from scraper.browser_profile import PageLoadStats, blocked_urls_for
+from scraper.scraper import JarirScraper
+
+
+class TestBlockedUrls(unittest.TestCase):
+    def test_images_fonts_and_trackers_are_blocked(self):
+        blocked = blocked_urls_for("Amazon")
+        for pattern in ("*.jpg", "*.woff2", "*.mp4", "*googletagmanager.com*"):
+            self.assertIn(pattern, blocked)
+
+    def test_store_allowlist_is_not_blocked(self):
+        with patch.dict(browser_profile.STORE_ALLOWLISTS, {"Jarir": ["*.svg"]}), \
+                patch.dict(os.environ, {"LEAN_BROWSER_ALLOW_JARIR": "*.woff2, *hotjar.com*"}):
+            blocked = blocked_urls_for("Jarir")
+            self.assertIn("*.svg", blocked_urls_for("Extra"))
+
+        for pattern in ("*.svg", "*.woff2", "*hotjar.com*"):
+            self.assertNotIn(pattern, blocked)
+        self.assertIn("*.jpg", blocked)
+
+
+class TestScraperPageLoads(unittest.TestCase):
+    def setUp(self):
+        self.stats = PageLoadStats()
+        self.driver = MagicMock()
+        self.driver.execute_script.return_value = {"bytes": 2048, "resources": 3, "dom_content_loaded_ms": 150,
+                                                   "load_ms": None}
+        self.scraper = JarirScraper("Jarir", driver_pool=None, fetcher=None)
+        self.scraper.setup_driver = MagicMock(return_value=self.driver)
+
+    def test_blocking_is_applied_once_per_driver(self):
+        with patch("scraper.scraper.page_load_stats", self.stats):
+            self.scraper.load_page("https://www.jarir.com/a")
+            self.scraper.load_page("https://www.jarir.com/b")
+
+        blocking_calls = [c for c in self.driver.execute_cdp_cmd.call_args_list if c.args[0] == "Network.setBlockedURLs"]
+        self.assertEqual(len(blocking_calls), 1)
+        self.assertEqual(blocking_calls[0].args[1], {"urls": blocked_urls_for("Jarir")})
+
+    def test_each_page_is_measured_once_done_with(self):
+        with patch("scraper.scraper.page_load_stats", self.stats):
+            self.scraper.load_page("https://www.jarir.com/a")
+            self.assertEqual(self.stats.summary(), {})
+            self.scraper.load_page("https://www.jarir.com/b")
+            self.scraper.quit_driver()
+            self.scraper.quit_driver()
+
+        self.assertEqual(self.stats.summary(), {"Jarir": (2, 2.0, 150.0)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from sqlalchemy.orm import Session
+
+from models import Product, Store, engine
+from scraper.crawl_diff import CrawlDiff
+
+
+def product_data(title, price="10", link="http://example.com/a", store="Diff Test Store", search_value="diff test"):
+    return {"store": store, "title": title, "price": price, "link": link,
+            "image_url": "http://example.com/a.jpg", "search_value": search_value}
+
+
+class TestCrawlDiff(unittest.TestCase):
+    def setUp(self):
+        with Session(engine) as db:
+            store = Store(store_name="Diff Test Store")
+            db.add(store)
+            db.flush()
+            db.add(Product(title="Stored", price=10.0, link="http://example.com/a",
+                           image_url="http://example.com/a.jpg", search_value="diff test", store_id=store.store_id))
+            db.commit()
+            self.crawl_diff = CrawlDiff.from_database(db)
+
+    def tearDown(self):
+        with Session(engine) as db:
+            store = db.query(Store).filter_by(store_name="Diff Test Store").one()
+            db.query(Product).filter_by(store_id=store.store_id).delete()
+            db.delete(store)
+            db.commit()
+
+    def test_only_new_and_changed_products_are_stored(self):
+        self.assertFalse(self.crawl_diff.should_store(product_data("Stored", price="10.00")))
+        self.assertTrue(self.crawl_diff.should_store(product_data("New")))
+        self.assertTrue(self.crawl_diff.should_store(product_data("Stored", store="Other Store")))
+        self.assertEqual((self.crawl_diff.new, self.crawl_diff.unchanged), (2, 1))
+
+    def test_product_found_through_another_search_value_is_stored(self):
+        """The writer updates the search value of a product, so it is part of the fingerprint."""
+        data = product_data("Stored", search_value="other test")
+        self.assertTrue(self.crawl_diff.should_store(data))
+        self.assertEqual(self.crawl_diff.search_terms["other test"]["price_changed"], 0)
+
+    def test_changed_products_are_stored_once_per_crawl(self):
+        self.assertTrue(self.crawl_diff.should_store(product_data("Stored", price="9")))
+        self.crawl_diff.commit_seen([product_data("Stored", price="9")])
+        self.assertFalse(self.crawl_diff.should_store(product_data("Stored", price="8")))
+        self.assertEqual((self.crawl_diff.changed, self.crawl_diff.duplicates), (1, 1))
+
+        # The next crawl starts from the fingerprints of this one
+        for data, expected in ((product_data("Stored", price="9"), False),
+                               (product_data("Stored", price="9", link="http://example.com/b"), True)):
+            next_crawl = CrawlDiff()
+            next_crawl.fingerprints = dict(self.crawl_diff.fingerprints)
+            self.assertEqual(next_crawl.should_store(data), expected)
+
+    def test_failed_writes_are_retried(self):
+        changed = product_data("Stored", price="9")
+        self.assertTrue(self.crawl_diff.should_store(changed))
+        self.crawl_diff.forget([changed])
+        self.assertTrue(self.crawl_diff.should_store(changed))
+
+        # Until its batch commits, the stored fingerprint stays the known one
+        next_crawl = CrawlDiff()
+        next_crawl.fingerprints = dict(self.crawl_diff.fingerprints)
+        self.assertTrue(next_crawl.should_store(changed))
+
+
+if __name__ == "__main__":
+    unittest.main()
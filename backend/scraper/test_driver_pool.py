@@ -0,0 +1,59 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from selenium.common.exceptions import WebDriverException
+
+from scraper.driver_pool import DriverPool, DriverPoolExhausted
+
+
+def fake_driver():
+    driver = MagicMock()
+    driver.execute_script.return_value = 1
+    driver.service.process = None  # No chromedriver process to inspect
+    return driver
+
+
+class TestDriverPool(unittest.TestCase):
+    def setUp(self):
+        self.factory = MagicMock(side_effect=fake_driver)
+        self.pool = DriverPool(size=2, max_pages=3, max_memory_mb=1024, idle_seconds=300,
+                               lease_timeout=0.2, factory=self.factory)
+        self.pool._orphans_checked = True  # Leave the processes of this machine alone
+
+    def test_released_driver_is_reused(self):
+        first = self.pool.acquire()
+        self.pool.release(first)
+        second = self.pool.acquire()
+        self.assertIs(second.driver, first.driver)
+        self.assertEqual(self.factory.call_count, 1)
+
+    def test_driver_is_recycled_after_max_pages(self):
+        pooled = self.pool.acquire()
+        pooled.pages = 3
+        self.pool.release(pooled)
+        pooled.driver.quit.assert_called_once()
+        self.assertIsNot(self.pool.acquire().driver, pooled.driver)
+
+    def test_unhealthy_driver_is_replaced(self):
+        pooled = self.pool.acquire()
+        self.pool.release(pooled)
+        pooled.driver.execute_script.side_effect = WebDriverException("chrome not reachable")
+        replacement = self.pool.acquire()
+        self.assertIsNot(replacement.driver, pooled.driver)
+        pooled.driver.quit.assert_called_once()
+
+    def test_acquire_waits_for_a_release(self):
+        first = self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(DriverPoolExhausted):
+            self.pool.acquire()
+
+        self.pool.lease_timeout = 5
+        threading.Timer(0.1, self.pool.release, args=(first,)).start()
+        self.assertIs(self.pool.acquire().driver, first.driver)
+        self.assertEqual(self.factory.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+from scraper.recorded_pages import recorded_pages, page_parsers
+from scraper.parser_benchmark import installed_backends, regressions
+
+# Products per search page (duplicates and tiles without a title link are dropped)
+EXPECTED_SEARCH_COUNTS = {
+    "amazon_search_en.html": 24,
+    "amazon_search_ar.html": 24,
+    "jarir_search_en.html": 16,
+    "jarir_search_ar.html": 12,
+    "extra_search_en.html": 40,
+    "extra_search_ar.html": 36,
+}
+
+EXPECTED_AVAILABILITY = {
+    "amazon_product_en.html": {"availability": True, "price": "4299.00"},
+    "amazon_product_ar.html": {"availability": True, "price": "4299.00"},
+    "amazon_product_unavailable_en.html": {"availability": False, "price": "N/A"},
+    "amazon_product_not_found_en.html": {"availability": False, "price": "N/A"},  # Delisted product
+    "jarir_product_en.html": {"availability": True, "price": "2399.00"},
+    "jarir_product_ar.html": {"availability": True, "price": "2399.00"},
+    "jarir_product_unavailable_en.html": {"availability": False, "price": "2999.00"},
+    "extra_product_en.html": {"availability": True, "price": "1799.00"},
+    "extra_product_ar.html": {"availability": True, "price": "1799.00"},
+    "extra_product_unavailable_en.html": {"availability": False, "price": "899.00"},
+}
+
+
+class TestRecordedPages(unittest.TestCase):
+    def setUp(self):
+        self.pages = recorded_pages()
+
+    def test_corpus_covers_every_store_page_type_and_language(self):
+        covered = {(page.store_key, page.page_type, page.language) for page in self.pages}
+        for store_key in ("amazon", "jarir", "extra"):
+            for page_type in ("search", "product"):
+                for language in ("en", "ar"):
+                    self.assertIn((store_key, page_type, language), covered)
+
+    def test_search_pages(self):
+        for page in self.pages:
+            if page.page_type != "search":
+                continue
+            with self.subTest(page=page.path.name):
+                result = page.scraper().parse_search_page(page.read())
+                products = result[0] if isinstance(result, tuple) else result
+                self.assertEqual(len(products), EXPECTED_SEARCH_COUNTS[page.path.name])
+                self.assertTrue(all(product["link"].startswith("https://") for product in products))
+
+    def test_product_pages(self):
+        for page in self.pages:
+            if page.page_type != "product":
+                continue
+            with self.subTest(page=page.path.name):
+                scraper = page.scraper()
+                html = page.read()
+                self.assertEqual(scraper.parse_availability(html), EXPECTED_AVAILABILITY[page.path.name])
+                title = scraper.parse_arabic_title(html, scraper.title_selector)
+                if "_not_found_" in page.path.name:
+                    self.assertIsNone(title)
+                    continue
+                title = title["title_arabic"]
+                self.assertEqual(title, " ".join(title.split()))
+                if page.language == "ar":
+                    self.assertRegex(title, "[؀-ۿ]")
+
+    def test_backends_give_the_same_results(self):
+        for page in self.pages:
+            html = page.read()
+            results = []
+            for backend in installed_backends():
+                scraper = page.scraper()
+                scraper.html_parser = backend
+                results.append({name: parse(html) for name, (parse, _) in page_parsers(scraper, page.page_type).items()})
+            with self.subTest(page=page.path.name):
+                self.assertTrue(all(result == results[0] for result in results))
+
+
+class TestBenchmarkRegressions(unittest.TestCase):
+    def test_slower_or_bigger_than_tolerance_is_a_regression(self):
+        baseline = {"lxml": {"search": {"pages_per_second": 100.0, "peak_kb_per_page": 1000.0}}}
+
+        within = {"lxml": {"search": {"pages_per_second": 80.0, "peak_kb_per_page": 1200.0}}}
+        self.assertEqual(regressions(within, baseline, tolerance=0.25), [])
+
+        slower = {"lxml": {"search": {"pages_per_second": 70.0, "peak_kb_per_page": 1300.0}},
+                  "html5lib": {"search": {"pages_per_second": 1.0, "peak_kb_per_page": 1.0}}}
+        self.assertEqual(len(regressions(slower, baseline, tolerance=0.25)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
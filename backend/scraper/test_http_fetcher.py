@@ -0,0 +1,153 @@
+import gzip
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+from bs4 import BeautifulSoup
+
+from scraper import extraction_scripts
+from scraper.http_fetcher import HttpFetcher
+from scraper.recorded_pages import PAGES_DIR
+from scraper.scraper import AmazonScraper, ExtraScraper
+
+AMAZON_PRODUCT_PAGE = """
+<html><body>
+  <span id="productTitle">Test Phone</span>
+  <div id="availability"><span>In Stock</span></div>
+  <input id="add-to-cart-button" type="submit">
+  <span class="a-price a-text-price a-size-medium apexPriceToPay"><span class="a-offscreen">SAR 1,299.00</span></span>
+</body></html>
+"""
+
+EXTRA_ARABIC_PAGE = """
+<html><body><h1 class="product-name">  هاتف   ذكي </h1></body></html>
+"""
+
+# What a client-rendered page looks like before its scripts ran
+EMPTY_APP_SHELL = """<html><body><div id="app"></div><script src="/app.js"></script></body></html>"""
+
+# What Amazon serves for a product that was delisted
+AMAZON_NOT_FOUND_PAGE = (PAGES_DIR / "amazon_product_not_found_en.html").read_text(encoding="utf-8")
+
+AMAZON_CAPTCHA_PAGE = """
+<html><body><form action="/errors/validateCaptcha"><input id="captchacharacters"></form></body></html>
+"""
+
+PAGES = {
+    "/amazon/dp/1": AMAZON_PRODUCT_PAGE,
+    "/extra/ar-sa/p/1": EXTRA_ARABIC_PAGE,
+    "/amazon/dp/2": EMPTY_APP_SHELL,
+    "/amazon/dp/captcha": AMAZON_CAPTCHA_PAGE,
+}
+
+# Served with a 404 status
+NOT_FOUND_PAGES = {
+    "/amazon/dp/gone": AMAZON_NOT_FOUND_PAGE,
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    client_ports = set()
+
+    def do_GET(self):
+        FixtureHandler.client_ports.add(self.client_address[1])
+        status = 404 if self.path in NOT_FOUND_PAGES else 200
+        page = PAGES.get(self.path) or NOT_FOUND_PAGES.get(self.path)
+        if page is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = page.encode("utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_response(status)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            self.send_response(status)
+        self.send_header("Content-Type", "text/html")  # No charset, like many store pages
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpFirstFetching(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FixtureHandler.client_ports.clear()
+        self.fetcher = HttpFetcher(max_connections_per_host=1, retries=0)
+
+    def tearDown(self):
+        self.fetcher.close()
+
+    def test_product_page_is_parsed_without_a_browser(self):
+        scraper = AmazonScraper("Amazon", driver_pool=None, fetcher=self.fetcher)
+        scraper.load_page = MagicMock()
+
+        result = scraper.scrape_availability(f"{self.base_url}/amazon/dp/1")
+
+        self.assertEqual(result, {"availability": True, "price": "1299.00"})
+        scraper.load_page.assert_not_called()
+        self.assertEqual(self.fetcher.stats.success_ratio("Amazon"), 1.0)
+
+    def test_delisted_product_is_unavailable(self):
+        scraper = AmazonScraper("Amazon", driver_pool=None, fetcher=self.fetcher)
+        scraper.load_page = MagicMock()
+
+        result = scraper.scrape_availability(f"{self.base_url}/amazon/dp/gone")
+
+        self.assertEqual(result, {"availability": False, "price": "N/A"})
+        scraper.load_page.assert_not_called()
+
+    def test_captcha_is_not_taken_for_a_delisted_product(self):
+        scraper = AmazonScraper("Amazon", driver_pool=None, fetcher=self.fetcher)
+        self.assertIsNone(scraper.parse_availability(AMAZON_CAPTCHA_PAGE))
+        self.assertIsNone(scraper.parse_availability(EMPTY_APP_SHELL))
+
+    def test_connection_is_kept_alive(self):
+        for _ in range(3):
+            self.assertIsNotNone(self.fetcher.fetch(f"{self.base_url}/amazon/dp/1"))
+        self.assertEqual(len(FixtureHandler.client_ports), 1)
+
+    def test_arabic_page_without_charset_is_decoded_as_utf8(self):
+        scraper = ExtraScraper("Extra", driver_pool=None, fetcher=self.fetcher)
+        result = scraper.scrape_arabic(f"{self.base_url}/extra/ar-sa/p/1")
+        self.assertEqual(result, {"store": "Extra", "title_arabic": "هاتف ذكي"})
+
+    def test_missing_selectors_fall_back_to_selenium(self):
+        scraper = AmazonScraper("Amazon", driver_pool=None, fetcher=self.fetcher)
+
+        # What the availability script returns for AMAZON_PRODUCT_PAGE
+        browser_fields = scraper.extract_availability(BeautifulSoup(AMAZON_PRODUCT_PAGE, scraper.html_parser))
+
+        def render_in_browser(url):
+            scraper.driver = MagicMock()
+            scraper.driver.execute_script.return_value = browser_fields
+        scraper.load_page = MagicMock(side_effect=render_in_browser)
+
+        result = scraper.scrape_availability(f"{self.base_url}/amazon/dp/2")
+
+        self.assertEqual(result, {"availability": True, "price": "1299.00"})
+        scraper.load_page.assert_called_once_with(f"{self.base_url}/amazon/dp/2")
+        scraper.driver.execute_script.assert_called_once_with(extraction_scripts.AMAZON_AVAILABILITY)
+        self.assertEqual(self.fetcher.stats.success_ratio("Amazon"), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
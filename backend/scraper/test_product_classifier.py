@@ -0,0 +1,58 @@
+import unittest
+
+from sqlalchemy.orm import Session
+
+from models import ClassificationCache, engine
+from scraper.product_classifier import ProductClassifier
+
+
+# Model fingerprints and products of these tests, whose cache rows are removed afterwards
+FINGERPRINTS = ("model-a", "model-b")
+PRODUCTS = [("Galaxy S23", "phone"), ("iPhone 14", "phone"), ("Pixel 8", "phone")]
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, texts):
+        self.calls.append(list(texts))
+        return [len(text) for text in texts]
+
+
+class TestProductClassifier(unittest.TestCase):
+    def setUp(self):
+        self.model = CountingModel()
+        self.db = Session(engine)
+
+    def tearDown(self):
+        self.db.rollback()
+        keys = [ProductClassifier(self.model, fingerprint).cache_key(title, search_value)
+                for fingerprint in FINGERPRINTS for title, search_value in PRODUCTS]
+        self.db.query(ClassificationCache).filter(ClassificationCache.title_hash.in_(keys)).delete()
+        self.db.commit()
+        self.db.close()
+
+    def test_one_predict_call_per_batch_and_cached_afterwards(self):
+        classifier = ProductClassifier(self.model, "model-a")
+        products = [("Galaxy S23", "phone"), ("iPhone 14", "phone"), ("Galaxy S23", "phone")]
+
+        categories = classifier.classify(self.db, products)
+        self.db.commit()
+        self.assertEqual(categories, [len("Galaxy S23 phone"), len("iPhone 14 phone"), len("Galaxy S23 phone")])
+        self.assertEqual(self.model.calls, [["Galaxy S23 phone", "iPhone 14 phone"]])
+
+        # Case and spacing do not matter; only the new product is predicted
+        categories = classifier.classify(self.db, [("galaxy  s23", "Phone"), ("Pixel 8", "phone")])
+        self.assertEqual(categories, [len("Galaxy S23 phone"), len("Pixel 8 phone")])
+        self.assertEqual(self.model.calls[1:], [["Pixel 8 phone"]])
+
+    def test_another_model_does_not_use_the_cache(self):
+        ProductClassifier(self.model, "model-a").classify(self.db, [("Galaxy S23", "phone")])
+        self.db.commit()
+        ProductClassifier(self.model, "model-b").classify(self.db, [("Galaxy S23", "phone")])
+        self.assertEqual(len(self.model.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+from sqlalchemy.orm import Session
+
+from models import Product, Store, ProductPriceHistory, engine
+from scraper.product_writer import ProductWriter
+
+
+def product_data(title, price, link="http://example.com/product", store="Writer Test Store"):
+    return {
+        "store": store,
+        "title": title,
+        "price": price,
+        "info": "N/A",
+        "search_value": "writer test",
+        "link": link,
+        "image_url": "http://example.com/image.jpg",
+        "current_index": 1,
+        "total_values": 1,
+    }
+
+
+class TestProductWriter(unittest.TestCase):
+    def setUp(self):
+        self.classified = []
+        self.writer = ProductWriter(self.classify)
+        self.db = Session(engine)
+
+    def classify(self, db, products):
+        self.classified.extend(title for title, _ in products)
+        return [7] * len(products)
+
+    def tearDown(self):
+        self.db.rollback()
+        store_ids = [store.store_id for store in self.db.query(Store).filter_by(store_name="Writer Test Store")]
+        product_ids = [product.product_id for product in self.db.query(Product).filter(Product.store_id.in_(store_ids))]
+        self.db.query(ProductPriceHistory).filter(ProductPriceHistory.product_id.in_(product_ids)).delete()
+        self.db.query(Product).filter(Product.product_id.in_(product_ids)).delete()
+        self.db.query(Store).filter(Store.store_id.in_(store_ids)).delete()
+        self.db.commit()
+        self.db.close()
+
+    def products(self):
+        return {product.title: product for product in
+                self.db.query(Product).join(Store).filter(Store.store_name == "Writer Test Store")}
+
+    def test_new_products_are_inserted_and_classified(self):
+        stored = self.writer.write(self.db, [product_data("Phone A", "10"), product_data("Phone B", "N/A"),
+                                             product_data("Phone A", "12")])
+
+        self.assertEqual(stored, 3)
+        products = self.products()
+        self.assertEqual(set(products), {"Phone A", "Phone B"})
+        self.assertEqual(products["Phone A"].price, 12.0, "The last copy of a product in a batch wins.")
+        self.assertIsNone(products["Phone B"].price)
+        self.assertIsNone(products["Phone A"].info)
+        self.assertEqual(products["Phone A"].category_id, 7)
+        self.assertEqual(sorted(self.classified), ["Phone A", "Phone B"])
+
+    def test_existing_products_are_updated_in_place(self):
+        self.writer.write(self.db, [product_data("Phone A", "10"), product_data("Phone B", "20")])
+        before = self.products()
+        self.classified.clear()
+
+        self.writer.write(self.db, [product_data("Phone A", "8"), product_data("Phone B", "20", link="http://new")])
+        self.db.expire_all()
+        after = self.products()
+
+        self.assertEqual(self.classified, [], "Existing products are not classified again.")
+        self.assertEqual(after["Phone A"].product_id, before["Phone A"].product_id)
+        self.assertEqual(after["Phone A"].price, 8.0)
+        self.assertEqual(after["Phone B"].link, "http://new")
+        self.assertEqual(after["Phone B"].category_id, 7, "The category of an existing product is kept.")
+
+        histories = self.db.query(ProductPriceHistory).filter(
+            ProductPriceHistory.product_id.in_([p.product_id for p in after.values()])).all()
+        self.assertEqual([(h.product_id, h.old_price, h.new_price) for h in histories],
+                         [(after["Phone A"].product_id, 10.0, 8.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
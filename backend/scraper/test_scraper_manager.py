@@ -1,4 +1,5 @@
 import unittest
+import threading
 from unittest.mock import patch, MagicMock
 from scraper.scraper_manager import ScraperManager
 from models import Product, Store, engine
@@ -30,13 +31,6 @@ class TestScraperManager(unittest.TestCase):
             self.assertIsInstance(search_values, list, "Search values should be a list.")
             self.assertGreater(len(search_values), 0, "Search values list should not be empty.")
 
-    def test_classify_product(self):
-        """Test product classification."""
-        with patch.object(self.manager, "classification_model", MagicMock()):
-            self.manager.classification_model.predict.return_value = [3]
-            category_id = self.manager.classify_product("Test Product", "test")
-            self.assertEqual(category_id, 3, "Category ID should match the mocked prediction.")
-
     def test_store_to_database(self):
         """Test storing a product in the database."""
         test_data = {
@@ -61,10 +55,10 @@ class TestScraperManager(unittest.TestCase):
 
     def test_run_scraper_for_value(self):
         """Test running a scraper for a specific value."""
-        with patch.object(self.manager, "store_to_database") as mock_store_to_database:
+        with patch.object(self.manager, "store_products", return_value=1) as mock_store_products:
             self.manager.run_scraper_for_value(self.mock_scraper, "iphone", 1, 1)
             self.mock_scraper.scrape_products.assert_called_with("iphone")
-            mock_store_to_database.assert_called_once()
+            mock_store_products.assert_called_once()
 
     def test_scrape_all_products(self):
         """Test scraping all products."""
@@ -73,6 +67,78 @@ class TestScraperManager(unittest.TestCase):
                 self.manager.scrape_all_products()
                 mock_run_scraper.assert_called()
 
+    def test_scrape_all_products_concurrently(self):
+        """Test that every store scrapes every search value and a single writer stores the results."""
+        store_scrapers = []
+        for store_name in ("Amazon", "Jarir"):
+            store_scraper = MagicMock()
+            store_scraper.store_name = store_name
+            store_scraper.server_rendered_search = False
+            store_scraper.scrape_products.side_effect = lambda value, store_name=store_name: [
+                {"store": store_name, "title": f"{value} product", "price": "10", "info": None,
+                 "link": "http://example.com/product", "image_url": "http://example.com/image.jpg"}
+            ]
+            store_scrapers.append(store_scraper)
+
+        writer_threads = set()
+        stored_titles = []
+
+        def store_products(db, batch):
+            writer_threads.add(threading.current_thread().name)
+            stored_titles.extend(data["title"] for data in batch)
+            return len(batch)
+
+        with patch.object(self.manager, "scrapers", store_scrapers), \
+                patch.object(self.manager, "load_search_values", return_value=["iphone", "ipad", "laptop"]), \
+                patch.object(self.manager, "store_products", side_effect=store_products):
+            stored = self.manager.scrape_all_products_concurrently(workers_per_store=1)
+
+        self.assertEqual(stored, 6, "Each store should scrape each search value once.")
+        self.assertEqual(len(stored_titles), 6)
+        self.assertEqual(writer_threads, {"scraper-writer"}, "Only the writer thread should store products.")
+
+    def test_writer_failure_reaches_the_caller(self):
+        """A failing writer neither blocks the workers on the full queue nor loses the error."""
+        store_scraper = MagicMock()
+        store_scraper.store_name = "Amazon"
+        store_scraper.server_rendered_search = False
+        store_scraper.scrape_products.side_effect = lambda value: [
+            {"store": "Amazon", "title": f"{value} product {i}", "price": "10", "info": None,
+             "link": "http://example.com/product", "image_url": "http://example.com/image.jpg"}
+            for i in range(20)
+        ]
+
+        with patch.object(self.manager, "scrapers", [store_scraper]), \
+                patch.object(self.manager, "load_search_values", return_value=["iphone", "ipad"]), \
+                patch.object(self.manager, "_store_batch", side_effect=RuntimeError("database is down")):
+            with self.assertRaises(RuntimeError):
+                self.manager.scrape_all_products_concurrently(workers_per_store=1, queue_size=5)
+
+    def test_failed_and_empty_scrapes_keep_their_interval(self):
+        """A value whose scrape failed or found nothing is postponed, not recorded as a crawl without changes."""
+        store_scraper = MagicMock()
+        store_scraper.store_name = "Amazon"
+
+        def scrape_products(value):
+            if value == "broken":
+                raise RuntimeError("page did not load")
+            return [] if value == "empty" else [
+                {"store": "Amazon", "title": f"{value} product", "price": "10", "info": None,
+                 "link": "http://example.com/product", "image_url": "http://example.com/image.jpg"}
+            ]
+        store_scraper.scrape_products.side_effect = scrape_products
+
+        scheduler = MagicMock()
+        with patch.object(self.manager, "scrapers", [store_scraper]), \
+                patch.object(self.manager, "scheduler", scheduler), \
+                patch.object(self.manager, "due_search_values", return_value=["iphone", "broken", "empty"]), \
+                patch.object(self.manager, "store_products", side_effect=lambda db, batch: len(batch)), \
+                patch("scraper.scraper_manager.time.sleep"):
+            self.manager.scrape_all_products()
+
+        self.assertEqual([c.args[1] for c in scheduler.record.call_args_list], ["iphone"])
+        self.assertEqual([c.args[1] for c in scheduler.postpone.call_args_list], ["broken", "empty"])
+
     @classmethod
     def tearDownClass(cls):
         """Clean up resources after tests."""
@@ -0,0 +1,61 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from models import SearchTermStats, engine
+from scraper.search_term_scheduler import SearchTermScheduler
+
+
+class TestSearchTermScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = SearchTermScheduler(min_hours=1, max_hours=8, change_target=0.1)
+        self.db = Session(engine)
+        self.now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def tearDown(self):
+        self.db.rollback()
+        self.db.query(SearchTermStats).delete()
+        self.db.commit()
+        self.db.close()
+
+    def crawl(self, search_value, found, new=0, price_changed=0, hours=0):
+        stats = self.scheduler.record(self.db, search_value, found, new, price_changed,
+                                      now=self.now + timedelta(hours=hours))
+        self.db.commit()
+        return stats.interval_hours
+
+    def test_static_terms_are_crawled_less_often_within_bounds(self):
+        self.assertEqual(self.crawl("static", 50, new=50), 1)
+        intervals = [self.crawl("static", 50, hours=hours) for hours in range(1, 8)]
+        self.assertEqual(intervals[:3], [1.5, 2.25, 3.375])
+        self.assertEqual(intervals[-1], 8)
+
+    def test_changing_terms_are_crawled_more_often(self):
+        self.crawl("busy", 100, new=100)
+        for hours in range(1, 4):
+            self.crawl("busy", 100, hours=hours)
+        slow = self.db.get(SearchTermStats, "busy").interval_hours
+        self.assertGreater(slow, 1)
+        self.assertLess(self.crawl("busy", 100, new=10, price_changed=30, hours=4), slow)
+
+    def test_postponed_terms_keep_their_interval_and_rates(self):
+        self.crawl("flaky", 50, new=50)
+        self.crawl("flaky", 50, hours=1)
+        stats = self.scheduler.postpone(self.db, "flaky", now=self.now + timedelta(hours=3))
+        self.db.commit()
+        self.assertEqual((stats.interval_hours, stats.crawls, stats.last_yield), (1.5, 2, 50))
+        self.assertEqual(stats.next_due_at.replace(tzinfo=timezone.utc), self.now + timedelta(hours=4.5))
+
+        never = self.scheduler.postpone(self.db, "never crawled", now=self.now)
+        self.assertEqual(never.next_due_at, self.now + timedelta(hours=1))
+
+    def test_only_due_terms_are_crawled(self):
+        self.crawl("crawled", 10, new=10)
+        values = ["never crawled", "crawled"]
+        self.assertEqual(self.scheduler.due(self.db, values, now=self.now + timedelta(minutes=30)), ["never crawled"])
+        self.assertEqual(self.scheduler.due(self.db, values, now=self.now + timedelta(hours=2)), values)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import time
+import unittest
+
+import requests
+
+from scraper.scraper import AmazonScraper, JarirScraper, ExtraScraper
+from scraper.stage_timer import StageTimer
+from scraper.store_simulator import StoreSimulator
+
+
+class TestStoreSimulator(unittest.TestCase):
+    def setUp(self):
+        self.simulator = StoreSimulator(latency_ms=0, jitter_ms=0, products_per_page=5, pages_per_search=2,
+                                        unavailable_rate=0.5).start()
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    def get(self, store_key, path):
+        return requests.get(self.simulator.base_url(store_key) + path, timeout=5)
+
+    def test_amazon_search_pages_paginate(self):
+        scraper = AmazonScraper("Amazon", base_url=self.simulator.base_url("amazon"))
+        products, has_next_page = scraper.parse_search_page(self.get("amazon", "/s?k=mouse&page=1").text)
+        self.assertEqual(len(products), 5)
+        self.assertTrue(has_next_page)
+        self.assertFalse(scraper.parse_search_page(self.get("amazon", "/s?k=mouse&page=2").text)[1])
+
+        availability = scraper.parse_availability(requests.get(products[0]["link"], timeout=5).text)
+        self.assertIn(availability["availability"], (True, False))
+
+    def test_jarir_and_extra_pages_parse(self):
+        for scraper, store_key, path in (
+                (JarirScraper("Jarir", base_url=self.simulator.base_url("jarir")), "jarir",
+                 "/sa-en/catalogsearch/result?search=mouse"),
+                (ExtraScraper("Extra", base_url=self.simulator.base_url("extra")), "extra",
+                 "/en-sa/search/?text=mouse&pg=1")):
+            with self.subTest(store=store_key):
+                products = scraper.parse_search_page(self.get(store_key, path).text)
+                self.assertGreaterEqual(len(products), 5)
+                product_page = requests.get(products[0]["link"], timeout=5).text
+                self.assertIn(scraper.parse_availability(product_page)["availability"], (True, False))
+
+    def test_failures_and_unknown_paths(self):
+        self.simulator.failure_rate = 1.0
+        self.assertEqual(self.get("amazon", "/s?k=mouse").status_code, 503)
+        self.simulator.failure_rate = 0.0
+        self.assertEqual(self.get("amazon", "/nowhere").status_code, 404)
+        self.assertEqual(self.simulator.failures["amazon"], 1)
+
+
+class TestStageTimer(unittest.TestCase):
+    def test_nested_stages_count_their_own_time(self):
+        timer = StageTimer()
+
+        @timer.timed("classify")
+        def classify():
+            time.sleep(0.05)
+
+        with timer.stage("persist"):
+            classify()
+
+        summary = timer.summary()
+        self.assertEqual(summary["classify"][0], 1)
+        self.assertGreaterEqual(summary["classify"][1], 0.05)
+        self.assertLess(summary["persist"][1], 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
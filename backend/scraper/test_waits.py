@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from selenium.common.exceptions import TimeoutException
+
+from scraper.waits import LatencyTracker, wait_until, wait_for_count_increase
+
+
+class TestLatencyTracker(unittest.TestCase):
+    def test_default_until_enough_samples(self):
+        tracker = LatencyTracker(min_samples=3)
+        tracker.record("Jarir", "tiles", 1.0)
+        self.assertEqual(tracker.timeout("Jarir", "tiles", default=20), 20)
+
+    def test_timeout_follows_p95_within_bounds(self):
+        tracker = LatencyTracker(min_samples=10, margin=1.5, min_seconds=1, max_seconds=30)
+        for seconds in [1.0] * 19 + [4.0]:
+            tracker.record("Jarir", "tiles", seconds)
+            tracker.record("Extra", "tiles", seconds / 10)
+            tracker.record("Amazon", "tiles", seconds * 100)
+
+        self.assertEqual(tracker.p95("Jarir", "tiles"), 1.0)
+        self.assertEqual(tracker.timeout("Jarir", "tiles", default=20), 1.5)  # Not the single 4s outlier
+        self.assertEqual(tracker.timeout("Extra", "tiles", default=20), 1)
+        self.assertEqual(tracker.timeout("Amazon", "tiles", default=20), 30)
+        self.assertEqual(tracker.timeout("Jarir", "popup", default=5), 5)
+
+
+class TestWaits(unittest.TestCase):
+    def test_timeouts_of_optional_elements_are_not_recorded(self):
+        tracker = LatencyTracker(min_samples=1)
+        never = MagicMock(return_value=False)
+
+        with self.assertRaises(TimeoutException):
+            wait_until(MagicMock(), "Jarir", "popup", never, default=0.2, expected=False, tracker=tracker)
+        self.assertIsNone(tracker.p95("Jarir", "popup"))
+
+        with self.assertRaises(TimeoutException):
+            wait_until(MagicMock(), "Jarir", "tiles", never, default=0.2, tracker=tracker)
+        self.assertEqual(tracker.p95("Jarir", "tiles"), 0.2)
+
+    def test_count_increase_returns_as_soon_as_tiles_arrive(self):
+        tracker = LatencyTracker()
+        driver = MagicMock()
+        driver.execute_script.side_effect = [[24, 100, 1], [24, 103, 1], [48, 110, 0]]
+
+        with patch("scraper.waits.time.sleep"):
+            count = wait_for_count_increase(driver, "Jarir", "div.tile", 24, tracker=tracker)
+
+        self.assertEqual(count, 48)
+        self.assertEqual(driver.execute_script.call_count, 3)
+        self.assertIsNotNone(tracker.p95("Jarir", "more tiles"))
+
+    def test_count_increase_stops_when_network_is_idle(self):
+        tracker = LatencyTracker()
+        driver = MagicMock()
+        driver.execute_script.return_value = [24, 100, 0]
+        clock = iter(range(1000))
+
+        with patch("scraper.waits.time.sleep"), \
+                patch("scraper.waits.time.monotonic", side_effect=lambda: next(clock) * 0.25):
+            count = wait_for_count_increase(driver, "Jarir", "div.tile", 24, default=10, tracker=tracker)
+
+        self.assertEqual(count, 24)
+        self.assertLess(driver.execute_script.call_count, 10)  # Well before the 10s timeout
+        self.assertIsNone(tracker.p95("Jarir", "more tiles"))
+
+    def test_count_increase_waits_for_requests_in_flight(self):
+        tracker = LatencyTracker()
+        driver = MagicMock()
+        # A slow XHR: no new resource entry for 3 seconds, then the tiles arrive
+        driver.execute_script.side_effect = [[24, 100, 1]] * 12 + [[48, 101, 0]]
+        clock = iter(range(1000))
+
+        with patch("scraper.waits.time.sleep"), \
+                patch("scraper.waits.time.monotonic", side_effect=lambda: next(clock) * 0.25):
+            count = wait_for_count_increase(driver, "Jarir", "div.tile", 24, default=10, tracker=tracker)
+
+        self.assertEqual(count, 48)
+
+    def test_idle_window_follows_the_usual_wait(self):
+        tracker = LatencyTracker()
+        for _ in range(20):
+            tracker.record("Jarir", "more tiles", 2.0)
+        driver = MagicMock()
+        # Tiles usually take 2s: a 1.5s quiet period is not the end of the results
+        driver.execute_script.side_effect = [[24, 100, 0]] * 7 + [[48, 101, 0]]
+        clock = iter(range(1000))
+
+        with patch("scraper.waits.time.sleep"), \
+                patch("scraper.waits.time.monotonic", side_effect=lambda: next(clock) * 0.25):
+            count = wait_for_count_increase(driver, "Jarir", "div.tile", 24, default=10, tracker=tracker)
+
+        self.assertEqual(count, 48)
+
+
+if __name__ == "__main__":
+    unittest.main()
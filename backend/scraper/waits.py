@@ -0,0 +1,174 @@
+# backend/scraper/waits.py
+"""
+Waits on concrete progress signals (an element appears, the tile count grows,
+the network goes idle, an element goes stale) instead of fixed sleeps, with
+timeouts adapted per store from the latencies seen so far.
+"""
+import os
+import time
+import math
+import threading
+from collections import defaultdict, deque
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from dotenv import load_dotenv
+
+from scraper.stage_timer import stage_timer
+
+load_dotenv()
+
+# Bounds of the adaptive timeouts, and the margin applied to the observed p95
+WAIT_MIN_SECONDS = float(os.getenv("WAIT_MIN_SECONDS", "2"))
+WAIT_MAX_SECONDS = float(os.getenv("WAIT_MAX_SECONDS", "30"))
+WAIT_P95_MARGIN = float(os.getenv("WAIT_P95_MARGIN", "1.5"))
+
+POLL_SECONDS = 0.1
+# Shortest quiet period after which a page that stopped loading resources is considered done
+# (the p95 of the wait is used when longer)
+NETWORK_IDLE_SECONDS = 1.0
+
+# Tile count, resource count and fetch/XHR requests in flight. The resource timing buffer
+# (250 entries by default) is enlarged so that a full buffer is not mistaken for an idle
+# network, and fetch / XMLHttpRequest are wrapped once per page to count pending requests,
+# which have no resource entry until they complete.
+PROGRESS_SCRIPT = """
+if (!window.__buyviaPending) {
+    window.__buyviaPending = {count: 0};
+    const pending = window.__buyviaPending;
+    const done = () => { pending.count = Math.max(0, pending.count - 1); };
+    const fetch = window.fetch;
+    if (fetch) {
+        window.fetch = function () {
+            pending.count++;
+            return fetch.apply(this, arguments).finally(done);
+        };
+    }
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        pending.count++;
+        this.addEventListener("loadend", done, {once: true});
+        return send.apply(this, arguments);
+    };
+}
+performance.setResourceTimingBufferSize(100000);
+return [
+    document.querySelectorAll(arguments[0]).length,
+    performance.getEntriesByType("resource").length,
+    window.__buyviaPending.count,
+];
+"""
+
+
+class LatencyTracker:
+    """
+    Rolling window of wait durations per (store, kind of wait), kept in memory.
+    timeout() is the window's p95 times `margin`, within [min_seconds, max_seconds],
+    or the caller's default until `min_samples` waits were seen.
+    """
+
+    def __init__(self, window=100, min_samples=10, margin=WAIT_P95_MARGIN,
+                 min_seconds=WAIT_MIN_SECONDS, max_seconds=WAIT_MAX_SECONDS):
+        self.min_samples = min_samples
+        self.margin = margin
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, store_name, kind, seconds):
+        with self._lock:
+            self._samples[(store_name, kind)].append(seconds)
+
+    def p95(self, store_name, kind):
+        with self._lock:
+            samples = sorted(self._samples[(store_name, kind)])
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(0.95 * len(samples)) - 1)]
+
+    def timeout(self, store_name, kind, default):
+        with self._lock:
+            enough = len(self._samples[(store_name, kind)]) >= self.min_samples
+        if not enough:
+            return default
+        return min(self.max_seconds, max(self.min_seconds, self.p95(store_name, kind) * self.margin))
+
+
+# Shared by every scraper of the process
+latency_tracker = LatencyTracker()
+
+
+@stage_timer.timed("fetch")
+def wait_until(driver, store_name, kind, condition, default, expected=True, tracker=None):
+    """
+    WebDriverWait(driver, adaptive timeout).until(condition), recording how long it took.
+
+    :param kind: What is waited for; timeouts adapt per (store_name, kind).
+    :param default: Timeout in seconds until enough waits of this kind were seen.
+    :param expected: False for elements that are often absent (popups): timeouts are then
+        not recorded, so they don't push the p95 up to the timeout itself.
+    :raises TimeoutException: when the condition is still false after the timeout.
+    """
+    tracker = tracker or latency_tracker
+    timeout = tracker.timeout(store_name, kind, default)
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS).until(condition)
+    except TimeoutException:
+        if expected:
+            # A slow page still counts, so the timeout grows for stores that keep timing out
+            tracker.record(store_name, kind, timeout)
+        raise
+    tracker.record(store_name, kind, time.monotonic() - start)
+    return result
+
+
+def wait_for_element(driver, store_name, selector, kind="element", default=20, clickable=False, **kwargs):
+    """Wait until the CSS selector matches an element (a clickable one with clickable=True) and return it."""
+    locator = (By.CSS_SELECTOR, selector)
+    condition = EC.element_to_be_clickable(locator) if clickable else EC.presence_of_element_located(locator)
+    return wait_until(driver, store_name, kind, condition, default, **kwargs)
+
+
+def wait_for_staleness(driver, store_name, element, kind="navigation", default=10, **kwargs):
+    """Wait until element is detached from the page (e.g. the page was replaced after a click)."""
+    return wait_until(driver, store_name, kind, EC.staleness_of(element), default, **kwargs)
+
+
+@stage_timer.timed("fetch")
+def wait_for_count_increase(driver, store_name, selector, previous_count, kind="more tiles", default=10,
+                            tracker=None):
+    """
+    Wait until more than previous_count elements match selector (e.g. tiles appended
+    after a scroll) and return the new count. Returns previous_count early when the
+    network went idle without new elements (nothing more to load), or after the timeout.
+
+    The network is idle when no fetch/XHR is in flight and no resource completed for
+    the usual time new elements take to appear (p95 of this wait, at least
+    NETWORK_IDLE_SECONDS), so a slow request is not taken for the end of the results.
+    """
+    tracker = tracker or latency_tracker
+    timeout = tracker.timeout(store_name, kind, default)
+    idle_seconds = max(NETWORK_IDLE_SECONDS, tracker.p95(store_name, kind) or 0)
+    start = time.monotonic()
+    last_resources = None
+    idle_since = start
+
+    while True:
+        count, resources, pending = driver.execute_script(PROGRESS_SCRIPT, selector)
+        now = time.monotonic()
+        if count > previous_count:
+            tracker.record(store_name, kind, now - start)
+            return count
+        if resources != last_resources or pending:
+            last_resources = resources
+            idle_since = now
+        elif now - idle_since >= idle_seconds:
+            return previous_count  # Network idle: nothing more is coming
+        if now - start >= timeout:
+            tracker.record(store_name, kind, timeout)
+            return previous_count
+        time.sleep(POLL_SECONDS)
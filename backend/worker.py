@@ -0,0 +1,51 @@
+# worker.py
+import signal
+import argparse
+import threading
+from dotenv import load_dotenv
+
+from models import SessionLocal
+from alerting.index import alert_index
+from scheduler import (JOBS, STORE_JOBS, DEPLOYMENT_ENVIRONMENT, parse_job_names, start_background_tasks,
+                       stop_background_tasks)
+
+load_dotenv()
+
+# Jobs run by a worker when --jobs is not given; a DEV checkout does not scrape the live stores
+DEFAULT_WORKER_JOBS = ",".join(
+    ["alerts", "recommendations"] + ([] if DEPLOYMENT_ENVIRONMENT == "DEV" else list(STORE_JOBS))
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Buy-Via background jobs outside the API process.")
+    parser.add_argument(
+        "--jobs",
+        default=DEFAULT_WORKER_JOBS,
+        help=f"Comma-separated jobs to run, or 'all'. Available: {', '.join(JOBS)}.",
+    )
+    args = parser.parse_args()
+
+    try:
+        jobs = parse_job_names(args.jobs)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Price writes in this process evaluate alerts through the in-memory index
+    with SessionLocal() as db:
+        alert_index.load(db)
+
+    scheduler = start_background_tasks(jobs)
+
+    # Stop cooperatively on Ctrl+C / docker stop
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    stop.wait()
+
+    print("Worker shutting down.")
+    stop_background_tasks(scheduler)
+
+
+if __name__ == "__main__":
+    main()